@@ -0,0 +1,131 @@
+"""
+Two-tier cache for AI generations
+An in-process LRU in front of a Mongo collection; entries are content-addressed
+by (function, normalized input, English level, model, prompt version), expire
+through a TTL index and the store is trimmed to a maximum size.
+"""
+import hashlib
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+# Add backend directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import ai_cache_collection
+from metrics import metrics
+from text_utils import normalize_text
+
+CACHE_TTL_SECONDS = int(os.getenv('AI_CACHE_TTL_SECONDS', 30 * 24 * 3600))
+MEMORY_MAX_ENTRIES = int(os.getenv('AI_CACHE_MEMORY_ENTRIES', 2000))
+STORE_MAX_ENTRIES = int(os.getenv('AI_CACHE_MAX_ENTRIES', 200000))
+TRIM_EVERY_WRITES = 500  # size check cadence for the Mongo store
+
+
+# Case changes the answer for these ("Polish" vs "polish"), so it stays in the key
+CASE_SENSITIVE_FUNCTIONS = {'translate', 'translate_sentence'}
+
+
+def cache_key(function, text, english_level, model, prompt_version, context=''):
+    """sha256 content address of one generation request"""
+    text = normalize_text(text, casefold=function not in CASE_SENSITIVE_FUNCTIONS)
+    parts = [function, text, english_level or '', model, prompt_version, normalize_text(context)]
+    return hashlib.sha256(json.dumps(parts, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+class AICache:
+    """LRU (memory) -> Mongo (shared across processes and restarts)"""
+
+    def __init__(self, ttl_seconds=CACHE_TTL_SECONDS, memory_entries=MEMORY_MAX_ENTRIES,
+                 store_entries=STORE_MAX_ENTRIES):
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.memory_entries = memory_entries
+        self.store_entries = store_entries
+        self._memory = OrderedDict()  # key -> (value, expires_at)
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def _memory_get(self, key, now):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= now:
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            return entry[0]
+
+    def _memory_put(self, key, value, expires_at):
+        with self._lock:
+            self._memory[key] = (value, expires_at)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, key, function):
+        """Cached value or None"""
+        now = datetime.utcnow()
+        value = self._memory_get(key, now)
+        if value is not None:
+            metrics.inc('ai_cache_hits', tier='memory', function=function)
+            return value
+
+        if ai_cache_collection is not None:
+            try:
+                doc = ai_cache_collection.find_one({'_id': key, 'expires_at': {'$gt': now}}, {'value': 1, 'expires_at': 1})
+            except Exception as e:
+                print(f"❌ AI cache read error: {e}")
+                doc = None
+            if doc is not None:
+                self._memory_put(key, doc['value'], doc['expires_at'])
+                metrics.inc('ai_cache_hits', tier='store', function=function)
+                return doc['value']
+
+        metrics.inc('ai_cache_misses', function=function)
+        return None
+
+    def set(self, key, function, value):
+        now = datetime.utcnow()
+        expires_at = now + self.ttl
+        self._memory_put(key, value, expires_at)
+
+        if ai_cache_collection is None:
+            return
+        try:
+            ai_cache_collection.update_one(
+                {'_id': key},
+                {'$set': {'function': function, 'value': value, 'created_at': now, 'expires_at': expires_at}},
+                upsert=True
+            )
+            with self._lock:
+                self._writes += 1
+                trim = self._writes % TRIM_EVERY_WRITES == 0
+            if trim:
+                self.trim()
+        except Exception as e:
+            # A cache write failure must never fail the generation itself
+            print(f"❌ AI cache write error: {e}")
+
+    def trim(self):
+        """Evict entries closest to expiry once the store exceeds its size bound"""
+        excess = ai_cache_collection.estimated_document_count() - self.store_entries
+        if excess <= 0:
+            return 0
+        oldest = [
+            doc['_id']
+            for doc in ai_cache_collection.find({}, {'_id': 1}).sort('expires_at', 1).limit(excess)
+        ]
+        result = ai_cache_collection.delete_many({'_id': {'$in': oldest}})
+        metrics.inc('ai_cache_evictions', result.deleted_count)
+        return result.deleted_count
+
+    def clear_memory(self):
+        with self._lock:
+            self._memory.clear()
+
+
+ai_cache = AICache()
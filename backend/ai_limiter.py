@@ -0,0 +1,135 @@
+"""
+Adaptive concurrency limiter for the AI upstream
+AIMD per model: the in-flight limit grows by about one per round of healthy,
+fast completions and is halved on 429s and on timeouts of calls that had a
+fair share of their budget (not ones starved by queueing). Requests over the limit
+wait in a priority queue (interactive > batch > background) until their
+deadline. Runs on the provider event loop, so no locking is needed.
+"""
+import asyncio
+import contextvars
+import heapq
+import itertools
+import os
+import sys
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+# Add backend directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ai_resilience import failure_reason
+from metrics import metrics
+
+INTERACTIVE, BATCH, BACKGROUND = 0, 1, 2
+PRIORITY_NAMES = {INTERACTIVE: 'interactive', BATCH: 'batch', BACKGROUND: 'background'}
+
+MIN_LIMIT = 1
+DECREASE_FACTOR = 0.5
+LATENCY_TARGET_FRACTION = 0.5  # healthy = finished within half the operation budget
+
+# Set by callers (batch jobs, background builders); read in the calling thread
+ai_priority = contextvars.ContextVar('ai_priority', default=INTERACTIVE)
+
+
+@contextmanager
+def priority(level):
+    """Run AI calls made inside the block at the given priority"""
+    token = ai_priority.set(level)
+    try:
+        yield
+    finally:
+        ai_priority.reset(token)
+
+
+class LimiterTimeout(Exception):
+    """Request deadline passed while waiting for a concurrency slot"""
+
+
+class AdaptiveLimiter:
+    """AIMD limit plus a deadline-aware priority queue for one model"""
+
+    def __init__(self, name, initial_limit, max_limit):
+        self.name = name
+        self.max_limit = max(max_limit, MIN_LIMIT)
+        self.limit = float(min(max(initial_limit, MIN_LIMIT), self.max_limit))
+        self.in_flight = 0
+        self._waiters = []  # heap of (priority, seq, future)
+        self._seq = itertools.count()
+        self._last_decrease = 0.0
+        self._publish()
+
+    def _publish(self):
+        metrics.set_gauge('ai_concurrency_limit', round(self.limit, 2), model=self.name)
+        metrics.set_gauge('ai_in_flight', self.in_flight, model=self.name)
+        metrics.set_gauge('ai_queue_depth', len(self._waiters), model=self.name)
+
+    def _has_capacity(self):
+        return self.in_flight < int(self.limit)
+
+    def _wake(self):
+        while self._waiters and self._has_capacity():
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                # The slot is handed over directly so a newcomer cannot take it
+                self.in_flight += 1
+                future.set_result(None)
+
+    async def _acquire(self, level, deadline):
+        if not self._waiters and self._has_capacity():
+            self.in_flight += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (level, next(self._seq), future))
+        self._publish()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), max(deadline - time.monotonic(), 0))
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                # Woken at the same moment: give the slot back
+                self._release()
+            else:
+                future.cancel()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            metrics.inc('ai_limiter_timeouts', model=self.name, priority=PRIORITY_NAMES[level])
+            raise LimiterTimeout(f'AI model {self.name} is busy, please try again shortly') from None
+        finally:
+            self._publish()
+
+    def _release(self):
+        self.in_flight -= 1
+        self._wake()
+        self._publish()
+
+    def _on_result(self, error, started_at, latency, latency_target):
+        reason = failure_reason(error) if error is not None else None
+        if reason in ('rate_limited', 'timeout'):
+            # One cut per congestion event: requests started before the last cut don't count
+            if started_at > self._last_decrease:
+                self.limit = max(MIN_LIMIT, self.limit * DECREASE_FACTOR)
+                self._last_decrease = time.monotonic()
+                metrics.inc('ai_limit_decreases', model=self.name, reason=reason)
+        elif error is None and latency <= latency_target and self.in_flight >= int(self.limit):
+            # Grow only while the current limit is actually the bottleneck
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    @asynccontextmanager
+    async def slot(self, level, deadline, latency_target):
+        """Hold one concurrency slot for the body; its outcome adjusts the limit"""
+        queued_at = time.monotonic()
+        await self._acquire(level, deadline)
+        started_at = time.monotonic()
+        metrics.observe('ai_queue_wait_seconds', started_at - queued_at, model=self.name, priority=PRIORITY_NAMES[level])
+
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            if not isinstance(error, asyncio.CancelledError):
+                self._on_result(error, started_at, time.monotonic() - started_at, latency_target)
+            self._release()
@@ -0,0 +1,248 @@
+"""
+Async OpenAI provider
+One AsyncOpenAI client over a shared, explicitly sized httpx connection pool,
+driven by a dedicated event-loop thread. Per-model adaptive limiters (ai_limiter)
+cap in-flight requests; every call goes through the ai_resilience policy
+(deadline, retries, circuit breaker); sync wrappers let the threaded server
+submit work to the loop.
+"""
+import asyncio
+import os
+import queue
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import httpx
+from dotenv import load_dotenv
+from openai import APITimeoutError, AsyncOpenAI
+
+# Add backend directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ai_limiter import AdaptiveLimiter, INTERACTIVE, LATENCY_TARGET_FRACTION, ai_priority
+from ai_resilience import DeadlineExhausted, call_with_resilience, operation_timeout
+from ai_usage import ai_usage_tracker
+from model_router import model_router
+from metrics import metrics
+
+load_dotenv()
+
+MAX_CONNECTIONS = int(os.getenv('AI_MAX_CONNECTIONS', 32))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('AI_MAX_KEEPALIVE_CONNECTIONS', 16))
+KEEPALIVE_EXPIRY_SECONDS = 30
+CONNECT_TIMEOUT_SECONDS = 5
+DEFAULT_TIMEOUT_SECONDS = float(os.getenv('AI_TIMEOUT_SECONDS', 60))
+DEFAULT_MODEL_CONCURRENCY = int(os.getenv('AI_MODEL_CONCURRENCY', 8))  # starting point of the adaptive limit
+MODEL_MAX_CONCURRENCY = int(os.getenv('AI_MODEL_MAX_CONCURRENCY', MAX_CONNECTIONS))
+
+
+def _parse_model_limits(value):
+    """'gpt-4o-mini=16,gpt-4o=4' -> {'gpt-4o-mini': 16, 'gpt-4o': 4}"""
+    limits = {}
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        model, _, limit = item.partition('=')
+        limits[model.strip()] = int(limit)
+    return limits
+
+
+MODEL_CONCURRENCY = _parse_model_limits(os.getenv('AI_MODEL_CONCURRENCY_LIMITS', ''))
+
+_STREAM_END = object()
+
+
+@contextmanager
+def _attempt_budget(model, operation, budget, latency_target):
+    """
+    Timeouts of an attempt that started with less than a healthy call's duration
+    left are reported as DeadlineExhausted, so they don't cut the concurrency
+    limit or count as circuit breaker failures
+    """
+    try:
+        yield
+    except (asyncio.TimeoutError, APITimeoutError) as e:
+        if budget >= latency_target:
+            raise
+        metrics.inc('ai_starved_timeouts', model=model, operation=operation)
+        raise DeadlineExhausted(f'AI {operation} ran out of time after waiting for capacity') from e
+
+
+class AIProvider:
+    """Owns the event loop thread, the HTTP pool and the per-model limiters"""
+
+    def __init__(self, api_key=None):
+        self.api_key = api_key
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        self._client = None
+        self._limiters = {}
+
+    def _start_locked(self):
+        loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(loop)
+            loop.call_soon(ready.set)
+            loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name='ai-provider-loop', daemon=True)
+        self._thread.start()
+        ready.wait()
+
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=KEEPALIVE_EXPIRY_SECONDS
+            ),
+            timeout=httpx.Timeout(DEFAULT_TIMEOUT_SECONDS, connect=CONNECT_TIMEOUT_SECONDS)
+        )
+        # Retries belong to ai_resilience, which also honours Retry-After
+        self._client = AsyncOpenAI(
+            api_key=self.api_key or os.getenv('OPENAI_API_KEY'),
+            http_client=http_client,
+            max_retries=0
+        )
+        self._loop = loop
+        print(f"🤖 AI provider started ({MAX_CONNECTIONS} connections)")
+
+    def _ensure_started(self):
+        if self._loop is None:
+            with self._lock:
+                if self._loop is None:
+                    self._start_locked()
+        return self._loop
+
+    def _limiter(self, model):
+        # Only touched from the loop thread
+        limiter = self._limiters.get(model)
+        if limiter is None:
+            limiter = self._limiters[model] = AdaptiveLimiter(
+                model,
+                MODEL_CONCURRENCY.get(model, DEFAULT_MODEL_CONCURRENCY),
+                MODEL_MAX_CONCURRENCY
+            )
+        return limiter
+
+    async def _acomplete(self, model, messages, temperature, response_format=None, timeout=None, operation=None,
+                         level=INTERACTIVE):
+        options = {'response_format': response_format} if response_format else {}
+        latency_target = operation_timeout(operation) * LATENCY_TARGET_FRACTION
+
+        async def attempt(deadline):
+            async with self._limiter(model).slot(level, deadline, latency_target):
+                remaining = deadline - time.monotonic()
+                metrics.inc('ai_requests', model=model)
+                started = time.monotonic()
+                with _attempt_budget(model, operation, remaining, latency_target), \
+                        metrics.timer('ai_request_seconds', model=model):
+                    response = await asyncio.wait_for(self._client.chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        temperature=temperature,
+                        timeout=remaining,
+                        **options
+                    ), remaining)
+                ai_usage_tracker.record_call(model, response.usage, time.monotonic() - started)
+                model_router.record_latency(model, operation, time.monotonic() - started)
+                return response
+
+        response = await call_with_resilience(model, operation, attempt, timeout)
+        return response.choices[0].message.content
+
+    async def _astream(self, model, messages, temperature, on_delta, response_format=None, timeout=None,
+                       operation=None, level=INTERACTIVE):
+        options = {'response_format': response_format} if response_format else {}
+        latency_target = operation_timeout(operation) * LATENCY_TARGET_FRACTION
+        emitted = []
+
+        async def consume(remaining):
+            started = time.monotonic()
+            usage = None
+            stream = await self._client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                timeout=remaining,
+                stream=True,
+                stream_options={'include_usage': True},  # usage arrives in a final, choice-less chunk
+                **options
+            )
+            async for chunk in stream:
+                if chunk.usage is not None:
+                    usage = chunk.usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    emitted.append(True)
+                    on_delta(chunk.choices[0].delta.content)
+            ai_usage_tracker.record_call(model, usage, time.monotonic() - started)
+            model_router.record_latency(model, operation, time.monotonic() - started)
+
+        async def attempt(deadline):
+            async with self._limiter(model).slot(level, deadline, latency_target):
+                remaining = deadline - time.monotonic()
+                metrics.inc('ai_requests', model=model, stream='true')
+                with _attempt_budget(model, operation, remaining, latency_target), \
+                        metrics.timer('ai_request_seconds', model=model, stream='true'):
+                    await asyncio.wait_for(consume(remaining), remaining)
+
+        # Once output reached the caller a retry would duplicate it
+        await call_with_resilience(model, operation, attempt, timeout, can_retry=lambda: not emitted)
+
+    def submit(self, coroutine):
+        """Schedule a coroutine on the provider loop; returns a concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self._ensure_started())
+
+    async def acomplete(self, model, messages, temperature, response_format=None, timeout=None, operation=None):
+        """Await a completion from any event loop (async server mode)"""
+        await asyncio.to_thread(ai_usage_tracker.check_budget)
+        future = self.submit(self._acomplete(model, messages, temperature, response_format, timeout, operation,
+                                             ai_priority.get()))
+        return await asyncio.wrap_future(future)
+
+    def complete(self, model, messages, temperature, response_format=None, timeout=None, operation=None):
+        """Blocking completion for request threads"""
+        ai_usage_tracker.check_budget()
+        future = self.submit(self._acomplete(model, messages, temperature, response_format, timeout, operation,
+                                             ai_priority.get()))
+        return future.result()
+
+    def stream(self, model, messages, temperature, response_format=None, timeout=None, operation=None):
+        """
+        Blocking generator of content deltas for request threads
+        Closing the generator early cancels the upstream request.
+        """
+        ai_usage_tracker.check_budget()
+        deltas = queue.Queue()
+        future = self.submit(self._astream(model, messages, temperature, deltas.put, response_format, timeout, operation,
+                                           ai_priority.get()))
+        future.add_done_callback(lambda _: deltas.put(_STREAM_END))
+        try:
+            while True:
+                delta = deltas.get()
+                if delta is _STREAM_END:
+                    break
+                yield delta
+            future.result()
+        finally:
+            future.cancel()
+
+    def close(self):
+        """Close the HTTP pool and stop the loop thread"""
+        with self._lock:
+            if self._loop is None:
+                return
+            try:
+                asyncio.run_coroutine_threadsafe(self._client.close(), self._loop).result(5)
+            except Exception as e:
+                print(f"❌ AI provider close error: {e}")
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(5)
+            self._loop = None
+            self._client = None
+            self._limiters = {}
+
+
+ai_provider = AIProvider()
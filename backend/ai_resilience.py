@@ -0,0 +1,213 @@
+"""
+Resilience policy for AI upstream calls
+Per-operation deadlines, retries with full-jitter exponential backoff on
+429 / 5xx / timeouts (honouring Retry-After) and a per-model circuit breaker
+that fails fast while the upstream is unhealthy.
+"""
+import asyncio
+import os
+import random
+import sys
+import threading
+import time
+
+from openai import APIConnectionError, APIStatusError
+
+# Add backend directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from metrics import metrics
+
+MAX_ATTEMPTS = int(os.getenv('AI_MAX_ATTEMPTS', 3))
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 8.0
+MAX_RETRY_AFTER_SECONDS = 30.0
+BREAKER_FAILURE_THRESHOLD = int(os.getenv('AI_BREAKER_FAILURES', 5))
+BREAKER_RESET_SECONDS = float(os.getenv('AI_BREAKER_RESET_SECONDS', 30))
+
+# Whole-call budget per operation, retries included
+DEFAULT_OPERATION_TIMEOUT_SECONDS = 30.0
+OPERATION_TIMEOUTS = {
+    'complete_flashcard': 45.0,
+    'complete_flashcard_batch': 90.0,
+    'definition': 20.0,
+    'examples': 20.0,
+    'regenerate_examples': 20.0,
+    'exercise_explanation': 20.0,
+    'translate': 15.0,
+    'translate_sentence': 15.0,
+}
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+_STATE_GAUGE = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling upstream while the model's breaker is open"""
+
+
+class DeadlineExhausted(TimeoutError):
+    """
+    An attempt timed out after starting with too little of the operation budget
+    left (queue wait, earlier attempts); it says nothing about upstream health
+    """
+
+
+class CircuitBreaker:
+    """
+    closed -> open after `failure_threshold` consecutive upstream failures;
+    open -> half_open after `reset_seconds`, letting one probe through;
+    the probe closes the breaker on success or reopens it on failure
+    """
+
+    def __init__(self, name, failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_seconds=BREAKER_RESET_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def _set_state(self, state):
+        self.state = state
+        metrics.set_gauge('ai_circuit_state', _STATE_GAUGE[state], model=self.name)
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go upstream now"""
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.reset_seconds:
+                self._set_state(HALF_OPEN)
+            if self.state == CLOSED:
+                return
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+        metrics.inc('ai_circuit_rejections', model=self.name)
+        raise CircuitOpenError(f'AI model {self.name} is temporarily unavailable, please try again shortly')
+
+    def is_open(self):
+        """True while calls are rejected outright (open and not yet due for a probe)"""
+        with self._lock:
+            return self.state == OPEN and time.monotonic() - self._opened_at < self.reset_seconds
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._probe_in_flight = False
+            if self.state != CLOSED:
+                print(f"✅ AI circuit for {self.name} closed")
+                self._set_state(CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probe_in_flight = False
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.failure_threshold):
+                print(f"❌ AI circuit for {self.name} opened after {self.failures} failures")
+                self._opened_at = time.monotonic()
+                self._set_state(OPEN)
+                metrics.inc('ai_circuit_opened', model=self.name)
+
+    def release(self):
+        """Call ended without telling anything about upstream health"""
+        with self._lock:
+            self._probe_in_flight = False
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(model):
+    with _breakers_lock:
+        breaker = _breakers.get(model)
+        if breaker is None:
+            breaker = _breakers[model] = CircuitBreaker(model)
+        return breaker
+
+
+def operation_timeout(operation):
+    return OPERATION_TIMEOUTS.get(operation, DEFAULT_OPERATION_TIMEOUT_SECONDS)
+
+
+def failure_reason(error):
+    """Metric label for an upstream failure that is worth retrying, else None"""
+    if isinstance(error, DeadlineExhausted):
+        return None  # not the upstream's fault, and no budget left to retry
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError)):
+        return 'timeout'
+    if isinstance(error, APIStatusError):
+        if error.status_code == 429:
+            return 'rate_limited'
+        if error.status_code >= 500:
+            return 'server_error'
+        return None
+    if isinstance(error, APIConnectionError):
+        # APITimeoutError is a subclass
+        return 'connection'
+    return None
+
+
+def retry_after_seconds(error):
+    """Server requested delay from retry-after-ms / retry-after headers, if any"""
+    response = getattr(error, 'response', None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if headers.get('retry-after-ms'):
+            return float(headers['retry-after-ms']) / 1000
+        if headers.get('retry-after'):
+            return float(headers['retry-after'])
+    except ValueError:
+        return None  # HTTP-date form: fall back to our own backoff
+    return None
+
+
+def backoff_seconds(attempt):
+    """Full jitter: uniform(0, min(cap, base * 2^attempt))"""
+    return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+
+async def call_with_resilience(model, operation, attempt_fn, timeout=None, can_retry=None):
+    """
+    Run attempt_fn(deadline) -> coroutine under the breaker, retry policy and deadline
+    deadline is a time.monotonic() value the attempt must enforce (it may queue first)
+    can_retry: optional callable; False stops retries (e.g. a stream already emitted output)
+    """
+    breaker = get_breaker(model)
+    deadline = time.monotonic() + (timeout or operation_timeout(operation))
+    attempt = 0
+
+    while True:
+        breaker.before_call()
+        try:
+            result = await attempt_fn(deadline)
+        except asyncio.CancelledError:
+            breaker.release()
+            raise
+        except Exception as e:
+            reason = failure_reason(e)
+            if reason is None:
+                breaker.release()
+                raise
+            breaker.record_failure()
+            metrics.inc('ai_failures', model=model, operation=operation, reason=reason)
+
+            attempt += 1
+            delay = retry_after_seconds(e)
+            delay = min(delay, MAX_RETRY_AFTER_SECONDS) if delay is not None else backoff_seconds(attempt)
+            if attempt >= MAX_ATTEMPTS or (can_retry and not can_retry()) or time.monotonic() + delay >= deadline:
+                if isinstance(e, asyncio.TimeoutError):
+                    raise TimeoutError(f'AI {operation} timed out') from e
+                raise
+
+            metrics.inc('ai_retries', model=model, operation=operation, reason=reason)
+            metrics.observe('ai_backoff_seconds', delay, model=model)
+            await asyncio.sleep(delay)
+            continue
+
+        breaker.record_success()
+        return result
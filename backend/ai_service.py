@@ -1,270 +1,377 @@
 """
 AI Service for OpenAI integration
-Handles all AI generation requests for flashcards and exercises
+Handles all AI generation requests for flashcards and exercises;
+repeatable generations are served from the AI cache (ai_cache.py)
 """
 import os
-from openai import OpenAI
 from dotenv import load_dotenv
 import json
 import sys
+from datetime import datetime, timedelta
 
 # Add backend directory to path for imports
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from prompt_registry import get_prompt
+from ai_cache import ai_cache, cache_key
+from ai_provider import ai_provider
+from ai_usage import AIBudgetExceeded, ai_usage_tracker
+from ai_limiter import LimiterTimeout
+from ai_resilience import BREAKER_RESET_SECONDS, CircuitOpenError
+from model_router import model_router
+from json_stream import JsonFieldStream
+from text_utils import normalize_text
+from single_flight import SingleFlight
+
 load_dotenv()
 
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+# Identical concurrent generations share one upstream request
+ai_flight = SingleFlight('ai')
 
-# Default model
-DEFAULT_MODEL = "gpt-4o-mini"  # or "gpt-3.5-turbo" for cheaper option
+LIMITER_RETRY_AFTER_SECONDS = 5
 
 
-def generate_complete_flashcard(word, english_level="intermediate", category_context=""):
+def capacity_error(error):
     """
-    Generate complete flashcard data for a word/phrase
-    Returns: dict with all flashcard fields
+    (HTTP status, Retry-After seconds) for errors that mean "not now" rather than
+    "failed": budget used up (429), circuit open or no capacity in time (503)
     """
-    try:
-        prompt = f"""Create a comprehensive flashcard for an English vocabulary word/phrase. Word: "{word}".
-The output must be in English level: {english_level}.
-
-Return JSON format:
-{{
-  "text": "{word}",
-  "transcription": "Resources: Oxford Learner's Dictionaries. Must use \\n\\n between each variant. Format for output: UK: [ˌjuːnɪˈvɜːsəti]\\n\\nUS: [ˌjuːnɪˈvɜːrsəti]",
-  "translation": "Several possible Ukrainian translation variants (1-2 or more) for: "{word}". Output only in the format like: "Виглядати; дивитися; вигляд; зовнішність". No extra text. Only the string.",
-  "short_description": "A very short description (1-2 sentences max, under 100 characters). The description should be concise and clear",
-  "explanation": "Write a comprehensive, detailed explanation of the word/phrase that includes ALL of the following elements:
-
-1. DETAILED MEANING: Start with a clear, complete definition of the word. Explain what it means in depth, including any nuances or variations
-2. USAGE CONTEXT: Describe when and how this word is typically used in simple words to understand
-3. REAL-WORLD APPLICATION: Describe practical situations where this word is used and explain the meaning (for example you can use synonyms)
-4. SOME INTERESTING FACTS: some facts from life or specific examples 
+    if isinstance(error, AIBudgetExceeded):
+        now = datetime.utcnow()
+        tomorrow = datetime(now.year, now.month, now.day) + timedelta(days=1)
+        return 429, int((tomorrow - now).total_seconds()) + 1
+    if isinstance(error, CircuitOpenError):
+        return 503, int(BREAKER_RESET_SECONDS)
+    if isinstance(error, LimiterTimeout):
+        return 503, LIMITER_RETRY_AFTER_SECONDS
+    return None
+
+
+def _failure(error):
+    """Error result of an AI function; capacity errors also carry status and retry_after"""
+    result = {"success": False, "error": str(error)}
+    capacity = capacity_error(error)
+    if capacity is not None:
+        result["status"], result["retry_after"] = capacity
+    return result
+
+
+def _complete(template, model, **values):
+    """
+    Single chat completion of a registry prompt through the shared async provider
+    The template name selects the timeout and labels retry metrics (see ai_resilience.py);
+    model comes from model_router.select for the same operation
+    """
+    return ai_provider.complete(
+        model,
+        template.messages(**values),
+        template.temperature,
+        response_format={"type": "json_object"} if template.json_mode else None,
+        operation=template.name
+    )
 
-Your explanation must be written in an engaging, educational article style appropriate for {english_level} level learners (must use \\n\\n between paragraphs). Think of it as a mini-encyclopedia entry that thoroughly covers the topic. Use simple language but provide comprehensive information.
 
-Example structure for "opportunity":
-An opportunity is a chance to do something that can be good for you. It is like a special moment when you can try something new or improve your life. When you have an opportunity, it means the right time has come to do something important.
+def _template_key(template, model, text, english_level, category_context=""):
+    # The template version is part of the key: an edited prompt never serves old generations
+    return cache_key(template.name, text, english_level, model, template.cache_version, category_context)
 
-Opportunities can happen in many parts of your life. At work, you might get an opportunity to get a better job or learn new skills. At school, you might have an opportunity to join a club or study in another country. In your personal life, you might get an opportunity to meet new friends or visit new places. Some opportunities come and go quickly, so you need to act fast. Other opportunities stay for a longer time. The important thing is to notice them and decide if you want to try.
 
-The word 'opportunity' is very common in English. People use it when they talk about jobs, education, and life in general. For example, your teacher might say 'This is a good opportunity to practice English.' Here, opportunity means a special chance or the right moment to improve your English skills by practicing. Your boss might say 'We have an opportunity to work with a new company.' It means we can start working together with another company. In real life, opportunities are everywhere. When you meet new people, that's an opportunity to make friends. When you see a job advertisement, that's an opportunity to get work. The word 'opportunity' is a noun. You can also use the word 'chance' which means almost the same thing.",
-  "examples": ["Example sentence 1 using the word", "Example sentence 2 showing different context", "Example sentence 3 with another usage"],
-  "notes": ""
-}}
+def _cached(template, model, text, english_level, generate, category_context="", bypass_cache=False):
+    """
+    Serve a generation from the AI cache or compute and store it
+    Concurrent misses for the same key wait on a single upstream call.
+    bypass_cache: skip the lookup (regenerate paths); the fresh result is still stored
+    """
+    function = template.name
+    key = _template_key(template, model, text, english_level, category_context)
+    if bypass_cache:
+        value = generate()
+        ai_cache.set(key, function, value)
+        return value
+
+    cached = ai_cache.get(key, function)
+    ai_usage_tracker.record_cache(cached is not None)
+    if cached is not None:
+        return cached
+
+    def generate_and_store():
+        # A flight for this key may have finished between the lookup and now
+        value = ai_cache.get(key, function)
+        if value is not None:
+            return value
+        value = generate()
+        ai_cache.set(key, function, value)
+        return value
+
+    return ai_flight.do(key, generate_and_store)
+
+
+def _parse_examples(content):
+    """Examples array from a JSON completion, whatever wrapper the model chose"""
+    result = json.loads(content)
+
+    # Handle different possible JSON structures
+    if isinstance(result, list):
+        examples = result
+    elif isinstance(result, dict):
+        # Try to find the array in the response
+        examples = result.get('examples', result.get('sentences', list(result.values())[0] if result else []))
+    else:
+        examples = []
 
-Requirements:
-- Ensure all content is in {english_level} English level
-- Don't use conclusion at the end of explanation like "In conclusion" or "Overall, ...", only the main information without unnecessary text
-- The "explanation" property text must be 3-4 paragraphs max
-- If the given English level is A1 - use very simple language for beginners
+    return examples[:3]  # Ensure only 3 examples
 
-{category_context}
 
-Create complete flashcard for: "{word}"
-"""
+def generate_complete_flashcard(word, english_level="intermediate", category_context="", bypass_cache=False):
+    """
+    Generate complete flashcard data for a word/phrase
+    Returns: dict with all flashcard fields
+    """
+    try:
+        template = get_prompt("complete_flashcard")
+        model = model_router.select(template.name)
+        result = _cached(template, model, word, english_level, lambda: json.loads(_complete(
+            template,
+            model,
+            text=word,
+            english_level=english_level,
+            category_context=category_context
+        )), category_context, bypass_cache)
 
-        response = client.chat.completions.create(
-            model=DEFAULT_MODEL,
-            messages=[
-                {"role": "system", "content": "You are an expert English language teacher creating educational flashcards. Always respond with valid JSON only."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            response_format={"type": "json_object"}
-        )
-
-        result = json.loads(response.choices[0].message.content)
         return {
             "success": True,
-            "data": result
+            "data": dict(result, text=word)  # cached entry may come from another spelling
         }
 
     except Exception as e:
         print(f"❌ AI Generation Error: {e}")
+        return _failure(e)
+
+
+def stream_complete_flashcard(word, english_level="intermediate", category_context="", bypass_cache=False):
+    """
+    Generate complete flashcard data as (field, value) pairs
+    Each field is yielded as soon as the model has finished writing it; a cached
+    generation is replayed at once. Streams are not coalesced (single-flight
+    cannot share partial output), but the finished result is cached.
+    Raises on failure - the caller reports the error to its client.
+    """
+    template = get_prompt("complete_flashcard")
+    model = model_router.select(template.name)
+    key = _template_key(template, model, word, english_level, category_context)
+    result = None if bypass_cache else ai_cache.get(key, template.name)
+    if not bypass_cache:
+        ai_usage_tracker.record_cache(result is not None)
+
+    if result is not None:
+        for field, value in result.items():
+            if field != 'text':
+                yield field, value
+        return
+
+    parser = JsonFieldStream()
+    deltas = ai_provider.stream(
+        model,
+        template.messages(text=word, english_level=english_level, category_context=category_context),
+        template.temperature,
+        response_format={"type": "json_object"},
+        operation=template.name
+    )
+    try:
+        for delta in deltas:
+            for field, value in parser.feed(delta):
+                if field != 'text':
+                    yield field, value
+    finally:
+        deltas.close()
+
+    ai_cache.set(key, template.name, parser.result())
+
+
+def cached_complete_flashcards(words, english_level="intermediate", category_context=""):
+    """
+    Cached flashcard data for any of the words, single or batch generated
+    Returns: dict word -> flashcard fields (misses are absent)
+    """
+    templates = [
+        (template, model_router.select(template.name))
+        for template in (get_prompt("complete_flashcard"), get_prompt("complete_flashcard_batch"))
+    ]
+    found = {}
+    for word in words:
+        for template, model in templates:
+            value = ai_cache.get(_template_key(template, model, word, english_level, category_context), template.name)
+            if value is not None:
+                found[word] = dict(value, text=word)
+                break
+        ai_usage_tracker.record_cache(word in found)
+    return found
+
+
+def generate_flashcard_batch(words, english_level="intermediate", category_context=""):
+    """
+    Generate flashcard data for several words with one prompt
+    Returns: dict with data mapping normalized word -> flashcard fields;
+    words the model skipped are absent so the caller can retry them alone
+    """
+    try:
+        template = get_prompt("complete_flashcard_batch")
+        model = model_router.select(template.name)
+        content = json.loads(_complete(
+            template,
+            model,
+            words="\n".join(f"- {word}" for word in words),
+            english_level=english_level,
+            category_context=category_context
+        ))
+
+        generated = {}
+        for card in content.get("flashcards", []) if isinstance(content, dict) else []:
+            if isinstance(card, dict) and card.get("text"):
+                generated[normalize_text(card["text"])] = card
+
+        data = {}
+        for word in words:
+            card = generated.get(normalize_text(word))
+            if card is not None:
+                data[normalize_text(word)] = dict(card, text=word)
+                key = _template_key(template, model, word, english_level, category_context)
+                ai_cache.set(key, template.name, data[normalize_text(word)])
+
         return {
-            "success": False,
-            "error": str(e)
+            "success": True,
+            "data": data
         }
 
+    except Exception as e:
+        print(f"❌ AI Batch Generation Error: {e}")
+        return _failure(e)
+
 
 def generate_definition(text, english_level="intermediate", category_context=""):
     """Generate detailed definition/explanation"""
     try:
-        prompt = f"""English level you must to use in your output: {english_level}. A detailed definition/explanation of meaning and usage (can be longer and more comprehensive) for: {text}. Format example for output: A valley is a long, low area of land between hills or mountains. It is often formed by rivers or glaciers and can be wide or narrow. Valleys are places where people can live, grow crops, or travel through because they are lower and sometimes flatter than the surrounding land.{category_context}"""
-
-        response = client.chat.completions.create(
-            model=DEFAULT_MODEL,
-            messages=[
-                {"role": "system", "content": "You are an expert English language teacher. Provide clear, educational explanations."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7
-        )
+        template = get_prompt("definition")
+        model = model_router.select(template.name)
+        result = _cached(template, model, text, english_level, lambda: _complete(
+            template,
+            model,
+            text=text,
+            english_level=english_level,
+            category_context=category_context
+        ).strip(), category_context)
 
         return {
             "success": True,
-            "data": response.choices[0].message.content.strip()
+            "data": result
         }
 
     except Exception as e:
         print(f"❌ AI Generation Error: {e}")
-        return {
-            "success": False,
-            "error": str(e)
-        }
+        return _failure(e)
 
 
 def generate_examples(text, english_level="intermediate", category_context=""):
     """Generate 3 example sentences"""
     try:
-        prompt = f"""Create 3 different example sentences using the word/phrase: "{text}". English level you must to use in your output: {english_level}. Each sentence should show different contexts or meanings. Return as a JSON array of strings.{category_context}"""
-
-        response = client.chat.completions.create(
-            model=DEFAULT_MODEL,
-            messages=[
-                {"role": "system", "content": "You are an expert English language teacher. Always respond with valid JSON array only."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.8,
-            response_format={"type": "json_object"}
-        )
-
-        result = json.loads(response.choices[0].message.content)
-        
-        # Handle different possible JSON structures
-        if isinstance(result, list):
-            examples = result
-        elif isinstance(result, dict):
-            # Try to find the array in the response
-            examples = result.get('examples', result.get('sentences', list(result.values())[0] if result else []))
-        else:
-            examples = []
+        template = get_prompt("examples")
+        model = model_router.select(template.name)
+        examples = _cached(template, model, text, english_level, lambda: _parse_examples(_complete(
+            template,
+            model,
+            text=text,
+            english_level=english_level,
+            category_context=category_context
+        )), category_context)
 
         return {
             "success": True,
-            "data": examples[:3]  # Ensure only 3 examples
+            "data": examples
         }
 
     except Exception as e:
         print(f"❌ AI Generation Error: {e}")
-        return {
-            "success": False,
-            "error": str(e)
-        }
+        return _failure(e)
 
 
 def regenerate_examples(text, english_level="intermediate", category_context=""):
     """Regenerate examples with more variety"""
     try:
-        prompt = f"""Create 3 NEW and DIFFERENT example sentences using the word/phrase: "{text}". 
-English level: {english_level}. 
-Each sentence should show different contexts or meanings than previous examples.
-Make them creative and varied.
-Return as a JSON array of strings.{category_context}"""
-
-        response = client.chat.completions.create(
-            model=DEFAULT_MODEL,
-            messages=[
-                {"role": "system", "content": "You are an expert English language teacher creating varied examples. Always respond with valid JSON array only."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.9,  # Higher temperature for more variety
-            response_format={"type": "json_object"}
-        )
-
-        result = json.loads(response.choices[0].message.content)
-        
-        # Handle different possible JSON structures
-        if isinstance(result, list):
-            examples = result
-        elif isinstance(result, dict):
-            examples = result.get('examples', result.get('sentences', list(result.values())[0] if result else []))
-        else:
-            examples = []
+        # Never served from the cache: the user asked for different sentences
+        template = get_prompt("regenerate_examples")  # higher temperature for more variety
+        examples = _parse_examples(_complete(
+            template,
+            model_router.select(template.name),
+            text=text,
+            english_level=english_level,
+            category_context=category_context
+        ))
 
         return {
             "success": True,
-            "data": examples[:3]
+            "data": examples
         }
 
     except Exception as e:
         print(f"❌ AI Generation Error: {e}")
+        return _failure(e)
+
+
+def generate_exercise_explanation(text, english_level="intermediate", category_context=""):
+    """Generate a 1-2 sentence hint that describes the word without using it"""
+    try:
+        template = get_prompt("exercise_explanation")
+        model = model_router.select(template.name)
+        result = _cached(template, model, text, english_level, lambda: _complete(
+            template,
+            model,
+            text=text,
+            english_level=english_level,
+            category_context=category_context
+        ).strip().strip('"'), category_context)
+
         return {
-            "success": False,
-            "error": str(e)
+            "success": True,
+            "data": result
         }
 
+    except Exception as e:
+        print(f"❌ AI Generation Error: {e}")
+        return _failure(e)
+
 
 def translate_to_ukrainian(text):
     """Translate English to Ukrainian"""
     try:
-        prompt = f"""Translate to Ukrainian. Provide several translation variants for: "{text}". Output only in this format: "Виглядати; дивитися; вигляд; зовнішність". No extra text. Only the string."""
-
-        response = client.chat.completions.create(
-            model=DEFAULT_MODEL,
-            messages=[
-                {"role": "system", "content": "You are a professional English-Ukrainian translator. Provide only the translation string, no extra text."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.3
-        )
+        template = get_prompt("translate")
+        model = model_router.select(template.name)
+        result = _cached(template, model, text, None, lambda: _complete(template, model, text=text).strip())
 
         return {
             "success": True,
-            "data": response.choices[0].message.content.strip()
+            "data": result
         }
 
     except Exception as e:
         print(f"❌ AI Generation Error: {e}")
-        return {
-            "success": False,
-            "error": str(e)
-        }
+        return _failure(e)
 
 
 def translate_sentence_to_ukrainian(text):
     """Translate English sentence to Ukrainian"""
     try:
-        prompt = f"""Translate the following English sentence to Ukrainian. Make the translation natural, accurate and appropriate for language learning context.
-
-English sentence: "{text}"
-
-Requirements:
-- Provide a clear, natural Ukrainian translation
-- Use proper grammar and word order
-- Make it sound natural for native Ukrainian speakers
-- Keep the meaning accurate but not word-for-word literal
-- Consider the context of language learning exercises
-- Output ONLY the Ukrainian translation, no additional text
-
-Example:
-English: "I go to work every day."
-Ukrainian: "Я йду на роботу щодня."
-
-Translate: "{text}" """
-
-        response = client.chat.completions.create(
-            model=DEFAULT_MODEL,
-            messages=[
-                {"role": "system", "content": "You are a professional English-Ukrainian translator. Provide only the translation, no extra text."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.3
-        )
+        template = get_prompt("translate_sentence")
+        model = model_router.select(template.name)
+        result = _cached(template, model, text, None, lambda: _complete(template, model, text=text).strip())
 
         return {
             "success": True,
-            "data": response.choices[0].message.content.strip()
+            "data": result
         }
 
     except Exception as e:
         print(f"❌ AI Generation Error: {e}")
-        return {
-            "success": False,
-            "error": str(e)
-        }
+        return _failure(e)
 
 
 # Test function
@@ -0,0 +1,266 @@
+"""
+AI usage accounting and daily token budgets
+Every upstream call adds its prompt / completion tokens and latency (and every
+cache lookup a hit or miss) to one pre-aggregated document per user per UTC
+day, broken down by model and route. Deltas are coalesced in memory and
+flushed as bulk $inc upserts. Budgets are checked before calling upstream.
+"""
+import contextvars
+import os
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+
+from pymongo import UpdateOne
+
+# Add backend directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import ai_usage_collection, user_settings_collection
+from metrics import metrics
+
+FLUSH_INTERVAL_SECONDS = float(os.getenv('AI_USAGE_FLUSH_INTERVAL', 5.0))
+DEFAULT_DAILY_TOKEN_BUDGET = int(os.getenv('AI_DAILY_TOKEN_BUDGET', 200000))  # 0 = unlimited
+BUDGET_CACHE_SECONDS = 60
+MAX_REPORT_DAYS = 90
+DEFAULT_REPORT_DAYS = 7
+
+# USD per 1M (prompt, completion) tokens, for the report's cost estimate only
+MODEL_PRICES = {
+    'gpt-4o-mini': (0.15, 0.60),
+    'gpt-4o': (2.50, 10.00),
+    'gpt-4-turbo': (10.00, 30.00),
+    'gpt-4': (30.00, 60.00),
+    'gpt-3.5-turbo': (0.50, 1.50),
+}
+
+# Who / which endpoint an AI call is made for; set by the request thread
+ai_user = contextvars.ContextVar('ai_user', default=None)
+ai_route = contextvars.ContextVar('ai_route', default=None)
+
+
+class AIBudgetExceeded(Exception):
+    """User spent the daily token budget; raised before calling upstream"""
+
+
+def _key(value):
+    """Mongo-safe field name for a model or route"""
+    return str(value or 'unknown').replace('.', '_').replace('$', '_')
+
+
+def _today():
+    return datetime.utcnow().strftime('%Y-%m-%d')
+
+
+class AIUsageTracker:
+    """Write-behind per-user per-day counters plus the budget check"""
+
+    def __init__(self, flush_interval=FLUSH_INTERVAL_SECONDS):
+        self.flush_interval = flush_interval
+        self._pending = {}  # (user_id, day) -> {dotted field: delta}
+        self._used = {}  # (user_id, day) -> tokens used, cached until the next flush
+        self._budgets = {}  # user_id -> (budget, loaded_at)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def _add(self, fields):
+        user_id = ai_user.get()
+        key = (user_id, _today())
+        with self._lock:
+            counters = self._pending.setdefault(key, {})
+            for field, value in fields.items():
+                counters[field] = counters.get(field, 0) + value
+            tokens = fields.get('totals.prompt_tokens', 0) + fields.get('totals.completion_tokens', 0)
+            if tokens and key in self._used:
+                self._used[key] += tokens
+
+        if self._thread is None:
+            # No flusher running (scripts, one-off tools): write through
+            try:
+                self.flush()
+            except Exception as e:
+                # Accounting must never fail the AI call itself
+                print(f"❌ AI usage write error: {e}")
+
+    def record_call(self, model, usage, latency_seconds):
+        """One upstream completion; usage is the response's usage object (may be None)"""
+        prompt_tokens = getattr(usage, 'prompt_tokens', 0) or 0
+        completion_tokens = getattr(usage, 'completion_tokens', 0) or 0
+        latency_ms = int(latency_seconds * 1000)
+        model_key, route_key = _key(model), _key(ai_route.get())
+
+        fields = {}
+        for prefix in ('totals', f'models.{model_key}', f'routes.{route_key}'):
+            fields[f'{prefix}.requests'] = 1
+            fields[f'{prefix}.prompt_tokens'] = prompt_tokens
+            fields[f'{prefix}.completion_tokens'] = completion_tokens
+            fields[f'{prefix}.latency_ms'] = latency_ms
+        self._add(fields)
+        metrics.inc('ai_tokens', prompt_tokens, model=model, kind='prompt')
+        metrics.inc('ai_tokens', completion_tokens, model=model, kind='completion')
+
+    def record_cache(self, hit):
+        """One AI cache lookup made on behalf of the current user / route"""
+        field = 'cache_hits' if hit else 'cache_misses'
+        self._add({f'totals.{field}': 1, f'routes.{_key(ai_route.get())}.{field}': 1})
+
+    def _budget(self, user_id):
+        cached = self._budgets.get(user_id)
+        if cached is not None and time.monotonic() - cached[1] < BUDGET_CACHE_SECONDS:
+            return cached[0]
+        budget = DEFAULT_DAILY_TOKEN_BUDGET
+        if user_settings_collection is not None:
+            settings_doc = user_settings_collection.find_one({'user_id': user_id}, {'ai_daily_token_budget': 1})
+            if settings_doc and settings_doc.get('ai_daily_token_budget') is not None:
+                budget = int(settings_doc['ai_daily_token_budget'])
+        self._budgets[user_id] = (budget, time.monotonic())
+        return budget
+
+    def _used_today(self, user_id, day):
+        key = (user_id, day)
+        with self._lock:
+            if key in self._used:
+                return self._used[key]
+            pending = self._pending.get(key, {})
+            used = pending.get('totals.prompt_tokens', 0) + pending.get('totals.completion_tokens', 0)
+
+        if ai_usage_collection is not None:
+            doc = ai_usage_collection.find_one({'user_id': user_id, 'day': day}, {'totals': 1})
+            totals = (doc or {}).get('totals', {})
+            used += totals.get('prompt_tokens', 0) + totals.get('completion_tokens', 0)
+
+        with self._lock:
+            return self._used.setdefault(key, used)
+
+    def check_budget(self):
+        """Raise AIBudgetExceeded if the current user has no tokens left today"""
+        user_id = ai_user.get()
+        if user_id is None:
+            return
+        budget = self._budget(user_id)
+        if budget <= 0:
+            return
+        if self._used_today(user_id, _today()) >= budget:
+            metrics.inc('ai_budget_rejections')
+            raise AIBudgetExceeded(f'Daily AI token budget of {budget} tokens is used up, please try again tomorrow')
+
+    def flush(self):
+        """Write all pending counters; returns number of documents touched"""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+
+            if ai_usage_collection is None:
+                return 0
+            if not pending:
+                with self._lock:
+                    self._used.clear()
+                return 0
+
+            operations = [
+                UpdateOne({'user_id': user_id, 'day': day}, {'$inc': counters}, upsert=True)
+                for (user_id, day), counters in pending.items()
+            ]
+            try:
+                ai_usage_collection.bulk_write(operations, ordered=False)
+            except Exception:
+                metrics.inc('ai_usage_flush_errors')
+                with self._lock:
+                    for key, counters in pending.items():
+                        current = self._pending.setdefault(key, {})
+                        for field, value in counters.items():
+                            current[field] = current.get(field, 0) + value
+                raise
+
+            with self._lock:
+                # Reloaded on the next budget check, including other processes' usage
+                self._used.clear()
+            return len(operations)
+
+    def _run(self):
+        print("📊 AI usage tracker started")
+        while not self._stop_event.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"❌ AI usage flush error: {e}")
+                print(traceback.format_exc())
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='ai-usage', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=10):
+        """Stop the flusher and write whatever is still pending"""
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join(timeout)
+        self._thread = None
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"❌ AI usage final flush failed: {e}")
+
+
+ai_usage_tracker = AIUsageTracker()
+
+
+def _cost(model_key, prompt_tokens, completion_tokens):
+    prices = {_key(model): price for model, price in MODEL_PRICES.items()}.get(model_key)
+    if prices is None:
+        return None
+    return (prompt_tokens * prices[0] + completion_tokens * prices[1]) / 1_000_000
+
+
+def _merge(target, counters):
+    for field, value in counters.items():
+        target[field] = target.get(field, 0) + value
+
+
+def usage_report(days=DEFAULT_REPORT_DAYS, user_id=None, limit=20):
+    """Totals per day, model, route and top users over the last `days` days"""
+    ai_usage_tracker.flush()
+    since = (datetime.utcnow() - timedelta(days=days - 1)).strftime('%Y-%m-%d')
+    query = {'day': {'$gte': since}}
+    if user_id:
+        query['user_id'] = user_id
+
+    totals, per_day, per_model, per_route, per_user = {}, {}, {}, {}, {}
+    for doc in ai_usage_collection.find(query, {'_id': 0}):
+        doc_totals = doc.get('totals', {})
+        _merge(totals, doc_totals)
+        _merge(per_day.setdefault(doc['day'], {}), doc_totals)
+        _merge(per_user.setdefault(doc['user_id'] or 'system', {}), doc_totals)
+        for model_key, counters in doc.get('models', {}).items():
+            _merge(per_model.setdefault(model_key, {}), counters)
+        for route_key, counters in doc.get('routes', {}).items():
+            _merge(per_route.setdefault(route_key, {}), counters)
+
+    def tokens(counters):
+        return counters.get('prompt_tokens', 0) + counters.get('completion_tokens', 0)
+
+    for model_key, counters in per_model.items():
+        counters['estimated_cost_usd'] = _cost(model_key, counters.get('prompt_tokens', 0),
+                                               counters.get('completion_tokens', 0))
+
+    top_users = sorted(per_user.items(), key=lambda item: tokens(item[1]), reverse=True)[:limit]
+    return {
+        'since': since,
+        'days': days,
+        'totals': totals,
+        'by_day': [dict(counters, day=day) for day, counters in sorted(per_day.items())],
+        'by_model': per_model,
+        'by_route': sorted(
+            (dict(counters, route=route) for route, counters in per_route.items()),
+            key=tokens, reverse=True
+        ),
+        'top_users': [dict(counters, user_id=uid, tokens=tokens(counters)) for uid, counters in top_users],
+        'default_daily_token_budget': DEFAULT_DAILY_TOKEN_BUDGET,
+    }
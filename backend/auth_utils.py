@@ -1,13 +1,19 @@
 import jwt
 import os
+import time
 from datetime import datetime, timedelta
+from bson import ObjectId
 from dotenv import load_dotenv
+from database import users_collection
 
 load_dotenv()
 
 SECRET_KEY = os.getenv('JWT_SECRET', 'your-secret-key-change-in-production')
 ALGORITHM = 'HS256'
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7  # 7 days
+ACCOUNT_STATUS_CACHE_SECONDS = 30
+
+_account_status = {}  # user_id -> (active, checked_at)
 
 
 def create_access_token(user_id, email, role):
@@ -37,10 +43,28 @@ def verify_token(token):
         return None
 
 
+def _account_active(user_id):
+    """False once the account is soft-deleted or purged; cached briefly per user"""
+    cached = _account_status.get(user_id)
+    if cached is not None and (not cached[0] or time.monotonic() - cached[1] < ACCOUNT_STATUS_CACHE_SECONDS):
+        return cached[0]  # deletion is final, so a negative result never expires
+    user_doc = None
+    if ObjectId.is_valid(str(user_id)):
+        user_doc = users_collection.find_one({'_id': ObjectId(str(user_id))}, {'is_deleted': 1})
+    active = bool(user_doc) and not user_doc.get('is_deleted')
+    _account_status[user_id] = (active, time.monotonic())
+    return active
+
+
+def forget_account_status(user_id):
+    """Drop the cached status after the account was deleted"""
+    _account_status.pop(str(user_id), None)
+
+
 def get_user_from_token(token):
-    """Extract user info from token"""
+    """Extract user info from token; tokens of deleted accounts are rejected"""
     payload = verify_token(token)
-    if payload:
+    if payload and _account_active(payload.get('user_id')):
         return {
             'user_id': payload.get('user_id'),
             'email': payload.get('email'),
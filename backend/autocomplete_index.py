@@ -0,0 +1,129 @@
+"""
+Prefix autocomplete for the word field
+Sorted, case-folded key lists per user plus one shared list for default decks;
+lookups are a bisect plus a short scan, updates are incremental.
+"""
+import os
+import sys
+import threading
+from bisect import bisect_left, insort
+
+# Add backend directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from index_registry import IndexRegistry
+from text_utils import normalize_text
+
+DEFAULT_LIMIT = 8
+MAX_LIMIT = 50
+SCAN_LIMIT = 200  # matches looked at before ranking, keeps short prefixes cheap
+MAX_CACHED_USERS = int(os.getenv('AUTOCOMPLETE_MAX_CACHED_USERS', 500))
+
+ENTRY_PROJECTION = {'category_id': 1, 'word': 1}
+
+
+def word_keys(word):
+    """Lookup keys of a word: the normalized word and, for verbs, the form without 'to '"""
+    key = normalize_text(word)
+    if not key:
+        return []
+    keys = [key]
+    if key.startswith('to ') and len(key) > 3:
+        keys.append(key[3:])
+    return keys
+
+
+class PrefixIndex:
+    """Sorted (key, entry_id) list with entry summaries"""
+
+    def __init__(self, source):
+        self.source = source
+        self._lock = threading.RLock()
+        self._keys = []     # sorted list of (key, entry_id)
+        self._entries = {}  # entry_id -> (keys, summary)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, card):
+        entry_id = str(card['_id'])
+        summary = {
+            'flashcard_id': entry_id,
+            'word': card['word'],
+            'category_id': card['category_id'],
+            'source': self.source
+        }
+        keys = word_keys(card['word'])
+
+        with self._lock:
+            self._remove_locked(entry_id)
+            self._entries[entry_id] = (keys, summary)
+            for key in keys:
+                insort(self._keys, (key, entry_id))
+
+    def remove(self, entry_id):
+        with self._lock:
+            self._remove_locked(str(entry_id))
+
+    def _remove_locked(self, entry_id):
+        entry = self._entries.pop(entry_id, None)
+        if entry is None:
+            return
+        for key in entry[0]:
+            position = bisect_left(self._keys, (key, entry_id))
+            if position < len(self._keys) and self._keys[position] == (key, entry_id):
+                del self._keys[position]
+
+    def lookup(self, prefix, limit):
+        """Entries whose key starts with prefix; shortest (closest) keys first"""
+        matches = {}
+        with self._lock:
+            position = bisect_left(self._keys, (prefix,))
+            scanned = 0
+            while position < len(self._keys) and scanned < SCAN_LIMIT:
+                key, entry_id = self._keys[position]
+                if not key.startswith(prefix):
+                    break
+                if entry_id not in matches or len(key) < matches[entry_id][0]:
+                    matches[entry_id] = (len(key), key)
+                position += 1
+                scanned += 1
+
+            ranked = sorted(matches.items(), key=lambda item: item[1])[:limit]
+            return [
+                dict(self._entries[entry_id][1], exact=key == prefix)
+                for entry_id, (_, key) in ranked
+            ]
+
+
+class AutocompleteRegistry(IndexRegistry):
+    """Per-user prefix indexes (LRU) and the shared default-deck index"""
+
+    def __init__(self, max_users=MAX_CACHED_USERS):
+        super().__init__(
+            'autocomplete', ENTRY_PROJECTION,
+            lambda default: PrefixIndex('default' if default else 'user'), max_users
+        )
+
+    def suggest(self, user_id, text, limit=DEFAULT_LIMIT):
+        """
+        Top-k words starting with text: user's own cards first, then default decks
+        Returns: dict with suggestions and exact matches from the user's deck
+        """
+        prefix = normalize_text(text)
+        limit = max(1, min(int(limit), MAX_LIMIT))
+        if not prefix:
+            return {'suggestions': [], 'exact_matches': []}
+
+        user_matches = self.get(user_id).lookup(prefix, limit)
+        suggestions = list(user_matches)
+        if len(suggestions) < limit:
+            suggestions += self.default_deck_index().lookup(prefix, limit - len(suggestions))
+
+        return {
+            'suggestions': suggestions,
+            'exact_matches': [entry for entry in user_matches if entry['exact']]
+        }
+
+
+autocomplete_indexes = AutocompleteRegistry()
@@ -0,0 +1,184 @@
+"""
+Batch flashcard generation
+Generates a list of words for one category: cached cards are reused, the rest
+are packed several words per prompt and the prompts run concurrently under a
+bounded pool; words a batch prompt missed fall back to single generation.
+New cards are stored with insert_many and every word gets its own status.
+A request is sized and time-boxed to answer within the web client's timeout;
+longer word lists are sent as several requests.
+"""
+import contextvars
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pymongo.errors import BulkWriteError
+
+# Add backend directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import flashcards_collection
+from models import Flashcard
+from text_utils import normalize_text
+from ai_service import cached_complete_flashcards, generate_complete_flashcard, generate_flashcard_batch
+from ai_limiter import BATCH, priority
+from ai_resilience import operation_timeout
+from bulk_import import DUPLICATE_KEY_ERROR, MAX_WORD_LENGTH
+from metrics import metrics
+
+# One round of prompts at the default concurrency (4 prompts x 5 words)
+MAX_BATCH_WORDS = 20
+WORDS_PER_PROMPT = int(os.getenv('AI_BATCH_WORDS_PER_PROMPT', 5))
+BATCH_CONCURRENCY = int(os.getenv('AI_BATCH_CONCURRENCY', 4))
+# Whole request, well under the web client's 180 s timeout
+REQUEST_BUDGET_SECONDS = float(os.getenv('AI_BATCH_REQUEST_BUDGET', 120))
+
+
+def build_generated_document(user_id, category_id, word, ai_data):
+    """Flashcard document from AI generated fields"""
+    flashcard = Flashcard(
+        user_id,
+        category_id,
+        ai_data.get('text', word),
+        ai_data.get('translation', ''),
+        ai_data.get('examples', [''])[0] if ai_data.get('examples') else '',
+        ai_data.get('explanation', ''),
+        'medium'
+    )
+
+    flashcard_dict = flashcard.to_dict()
+    flashcard_dict['transcription'] = ai_data.get('transcription', '')
+    flashcard_dict['short_description'] = ai_data.get('short_description', '')
+    flashcard_dict['examples'] = ai_data.get('examples', [])
+    flashcard_dict['notes'] = ai_data.get('notes', '')
+    return flashcard_dict
+
+
+def _generate_chunk(words, english_level, deadline):
+    """
+    One batch prompt for a chunk of words, single prompts for whatever it missed
+    A single prompt is only started if it can finish before deadline (time.monotonic()).
+    Returns: list of (word, ai_data or None, error or None)
+    """
+    # Runs on a pool thread: the priority context has to be set here
+    with priority(BATCH):
+        result = generate_flashcard_batch(words, english_level)
+        generated = result['data'] if result['success'] else {}
+        metrics.inc('ai_batch_prompts', status='success' if result['success'] else 'failed')
+
+        outcomes = []
+        for word in words:
+            ai_data = generated.get(normalize_text(word))
+            if ai_data is None:
+                if time.monotonic() + operation_timeout('complete_flashcard') > deadline:
+                    metrics.inc('ai_batch_deadline_skips')
+                    outcomes.append((word, None, 'out of time for this request, please retry the word'))
+                    continue
+                metrics.inc('ai_batch_fallbacks')
+                single = generate_complete_flashcard(word, english_level)
+                if not single['success']:
+                    outcomes.append((word, None, single.get('error', 'Unknown error')))
+                    continue
+                ai_data = single['data']
+            outcomes.append((word, ai_data, None))
+    return outcomes
+
+
+def generate_flashcards(user_id, category_id, words, english_level='intermediate'):
+    """
+    Generate and store flashcards for a list of words
+    Returns: dict with counters, per-word rows and the inserted documents
+    """
+    if len(words) > MAX_BATCH_WORDS:
+        raise ValueError(f'Batch generation is limited to {MAX_BATCH_WORDS} words')
+    deadline = time.monotonic() + REQUEST_BUDGET_SECONDS
+
+    rows = []
+    pending = {}  # word_key -> report row
+    for word in words:
+        word = word.strip() if isinstance(word, str) else ''
+        row = {'word': word, 'status': 'pending'}
+        rows.append(row)
+
+        if not word or len(word) > MAX_WORD_LENGTH:
+            row['status'] = 'invalid'
+            row['error'] = f'Word must be 1-{MAX_WORD_LENGTH} characters'
+        elif normalize_text(word) in pending:
+            row['status'] = 'duplicate'
+            row['error'] = 'Duplicate word in request'
+        else:
+            pending[normalize_text(word)] = row
+
+    # One set-based lookup for words that already exist in the category
+    if pending:
+        cursor = flashcards_collection.find(
+            {'category_id': category_id, 'word_key': {'$in': list(pending)}},
+            {'word_key': 1, '_id': 0}
+        )
+        for doc in cursor:
+            row = pending.pop(doc['word_key'])
+            row['status'] = 'duplicate'
+            row['error'] = 'Flashcard with this word already exists in this category'
+
+    to_generate = [row['word'] for row in pending.values()]
+    generated = cached_complete_flashcards(to_generate, english_level)
+    misses = [word for word in to_generate if word not in generated]
+    chunks = [misses[start:start + WORDS_PER_PROMPT] for start in range(0, len(misses), WORDS_PER_PROMPT)]
+
+    if chunks:
+        print(f"🤖 Batch generating {len(misses)} flashcards in {len(chunks)} prompts")
+        with ThreadPoolExecutor(max_workers=min(BATCH_CONCURRENCY, len(chunks))) as pool:
+            # Each task runs in a copy of this thread's context (AI usage user / route)
+            futures = [
+                pool.submit(contextvars.copy_context().run, _generate_chunk, chunk, english_level, deadline)
+                for chunk in chunks
+            ]
+            for future in futures:
+                for word, ai_data, error in future.result():
+                    if ai_data is None:
+                        row = pending.pop(normalize_text(word))
+                        row['status'] = 'failed'
+                        row['error'] = f'AI generation failed: {error}'
+                    else:
+                        generated[word] = ai_data
+
+    batch = [
+        (row, build_generated_document(user_id, category_id, row['word'], generated[row['word']]))
+        for row in pending.values()
+    ]
+    failed = {}
+    if batch:
+        try:
+            flashcards_collection.insert_many([document for _, document in batch], ordered=False)
+        except BulkWriteError as e:
+            for write_error in e.details.get('writeErrors', []):
+                failed[write_error['index']] = write_error
+
+    documents = []
+    for index, (row, document) in enumerate(batch):
+        if index in failed and failed[index].get('code') == DUPLICATE_KEY_ERROR:
+            # Added concurrently after the lookup above
+            row['status'] = 'duplicate'
+            row['error'] = 'Flashcard with this word already exists in this category'
+        elif index in failed:
+            row['status'] = 'failed'
+            row['error'] = failed[index].get('errmsg', 'Insert failed')
+        else:
+            row['status'] = 'created'
+            row['_id'] = str(document['_id'])
+            documents.append(document)
+
+    summary = {'created': 0, 'duplicate': 0, 'invalid': 0, 'failed': 0}
+    for row in rows:
+        summary[row['status']] += 1
+
+    return {
+        'total': len(rows),
+        'created': summary['created'],
+        'duplicates': summary['duplicate'],
+        'invalid': summary['invalid'],
+        'failed': summary['failed'],
+        'rows': rows,
+        'documents': documents
+    }
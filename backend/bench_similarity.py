@@ -0,0 +1,87 @@
+"""
+Benchmark for the distractor similarity index
+Builds indexes over synthetic decks and reports build, update and query latency.
+
+Usage:
+    python bench_similarity.py
+    python bench_similarity.py --sizes 10000 50000 --queries 2000
+"""
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+# Add backend directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from similarity_index import SimilarityIndex
+
+
+def _word(rng):
+    return ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 12)))
+
+
+def synthetic_deck(size, categories, seed=42):
+    rng = random.Random(seed)
+    return [{
+        '_id': f'{index:024x}',
+        'category_id': f'category-{index % categories}',
+        'word': _word(rng) + ('' if rng.random() < 0.7 else ' ' + _word(rng)),
+        'translation': _word(rng)
+    } for index in range(size)]
+
+
+def _percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def bench(size, categories, queries, k=6):
+    deck = synthetic_deck(size, categories)
+    index = SimilarityIndex()
+
+    started = time.perf_counter()
+    for card in deck:
+        index.add(card)
+    build_seconds = time.perf_counter() - started
+
+    rng = random.Random(7)
+    query_times = []
+    for _ in range(queries):
+        card = rng.choice(deck)
+        started = time.perf_counter()
+        index.nearest(card, k, card['category_id'])
+        query_times.append(time.perf_counter() - started)
+
+    update_times = []
+    for _ in range(min(queries, size)):
+        card = rng.choice(deck)
+        started = time.perf_counter()
+        index.remove(card['_id'])
+        index.add(card)
+        update_times.append(time.perf_counter() - started)
+
+    ms = 1000
+    print(f"📊 {size:>7} cards / {categories:>3} categories | build {build_seconds:6.2f}s | "
+          f"query p50 {_percentile(query_times, 0.5) * ms:.3f}ms p99 {_percentile(query_times, 0.99) * ms:.3f}ms | "
+          f"update p50 {_percentile(update_times, 0.5) * ms:.3f}ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Similarity index benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--categories", type=int, nargs="+", default=[1, 20],
+                        help="categories per deck (1 = whole deck in one category, the worst case)")
+    parser.add_argument("--queries", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    for size in args.sizes:
+        for categories in args.categories:
+            bench(size, categories, args.queries)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,285 @@
+"""
+Bulk flashcard import
+Parses CSV / JSON / NDJSON decks from the request body and stores them in batches
+"""
+import csv
+import io
+import json
+import os
+import sys
+
+from pymongo.errors import BulkWriteError
+
+# Add backend directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import flashcards_collection
+from models import Flashcard
+from text_utils import normalize_text
+
+DUPLICATE_KEY_ERROR = 11000
+
+SUPPORTED_FORMATS = ('csv', 'json', 'ndjson')
+CONTENT_TYPE_FORMATS = {
+    'text/csv': 'csv',
+    'application/csv': 'csv',
+    'application/json': 'json',
+    'application/x-ndjson': 'ndjson',
+    'application/ndjson': 'ndjson',
+    'application/jsonl': 'ndjson',
+}
+
+MAX_IMPORT_BYTES = 5 * 1024 * 1024  # 5 MB
+MAX_IMPORT_ROWS = 10000
+INSERT_BATCH_SIZE = 500
+MAX_WORD_LENGTH = 200
+MAX_TEXT_LENGTH = 5000
+DIFFICULTIES = ('easy', 'medium', 'hard')
+
+
+class BodyStream(io.RawIOBase):
+    """Read-only stream that stops after `length` bytes of the request body"""
+
+    def __init__(self, raw, length):
+        self.raw = raw
+        self.remaining = length
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self.remaining <= 0:
+            return 0
+        size = min(len(buffer), self.remaining)
+        data = self.raw.read(size)
+        if not data:
+            self.remaining = 0
+            return 0
+        buffer[:len(data)] = data
+        self.remaining -= len(data)
+        return len(data)
+
+
+def detect_format(content_type, requested_format=None):
+    """Pick import format from explicit ?format= or the Content-Type header"""
+    if requested_format:
+        fmt = requested_format.strip().lower()
+        if fmt == 'jsonl':
+            fmt = 'ndjson'
+        return fmt if fmt in SUPPORTED_FORMATS else None
+
+    mime = (content_type or '').split(';')[0].strip().lower()
+    return CONTENT_TYPE_FORMATS.get(mime)
+
+
+def open_text_stream(raw, length):
+    """Wrap the socket file into a buffered text stream limited to the body"""
+    buffered = io.BufferedReader(BodyStream(raw, length), buffer_size=64 * 1024)
+    return io.TextIOWrapper(buffered, encoding='utf-8-sig', newline='')
+
+
+def iter_raw_rows(text_stream, fmt):
+    """
+    Yield (row_number, row_dict, error) for every record in the stream.
+    CSV and NDJSON are parsed line by line; JSON must be an array
+    (or {"flashcards": [...]}) and is parsed in one go.
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(text_stream)
+        if reader.fieldnames:
+            reader.fieldnames = [name.strip().lower() for name in reader.fieldnames]
+        for row_number, row in enumerate(reader, start=1):
+            yield row_number, row, None
+
+    elif fmt == 'ndjson':
+        row_number = 0
+        for line in text_stream:
+            line = line.strip()
+            if not line:
+                continue
+            row_number += 1
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield row_number, None, f'Invalid JSON: {e}'
+                continue
+            if not isinstance(record, dict):
+                yield row_number, None, 'Row must be a JSON object'
+                continue
+            yield row_number, record, None
+
+    elif fmt == 'json':
+        try:
+            payload = json.load(text_stream)
+        except ValueError as e:
+            raise ValueError(f'Invalid JSON: {e}')
+
+        if isinstance(payload, dict):
+            payload = payload.get('flashcards')
+        if not isinstance(payload, list):
+            raise ValueError('JSON import must be an array of flashcards')
+
+        for row_number, record in enumerate(payload, start=1):
+            if not isinstance(record, dict):
+                yield row_number, None, 'Row must be a JSON object'
+                continue
+            yield row_number, record, None
+
+    else:
+        raise ValueError(f'Unsupported format: {fmt}')
+
+
+def _clean_text(value, max_length):
+    """Normalize optional text cell; returns (text, error)"""
+    if value is None:
+        return '', None
+    if not isinstance(value, str):
+        value = str(value)
+    value = value.strip()
+    if len(value) > max_length:
+        return None, f'Value is longer than {max_length} characters'
+    return value, None
+
+
+def validate_row(record):
+    """
+    Validate one imported record
+    Returns: (fields dict, None) or (None, error message)
+    """
+    word, error = _clean_text(record.get('word'), MAX_WORD_LENGTH)
+    if error:
+        return None, f'word: {error}'
+    translation, error = _clean_text(record.get('translation'), MAX_TEXT_LENGTH)
+    if error:
+        return None, f'translation: {error}'
+    if not word or not translation:
+        return None, 'Word and translation are required'
+
+    fields = {'word': word, 'translation': translation}
+    for name in ('example', 'explanation', 'transcription', 'short_description', 'notes'):
+        value, error = _clean_text(record.get(name), MAX_TEXT_LENGTH)
+        if error:
+            return None, f'{name}: {error}'
+        fields[name] = value
+
+    difficulty = str(record.get('difficulty') or 'medium').strip().lower()
+    if difficulty not in DIFFICULTIES:
+        return None, f'difficulty must be one of: {", ".join(DIFFICULTIES)}'
+    fields['difficulty'] = difficulty
+
+    # Examples can come as a JSON list or as a "; "-separated CSV cell
+    examples = record.get('examples') or []
+    if isinstance(examples, str):
+        examples = [item.strip() for item in examples.split(';') if item.strip()]
+    if not isinstance(examples, list):
+        return None, 'examples must be a list or a ";"-separated string'
+    fields['examples'] = [str(item).strip() for item in examples if str(item).strip()][:10]
+    if not fields['example'] and fields['examples']:
+        fields['example'] = fields['examples'][0]
+
+    return fields, None
+
+
+def _build_document(user_id, category_id, fields):
+    """Turn validated fields into a flashcard document"""
+    flashcard = Flashcard(
+        user_id,
+        category_id,
+        fields['word'],
+        fields['translation'],
+        fields['example'],
+        fields['explanation'],
+        fields['difficulty']
+    )
+    flashcard_dict = flashcard.to_dict()
+    flashcard_dict['transcription'] = fields['transcription']
+    flashcard_dict['short_description'] = fields['short_description']
+    flashcard_dict['examples'] = fields['examples']
+    flashcard_dict['notes'] = fields['notes']
+    return flashcard_dict
+
+
+def import_flashcards(user_id, category_id, text_stream, fmt):
+    """
+    Import flashcards into a category
+    Returns: dict with counters and per-row report
+    """
+    rows = []
+    pending = []  # (report_row, document)
+    seen_keys = set()
+
+    for row_number, record, error in iter_raw_rows(text_stream, fmt):
+        if row_number > MAX_IMPORT_ROWS:
+            raise ValueError(f'Import is limited to {MAX_IMPORT_ROWS} rows')
+
+        if error is None:
+            fields, error = validate_row(record)
+
+        if error:
+            rows.append({'row': row_number, 'word': (record or {}).get('word'), 'status': 'invalid', 'error': error})
+            continue
+
+        report_row = {'row': row_number, 'word': fields['word'], 'status': 'pending'}
+        rows.append(report_row)
+
+        word_key = normalize_text(fields['word'])
+        if word_key in seen_keys:
+            report_row['status'] = 'duplicate'
+            report_row['error'] = 'Duplicate word in file'
+            continue
+
+        seen_keys.add(word_key)
+        pending.append((report_row, _build_document(user_id, category_id, fields)))
+
+    # One set-based lookup for words that already exist in the category
+    existing_keys = set()
+    if seen_keys:
+        cursor = flashcards_collection.find(
+            {'category_id': category_id, 'word_key': {'$in': list(seen_keys)}},
+            {'word_key': 1, '_id': 0}
+        )
+        existing_keys = {doc['word_key'] for doc in cursor}
+
+    to_insert = []
+    for report_row, document in pending:
+        if document['word_key'] in existing_keys:
+            report_row['status'] = 'duplicate'
+            report_row['error'] = 'Flashcard with this word already exists in this category'
+        else:
+            to_insert.append((report_row, document))
+
+    for start in range(0, len(to_insert), INSERT_BATCH_SIZE):
+        batch = to_insert[start:start + INSERT_BATCH_SIZE]
+        documents = [document for _, document in batch]
+        failed = {}
+
+        try:
+            flashcards_collection.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            for write_error in e.details.get('writeErrors', []):
+                failed[write_error['index']] = write_error
+
+        for index, (report_row, document) in enumerate(batch):
+            if index in failed and failed[index].get('code') == DUPLICATE_KEY_ERROR:
+                # Added concurrently after the lookup above
+                report_row['status'] = 'duplicate'
+                report_row['error'] = 'Flashcard with this word already exists in this category'
+            elif index in failed:
+                report_row['status'] = 'failed'
+                report_row['error'] = failed[index].get('errmsg', 'Insert failed')
+            else:
+                report_row['status'] = 'imported'
+                report_row['_id'] = str(document['_id'])
+
+    summary = {'imported': 0, 'duplicate': 0, 'invalid': 0, 'failed': 0}
+    for row in rows:
+        summary[row['status']] = summary.get(row['status'], 0) + 1
+
+    return {
+        'total': len(rows),
+        'imported': summary['imported'],
+        'duplicates': summary['duplicate'],
+        'invalid': summary['invalid'],
+        'failed': summary['failed'],
+        'rows': rows
+    }
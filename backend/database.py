@@ -1,6 +1,7 @@
 import os
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne
 from dotenv import load_dotenv
+from text_utils import normalize_text
 
 load_dotenv()
 
@@ -17,6 +18,12 @@ try:
     flashcards_collection = db['flashcards']
     user_settings_collection = db['user_settings']
     practice_sessions_collection = db['practice_sessions']
+    deletion_jobs_collection = db['deletion_jobs']
+    practice_rollups_collection = db['practice_rollups']
+    question_banks_collection = db['question_banks']
+    practice_events_collection = db['practice_events']
+    ai_cache_collection = db['ai_cache']
+    ai_usage_collection = db['ai_usage']
 
     # Test connection
     client.admin.command('ping')
@@ -30,6 +37,208 @@ except Exception as e:
     flashcards_collection = None
     user_settings_collection = None
     practice_sessions_collection = None
+    deletion_jobs_collection = None
+    practice_rollups_collection = None
+    question_banks_collection = None
+    practice_events_collection = None
+    ai_cache_collection = None
+    ai_usage_collection = None
+
+
+# Unique indexes that could not be built (reported by the health check)
+index_issues = []
+
+
+def _backfill_keys(collection, scope_field, source_field, key_field):
+    """
+    Fill normalized key for documents created before it existed.
+    Only documents without the field are read, so this is a no-op once done.
+    When a document collides with another on (scope, key) it gets key None and
+    duplicate_of, so the unique index can still be built and it is not revisited.
+    """
+    projection = {scope_field: 1, source_field: 1}
+    missing = list(collection.find({key_field: {'$exists': False}, 'is_deleted': {'$ne': True}}, projection).sort('_id', 1))
+    if not missing:
+        return
+
+    taken = {}  # (scope, key) -> _id of the document holding it
+    scopes = list({doc.get(scope_field) for doc in missing})
+    for doc in collection.find({scope_field: {'$in': scopes}, key_field: {'$type': 'string'}}, {scope_field: 1, key_field: 1}):
+        taken[(doc.get(scope_field), doc[key_field])] = doc['_id']
+
+    operations = []
+    duplicates = 0
+    for doc in missing:
+        key = normalize_text(doc.get(source_field)) or None
+        owner = taken.get((doc.get(scope_field), key))
+        if key is None:
+            update = {key_field: None}
+        elif owner is not None:
+            update = {key_field: None, 'duplicate_of': owner}
+            duplicates += 1
+        else:
+            taken[(doc.get(scope_field), key)] = doc['_id']
+            update = {key_field: key}
+        operations.append(UpdateOne({'_id': doc['_id']}, {'$set': update}))
+
+    collection.bulk_write(operations, ordered=False)
+    print(f"✓ Backfilled {len(operations)} {collection.name}.{key_field} values")
+    if duplicates:
+        print(f"⚠️ {duplicates} {collection.name} documents duplicate an existing {key_field}; marked with duplicate_of")
+
+
+def _index_exists(collection, keys):
+    return any(list(info['key']) == keys for info in collection.index_information().values())
+
+
+def _duplicate_groups(collection, keys, partial_filter):
+    """Groups of documents (oldest first) that would violate a unique index on keys"""
+    pipeline = [
+        {'$match': partial_filter or {}},
+        {'$sort': {'_id': 1}},
+        {'$group': {
+            '_id': {field: f'${field}' for field, _ in keys},
+            'ids': {'$push': '$_id'},
+            'count': {'$sum': 1}
+        }},
+        {'$match': {'count': {'$gt': 1}}},
+    ]
+    return list(collection.aggregate(pipeline, allowDiskUse=True))
+
+
+def _resolve_duplicates(collection, groups, key_field):
+    """Keep the oldest document in the index; later ones get key None and duplicate_of"""
+    operations = [
+        UpdateOne({'_id': doc_id}, {'$set': {key_field: None, 'duplicate_of': group['ids'][0]}})
+        for group in groups
+        for doc_id in group['ids'][1:]
+    ]
+    collection.bulk_write(operations, ordered=False)
+    print(f"⚠️ {len(operations)} duplicate {collection.name}.{key_field} values left out of the unique index (duplicate_of)")
+
+
+def _drop_whole_category_banks():
+    """Question banks used to be one document per category; they are a cache, rebuilt per card"""
+    legacy_keys = [('category_id', 1), ('content_version', 1), ('english_level', 1)]
+    if _index_exists(question_banks_collection, legacy_keys):
+        question_banks_collection.drop_index(legacy_keys)
+    result = question_banks_collection.delete_many({'questions': {'$exists': True}})
+    if result.deleted_count:
+        print(f"✓ Dropped {result.deleted_count} whole-category question banks")
+
+
+def _ensure_unique_indexes():
+    """Unique indexes that replace read-then-write duplicate checks"""
+    _backfill_keys(categories_collection, 'user_id', 'name', 'name_key')
+    _backfill_keys(flashcards_collection, 'category_id', 'word', 'word_key')
+    _drop_whole_category_banks()
+
+    # (collection, keys, options, derived key field that may be cleared on duplicates)
+    unique_indexes = [
+        # Emails are stored trimmed and lower-cased by the handlers
+        (users_collection, [('email', 1)], {}, None),
+        (categories_collection, [('user_id', 1), ('name_key', 1)],
+         {'partialFilterExpression': {'name_key': {'$type': 'string'}}}, 'name_key'),
+        (flashcards_collection, [('category_id', 1), ('word_key', 1)],
+         {'partialFilterExpression': {'word_key': {'$type': 'string'}}}, 'word_key'),
+        (user_settings_collection, [('user_id', 1)], {}, None),
+        (practice_sessions_collection, [('user_id', 1), ('idempotency_key', 1)],
+         {'partialFilterExpression': {'idempotency_key': {'$type': 'string'}}}, None),
+        # One rollup per user per day (category_id null = all categories)
+        (practice_rollups_collection, [('user_id', 1), ('category_id', 1), ('day', 1)], {}, None),
+        # Synced practice events are applied once per client event id
+        (practice_events_collection, [('user_id', 1), ('event_id', 1)], {}, None),
+        # One exercise question per card content, category and English level
+        (question_banks_collection, [('category_id', 1), ('english_level', 1), ('content_hash', 1)], {}, None),
+        # One pre-aggregated AI usage document per user per day
+        (ai_usage_collection, [('user_id', 1), ('day', 1)], {}, None),
+    ]
+
+    index_issues.clear()
+    for collection, keys, options, resolve_field in unique_indexes:
+        if _index_exists(collection, keys):
+            continue
+
+        # Only scanned while the index is missing (first start, or legacy duplicates)
+        groups = _duplicate_groups(collection, keys, options.get('partialFilterExpression'))
+        if groups and resolve_field:
+            _resolve_duplicates(collection, groups, resolve_field)
+        elif groups:
+            # Counts only: the health check is public, the ids go to the log
+            index_issues.append({
+                'collection': collection.name,
+                'keys': [field for field, _ in keys],
+                'duplicate_groups': len(groups),
+            })
+            print(f"✗ Unique index on {collection.name} {keys} NOT created: {len(groups)} groups of duplicates. "
+                  f"Resolve them and restart. First groups: {[[str(doc_id) for doc_id in group['ids']] for group in groups[:5]]}")
+            continue
+
+        try:
+            collection.create_index(keys, unique=True, **options)
+        except Exception as e:
+            index_issues.append({'collection': collection.name, 'keys': [field for field, _ in keys], 'error': str(e)})
+            print(f"✗ Unique index on {collection.name} {keys} not created: {e}")
+
+
+def _backfill_due_dates():
+    """Cards created before scheduling existed are due from their creation date"""
+    result = flashcards_collection.update_many(
+        {'due_at': {'$exists': False}},
+        [{'$set': {'due_at': {'$ifNull': ['$created_at', '$$NOW']}}}]
+    )
+    if result.modified_count:
+        print(f"✓ Scheduled {result.modified_count} existing flashcards for review")
+
+
+def ensure_indexes():
+    """Create indexes used by the API (safe to run on every start)"""
+    if db is None:
+        print("✗ Skipping indexes: no database connection")
+        return
+
+    try:
+        # Duplicate checks and per-category listing
+        _ensure_unique_indexes()
+
+        # Cascade deletion: purge lookups and the job queue
+        flashcards_collection.create_index([('user_id', 1)])
+        categories_collection.create_index([('user_id', 1)])
+        deletion_jobs_collection.create_index([('status', 1), ('next_attempt_at', 1)])
+
+        # Practice history per user
+        practice_sessions_collection.create_index([('user_id', 1), ('created_at', -1)])
+        practice_events_collection.create_index([('user_id', 1), ('reviewed_at', 1)])
+        # Events a failed sync left unapplied, by the group they are re-applied with
+        practice_events_collection.create_index(
+            [('user_id', 1), ('apply_id', 1)], partialFilterExpression={'applied': False}
+        )
+
+        # Spaced-repetition due queue
+        _backfill_due_dates()
+        flashcards_collection.create_index([('user_id', 1), ('due_at', 1)])
+        flashcards_collection.create_index([('user_id', 1), ('category_id', 1), ('due_at', 1)])
+
+        # Question bank purge on user deletion
+        question_banks_collection.create_index([('user_id', 1)])
+
+        # AI generation cache: TTL expiry and oldest-first trimming
+        ai_cache_collection.create_index([('expires_at', 1)], expireAfterSeconds=0)
+
+        # AI usage report over a range of days
+        ai_usage_collection.create_index([('day', 1)])
+
+        # Full-text search; language 'none' because Ukrainian has no stemmer
+        flashcards_collection.create_index(
+            [('user_id', 1), ('word', 'text'), ('translation', 'text'),
+             ('short_description', 'text'), ('explanation', 'text')],
+            name='flashcards_text',
+            weights={'word': 10, 'translation': 8, 'short_description': 3, 'explanation': 1},
+            default_language='none'
+        )
+        print("✓ Indexes ensured")
+    except Exception as e:
+        print(f"✗ Index creation error: {e}")
 
 
 # Database is ready
\ No newline at end of file
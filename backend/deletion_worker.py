@@ -0,0 +1,255 @@
+"""
+Cascade deletion for categories and users
+Requests only soft-delete the target and queue a job; a background worker
+purges dependent documents in bounded batches, tracks progress and retries.
+"""
+import os
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+# Add backend directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import database
+from database import (
+    users_collection, categories_collection, flashcards_collection,
+    user_settings_collection, practice_sessions_collection, deletion_jobs_collection,
+    practice_rollups_collection, question_banks_collection, practice_events_collection,
+    ai_usage_collection
+)
+from auth_utils import forget_account_status
+
+PURGE_BATCH_SIZE = int(os.getenv('PURGE_BATCH_SIZE', 500))
+BATCH_PAUSE_SECONDS = 0.05  # give the primary some air between batches
+POLL_INTERVAL_SECONDS = 5
+JOB_LEASE_SECONDS = 300
+MAX_ATTEMPTS = 5
+RETRY_BASE_DELAY_SECONDS = 30
+
+# Query that hides soft-deleted documents from reads
+NOT_DELETED = {'$ne': True}
+
+
+def _dependents(kind, job):
+    """
+    Dependent collections purged before the target document itself
+    Returns: list of (progress_name, collection, filter)
+    """
+    target_id = job['target_id']
+
+    if kind == 'category':
+        return [
+            ('flashcards', flashcards_collection, {'category_id': target_id}),
+            ('question_banks', question_banks_collection, {'category_id': target_id}),
+        ]
+
+    if kind == 'user':
+        return [
+            ('flashcards', flashcards_collection, {'user_id': target_id}),
+            ('categories', categories_collection, {'user_id': target_id}),
+            ('practice_sessions', practice_sessions_collection, {'user_id': target_id}),
+            ('practice_events', practice_events_collection, {'user_id': target_id}),
+            ('practice_rollups', practice_rollups_collection, {'user_id': target_id}),
+            ('question_banks', question_banks_collection, {'user_id': target_id}),
+            ('ai_usage', ai_usage_collection, {'user_id': target_id}),
+            ('user_settings', user_settings_collection, {'user_id': target_id}),
+        ]
+
+    raise ValueError(f'Unknown deletion kind: {kind}')
+
+
+def _target_collection(kind):
+    return categories_collection if kind == 'category' else users_collection
+
+
+def _create_job(kind, target_id, requested_by):
+    now = datetime.utcnow()
+    result = deletion_jobs_collection.insert_one({
+        'kind': kind,
+        'target_id': target_id,
+        'requested_by': requested_by,
+        'status': 'pending',
+        'attempts': 0,
+        'progress': {},
+        'last_error': None,
+        'created_at': now,
+        'updated_at': now,
+        'next_attempt_at': now,
+    })
+    deletion_worker.wake()
+    return str(result.inserted_id)
+
+
+def schedule_category_deletion(category_id, user_id):
+    """Hide category immediately and queue purge of its flashcards"""
+    categories_collection.update_one(
+        {'_id': ObjectId(category_id)},
+        {
+            '$set': {'is_deleted': True, 'deleted_at': datetime.utcnow()},
+            # Drop out of the unique name index so the name can be reused right away
+            '$unset': {'name_key': ''}
+        }
+    )
+    return _create_job('category', category_id, user_id)
+
+
+def schedule_user_deletion(user_id, requested_by):
+    """Deactivate and hide user immediately and queue purge of all their data"""
+    user_doc = users_collection.find_one({'_id': ObjectId(user_id)}, {'email': 1})
+    users_collection.update_one(
+        {'_id': ObjectId(user_id)},
+        {'$set': {
+            'is_deleted': True,
+            'is_active': False,
+            'deleted_at': datetime.utcnow(),
+            # Free the email right away so it can be registered again
+            'email': f"deleted:{user_id}",
+            'deleted_email': user_doc.get('email') if user_doc else None
+        }}
+    )
+    forget_account_status(user_id)  # its tokens stop working in this process right away
+    return _create_job('user', user_id, requested_by)
+
+
+def _purge_batch(collection, query):
+    """Delete up to PURGE_BATCH_SIZE matching documents; returns deleted count"""
+    ids = [doc['_id'] for doc in collection.find(query, {'_id': 1}).limit(PURGE_BATCH_SIZE)]
+    if not ids:
+        return 0
+    return collection.delete_many({'_id': {'$in': ids}}).deleted_count
+
+
+def run_job(job):
+    """Purge everything that belongs to a job's target, batch by batch"""
+    job_id = job['_id']
+    kind = job['kind']
+
+    for name, collection, query in _dependents(kind, job):
+        while True:
+            deleted = _purge_batch(collection, query)
+            if not deleted:
+                break
+            deletion_jobs_collection.update_one(
+                {'_id': job_id},
+                {
+                    '$inc': {f'progress.{name}': deleted},
+                    '$set': {
+                        'updated_at': datetime.utcnow(),
+                        'lease_until': datetime.utcnow() + timedelta(seconds=JOB_LEASE_SECONDS)
+                    }
+                }
+            )
+            time.sleep(BATCH_PAUSE_SECONDS)
+
+    _target_collection(kind).delete_one({'_id': ObjectId(job['target_id'])})
+    deletion_jobs_collection.update_one(
+        {'_id': job_id},
+        {'$set': {'status': 'done', 'finished_at': datetime.utcnow(), 'updated_at': datetime.utcnow()}}
+    )
+
+
+def claim_next_job():
+    """Atomically take the next due job (or one whose lease expired)"""
+    now = datetime.utcnow()
+    return deletion_jobs_collection.find_one_and_update(
+        {'$or': [
+            {'status': {'$in': ['pending', 'retry']}, 'next_attempt_at': {'$lte': now}},
+            {'status': 'running', 'lease_until': {'$lt': now}},
+        ]},
+        {
+            '$set': {
+                'status': 'running',
+                'started_at': now,
+                'updated_at': now,
+                'lease_until': now + timedelta(seconds=JOB_LEASE_SECONDS)
+            },
+            '$inc': {'attempts': 1}
+        },
+        sort=[('next_attempt_at', 1)],
+        return_document=ReturnDocument.AFTER
+    )
+
+
+def _mark_failed_attempt(job, error):
+    attempts = job.get('attempts', 1)
+    if attempts >= MAX_ATTEMPTS:
+        update = {'status': 'failed'}
+    else:
+        delay = RETRY_BASE_DELAY_SECONDS * (2 ** (attempts - 1))
+        update = {'status': 'retry', 'next_attempt_at': datetime.utcnow() + timedelta(seconds=delay)}
+
+    update.update({'last_error': str(error), 'updated_at': datetime.utcnow()})
+    deletion_jobs_collection.update_one({'_id': job['_id']}, {'$set': update})
+
+
+def get_recent_jobs(limit=50):
+    """Latest deletion jobs for the admin panel"""
+    jobs = deletion_jobs_collection.find({}).sort('created_at', -1).limit(limit)
+    return [{
+        '_id': str(job['_id']),
+        'kind': job['kind'],
+        'target_id': job['target_id'],
+        'status': job['status'],
+        'attempts': job.get('attempts', 0),
+        'progress': job.get('progress', {}),
+        'last_error': job.get('last_error'),
+        'created_at': job['created_at'].isoformat(),
+        'finished_at': job['finished_at'].isoformat() if job.get('finished_at') else None
+    } for job in jobs]
+
+
+class DeletionWorker(threading.Thread):
+    """Background thread that processes deletion jobs one at a time"""
+
+    def __init__(self):
+        super().__init__(name='deletion-worker', daemon=True)
+        self._wake_event = threading.Event()
+        self._stop_event = threading.Event()
+
+    def wake(self):
+        self._wake_event.set()
+
+    def stop(self):
+        self._stop_event.set()
+        self._wake_event.set()
+
+    def run(self):
+        print("🧹 Deletion worker started")
+        while not self._stop_event.is_set():
+            job = None
+            try:
+                job = claim_next_job()
+                if job:
+                    print(f"🧹 Purging {job['kind']} {job['target_id']} (attempt {job['attempts']})")
+                    run_job(job)
+                    print(f"✅ Purged {job['kind']} {job['target_id']}")
+                    continue
+            except Exception as e:
+                print(f"❌ Deletion job error: {e}")
+                print(traceback.format_exc())
+                if job:
+                    try:
+                        _mark_failed_attempt(job, e)
+                    except Exception as mark_error:
+                        print(f"❌ Could not update deletion job: {mark_error}")
+
+            self._wake_event.wait(POLL_INTERVAL_SECONDS)
+            self._wake_event.clear()
+
+
+deletion_worker = DeletionWorker()
+
+
+def start_deletion_worker():
+    """Start the background worker once (no-op without database)"""
+    if database.db is None:
+        print("✗ Deletion worker not started: no database connection")
+        return
+    if not deletion_worker.is_alive():
+        deletion_worker.start()
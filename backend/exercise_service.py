@@ -0,0 +1,89 @@
+"""
+Exercise session generation
+Picks the cards for a session (due-first for the user's own categories, random
+for default decks) and precomputes multiple-choice options from the most similar
+cards, so the client receives only what it renders. Options and hints are read
+from the category's question bank where it is up to date.
+"""
+import os
+import random
+import sys
+
+# Add backend directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import flashcards_collection
+from question_bank import DISTRACTOR_CANDIDATES, load_questions, question_bank_builder
+from similarity_index import similarity_indexes
+
+EXERCISE_TYPES = ('translation',)
+DEFAULT_SESSION_SIZE = 20
+MAX_SESSION_SIZE = 100
+OPTIONS_PER_QUESTION = 4
+
+SESSION_CARD_FIELDS = {'word': 1, 'word_key': 1, 'translation': 1, 'short_description': 1}
+
+
+def _session_cards(category, size):
+    """Cards to practice: most overdue first for own decks, a random sample for default decks"""
+    category_id = str(category['_id'])
+    if category.get('is_default', False):
+        return list(flashcards_collection.aggregate([
+            {'$match': {'category_id': category_id}},
+            {'$sample': {'size': size}},
+            {'$project': SESSION_CARD_FIELDS}
+        ]))
+
+    # (user_id, category_id, due_at) index: due cards first, then the ones due soonest
+    return list(
+        flashcards_collection.find({'user_id': category['user_id'], 'category_id': category_id}, SESSION_CARD_FIELDS)
+        .sort('due_at', 1)
+        .limit(size)
+    )
+
+
+def _options(card, distractors):
+    """Correct word plus wrong words sampled from its most similar cards, shuffled"""
+    options = [card['word']] + random.sample(distractors, min(OPTIONS_PER_QUESTION - 1, len(distractors)))
+    random.shuffle(options)
+    return options
+
+
+def build_exercise_session(category, size=DEFAULT_SESSION_SIZE, exercise_type='translation',
+                           english_level='intermediate'):
+    """
+    Ready-to-render session for one category
+    Returns: dict with compact cards, each carrying its answer options
+    """
+    size = max(1, min(int(size), MAX_SESSION_SIZE))
+    cards = _session_cards(category, size)
+
+    questions = load_questions(category, english_level, cards)
+
+    session_cards = []
+    outdated = 0
+    for card in cards:
+        question = questions.get(str(card['_id'])) or {'hint': None, 'distractors': None}
+        distractors = question['distractors']
+        if distractors is None:
+            # Served from the live index; the builder refreshes the card for next sessions
+            outdated += 1
+            distractors = similarity_indexes.distractors(category, card, DISTRACTOR_CANDIDATES)
+        session_cards.append({
+            '_id': str(card['_id']),
+            'word': card['word'],
+            'translation': card.get('translation', ''),
+            'short_description': card.get('short_description', ''),
+            'hint': question['hint'],
+            'options': _options(card, distractors)
+        })
+    if outdated:
+        question_bank_builder.request(category['_id'], english_level)
+
+    return {
+        'category_id': str(category['_id']),
+        'exercise_type': exercise_type,
+        'cards': session_cards,
+        'total': len(session_cards),
+        'from_bank': not outdated
+    }
@@ -0,0 +1,99 @@
+"""
+Per-user in-process card indexes
+Shared cache behind the search, autocomplete and similarity indexes: an LRU of
+per-user indexes built lazily from the user's active cards, kept in sync
+incrementally, plus an optional index over the default decks.
+"""
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+# Add backend directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import flashcards_collection
+from srs import active_cards_query
+
+DEFAULT_DECK_TTL_SECONDS = 600
+
+
+class IndexRegistry:
+    """
+    LRU of per-user indexes and the shared default-deck index
+    index_factory(default) returns an empty index for a user's cards, or for the
+    default decks when default is True; indexes provide add(card),
+    remove(card_id) and __len__.
+    """
+
+    def __init__(self, name, projection, index_factory, max_users):
+        self.name = name
+        self.projection = projection
+        self.index_factory = index_factory
+        self.max_users = max_users
+        self._indexes = OrderedDict()
+        # Bumped on every invalidation so builds that raced one are discarded
+        self._generations = {}
+        self._lock = threading.Lock()
+        self._default_index = None
+        self._default_loaded_at = 0
+
+    def _load(self, query, default):
+        index = self.index_factory(default)
+        for card in flashcards_collection.find(query, self.projection):
+            index.add(card)
+        return index
+
+    def get(self, user_id):
+        """The user's index, built from their active cards on first use"""
+        with self._lock:
+            index = self._indexes.get(user_id)
+            if index is not None:
+                self._indexes.move_to_end(user_id)
+                return index
+            generation = self._generations.get(user_id, 0)
+
+        index = self._load(active_cards_query(user_id), default=False)
+        print(f"🗂️ {self.name.capitalize()} index built for user {user_id}: {len(index)} cards")
+
+        with self._lock:
+            if self._generations.get(user_id, 0) != generation:
+                # Invalidated while building: serve this one but don't cache it
+                return index
+            # Another thread may have built it meanwhile; keep the first one
+            existing = self._indexes.get(user_id)
+            if existing is not None:
+                return existing
+            self._indexes[user_id] = index
+            while len(self._indexes) > self.max_users:
+                self._indexes.popitem(last=False)
+            return index
+
+    def default_deck_index(self):
+        # Default decks only change on deploy (seeding), so a TTL refresh is enough
+        if self._default_index is None or time.time() - self._default_loaded_at > DEFAULT_DECK_TTL_SECONDS:
+            self._default_index = self._load({'is_default': True}, default=True)
+            self._default_loaded_at = time.time()
+        return self._default_index
+
+    def _loaded(self, user_id):
+        with self._lock:
+            return self._indexes.get(user_id)
+
+    def add_card(self, user_id, card):
+        """Index a created/updated card (only if the user's index is loaded)"""
+        index = self._loaded(user_id)
+        if index is not None:
+            index.add(card)
+
+    def remove_card(self, user_id, card_id):
+        index = self._loaded(user_id)
+        if index is not None:
+            index.remove(str(card_id))
+
+    def invalidate(self, user_id):
+        """Drop a user's index; it is rebuilt on next use"""
+        with self._lock:
+            self._indexes.pop(user_id, None)
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
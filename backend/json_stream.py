@@ -0,0 +1,69 @@
+"""
+Incremental JSON field parser
+Fed with chunks of a streamed JSON object, it reports each top-level field as
+soon as its value is complete, without waiting for the closing brace.
+"""
+import json
+
+
+class JsonFieldStream:
+    """Tracks nesting and strings over the text seen so far; scanning is O(total length)"""
+
+    def __init__(self):
+        self.text = ''
+        self.done = False
+        self._position = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+        self._key = None
+        self._value_start = None
+
+    def _field(self, end):
+        value = json.loads(self.text[self._value_start:end])
+        field = (self._key, value)
+        self._key = None
+        self._value_start = None
+        return field
+
+    def feed(self, chunk):
+        """Add text; returns list of (key, value) for fields completed by this chunk"""
+        self.text += chunk
+        fields = []
+
+        while self._position < len(self.text) and not self.done:
+            char = self.text[self._position]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._value_start is None:
+                        self._key = json.loads(self.text[self._string_start:self._position + 1])
+            elif char == '"':
+                self._in_string = True
+                self._string_start = self._position
+            elif char in '{[':
+                self._depth += 1
+            elif char in '}]':
+                self._depth -= 1
+                if self._depth == 0:
+                    if self._value_start is not None:
+                        fields.append(self._field(self._position))
+                    self.done = True
+            elif self._depth == 1 and char == ':':
+                self._value_start = self._position + 1
+            elif self._depth == 1 and char == ',' and self._value_start is not None:
+                fields.append(self._field(self._position))
+
+            self._position += 1
+
+        return fields
+
+    def result(self):
+        """Whole document once the stream has ended"""
+        return json.loads(self.text)
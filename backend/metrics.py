@@ -0,0 +1,95 @@
+"""
+In-process metrics
+Thread-safe counters, gauges and latency histograms exposed through the admin API
+"""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+HISTOGRAM_WINDOW = 1024  # recent samples kept per histogram for percentiles
+
+
+def _series_name(name, labels):
+    if not labels:
+        return name
+    label_text = ','.join(f'{key}="{value}"' for key, value in sorted(labels.items()))
+    return f'{name}{{{label_text}}}'
+
+
+class _Histogram:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = deque(maxlen=HISTOGRAM_WINDOW)
+
+    def observe(self, value):
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self.samples.append(value)
+
+    def percentile(self, fraction):
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'avg': round(self.total / self.count, 6) if self.count else 0.0,
+            'max': round(self.max, 6),
+            'p50': round(self.percentile(0.50), 6),
+            'p95': round(self.percentile(0.95), 6),
+            'p99': round(self.percentile(0.99), 6),
+        }
+
+
+class Metrics:
+    """Registry of named series; labels are passed as keyword arguments"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+
+    def inc(self, name, value=1, **labels):
+        series = _series_name(name, labels)
+        with self._lock:
+            self._counters[series] = self._counters.get(series, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        series = _series_name(name, labels)
+        with self._lock:
+            self._gauges[series] = value
+
+    def observe(self, name, value, **labels):
+        series = _series_name(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(series)
+            if histogram is None:
+                histogram = self._histograms[series] = _Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Observe duration of the with-block in seconds"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'counters': dict(self._counters),
+                'gauges': dict(self._gauges),
+                'histograms': {series: histogram.summary() for series, histogram in self._histograms.items()},
+            }
+
+
+metrics = Metrics()
@@ -0,0 +1,207 @@
+"""
+Per-operation AI model routing
+Each AI operation has a route: the model tier it runs on, whether a user who
+changed the ai_model setting from its default may move it to another tier, a latency budget (p95 of recent
+calls) and a cost budget (estimated USD per call). When the chosen model is
+over its latency budget or its circuit is open, calls fall back to the next,
+faster tier until the primary recovers. Background work (question-bank
+builds) always runs on the route's tier, whatever the owner's setting.
+"""
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+# Add backend directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import user_settings_collection
+from ai_limiter import BACKGROUND, ai_priority
+from ai_resilience import get_breaker
+from ai_usage import MODEL_PRICES, ai_user
+from prompt_registry import TEMPLATES, get_prompt
+from metrics import metrics
+
+QUALITY, FAST = 'quality', 'fast'
+TIER_ORDER = [QUALITY, FAST]  # fallbacks move towards the end
+TIER_MODELS = {
+    QUALITY: os.getenv('AI_MODEL_QUALITY', 'gpt-4o'),
+    FAST: os.getenv('AI_MODEL_FAST', 'gpt-4o-mini'),
+}
+
+# UserSettings.ai_model value -> tier
+SETTING_TIERS = {'gpt-3.5': FAST, 'gpt-4': QUALITY}
+DEFAULT_SETTING = 'gpt-3.5'
+
+SETTINGS_CACHE_SECONDS = 60
+LATENCY_WINDOW_SECONDS = float(os.getenv('AI_ROUTE_LATENCY_WINDOW', 300))
+LATENCY_MIN_SAMPLES = 5
+LATENCY_PERCENTILE = 0.95
+
+
+class Route:
+    """Routing policy of one AI operation"""
+
+    def __init__(self, tier, latency_budget, cost_budget, completion_tokens, user_override=True):
+        self.tier = tier
+        self.latency_budget = latency_budget  # seconds, p95 over the recent window
+        self.cost_budget = cost_budget  # USD per call
+        self.completion_tokens = completion_tokens  # typical output size, for the cost estimate
+        self.user_override = user_override
+
+
+ROUTES = {
+    'complete_flashcard': Route(FAST, 15.0, 0.02, 800),
+    'complete_flashcard_batch': Route(FAST, 45.0, 0.06, 4000),
+    'definition': Route(FAST, 8.0, 0.01, 300),
+    'examples': Route(FAST, 6.0, 0.005, 150),
+    'regenerate_examples': Route(FAST, 6.0, 0.005, 150),
+    'exercise_explanation': Route(FAST, 6.0, 0.005, 80),
+    # Short, mechanical outputs: the user's model choice doesn't apply
+    'translate': Route(FAST, 4.0, 0.001, 40, user_override=False),
+    'translate_sentence': Route(FAST, 5.0, 0.001, 60, user_override=False),
+}
+DEFAULT_ROUTE = Route(FAST, 10.0, 0.01, 300)
+
+
+def _parse_route_tiers(value):
+    """'definition=quality,examples=fast' -> {'definition': 'quality', 'examples': 'fast'}"""
+    tiers = {}
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        operation, _, tier = item.partition('=')
+        tiers[operation.strip()] = tier.strip()
+    return tiers
+
+
+# Deployment overrides of the table's tiers
+for _operation, _tier in _parse_route_tiers(os.getenv('AI_MODEL_ROUTES', '')).items():
+    if _operation in ROUTES and _tier in TIER_MODELS:
+        ROUTES[_operation].tier = _tier
+
+
+def estimated_cost(operation, model):
+    """USD for one call: the registered prompt's size plus the route's typical output"""
+    prices = MODEL_PRICES.get(model)
+    if prices is None:
+        return None
+    route = ROUTES.get(operation, DEFAULT_ROUTE)
+    prompt_tokens = 0
+    if any(name == operation for name, _ in TEMPLATES):
+        prompt_tokens = get_prompt(operation).token_footprint(model)['total_tokens']
+    return (prompt_tokens * prices[0] + route.completion_tokens * prices[1]) / 1_000_000
+
+
+class ModelRouter:
+    """Picks the model for an AI call from the routing table, user setting and live health"""
+
+    def __init__(self):
+        self._settings = {}  # user_id -> (tier or None, loaded_at)
+        self._latencies = {}  # (model, operation) -> deque of (finished_at, seconds)
+        self._costs = {}  # (operation, model) -> estimated USD, prompts are static per process
+        self._lock = threading.Lock()
+
+    def _user_tier(self, user_id):
+        """Tier the user explicitly chose, None while the setting is at its default"""
+        cached = self._settings.get(user_id)
+        if cached is not None and time.monotonic() - cached[1] < SETTINGS_CACHE_SECONDS:
+            return cached[0]
+        setting = DEFAULT_SETTING
+        if user_settings_collection is not None:
+            settings_doc = user_settings_collection.find_one({'user_id': user_id}, {'ai_model': 1})
+            if settings_doc and settings_doc.get('ai_model'):
+                setting = settings_doc['ai_model']
+        # The default is what every account has, not a choice: routes keep their tier
+        tier = SETTING_TIERS.get(setting) if setting != DEFAULT_SETTING else None
+        self._settings[user_id] = (tier, time.monotonic())
+        return tier
+
+    def forget_user(self, user_id):
+        """Drop the cached setting after the user changed it"""
+        self._settings.pop(user_id, None)
+
+    def _within_cost(self, operation, route, model):
+        key = (operation, model)
+        if key not in self._costs:
+            self._costs[key] = estimated_cost(operation, model)
+        cost = self._costs[key]
+        return cost is None or cost <= route.cost_budget
+
+    def record_latency(self, model, operation, seconds):
+        """Duration of one successful upstream call"""
+        with self._lock:
+            samples = self._latencies.setdefault((model, operation), deque(maxlen=256))
+            samples.append((time.monotonic(), seconds))
+
+    def _recent_p95(self, model, operation):
+        cutoff = time.monotonic() - LATENCY_WINDOW_SECONDS
+        with self._lock:
+            samples = self._latencies.get((model, operation))
+            if not samples:
+                return None
+            while samples and samples[0][0] < cutoff:
+                samples.popleft()
+            recent = sorted(seconds for _, seconds in samples)
+        if len(recent) < LATENCY_MIN_SAMPLES:
+            return None
+        return recent[min(len(recent) - 1, int(LATENCY_PERCENTILE * len(recent)))]
+
+    def _unhealthy(self, model, operation, route):
+        """Reason to skip the model right now, else None"""
+        if get_breaker(model).is_open():
+            return 'circuit_open'
+        p95 = self._recent_p95(model, operation)
+        if p95 is not None and p95 > route.latency_budget:
+            return 'slow'
+        return None
+
+    def select(self, operation, user_id=None):
+        """Model for the next call of `operation` made for the user (default: current AI user)"""
+        route = ROUTES.get(operation, DEFAULT_ROUTE)
+        user_id = user_id if user_id is not None else ai_user.get()
+        tier = route.tier
+        if route.user_override and user_id is not None and ai_priority.get() != BACKGROUND:
+            tier = self._user_tier(user_id) or tier
+
+        candidates = [TIER_MODELS[name] for name in TIER_ORDER[TIER_ORDER.index(tier):]]
+        affordable = [model for model in candidates if self._within_cost(operation, route, model)]
+        if len(affordable) < len(candidates):
+            metrics.inc('ai_route_cost_downgrades', operation=operation)
+        candidates = affordable or candidates[-1:]
+
+        for model in candidates[:-1]:
+            reason = self._unhealthy(model, operation, route)
+            if reason is None:
+                return model
+            metrics.inc('ai_route_fallbacks', operation=operation, model=model, reason=reason)
+        # The fastest tier is the last resort even when unhealthy
+        return candidates[-1]
+
+    def status(self):
+        """Routing table with live latency and circuit state, for the admin API"""
+        routes = []
+        for operation, route in sorted(ROUTES.items()):
+            models = []
+            for name in TIER_ORDER:
+                model = TIER_MODELS[name]
+                p95 = self._recent_p95(model, operation)
+                cost = estimated_cost(operation, model)
+                models.append({
+                    'tier': name,
+                    'model': model,
+                    'p95_seconds': round(p95, 3) if p95 is not None else None,
+                    'estimated_cost_usd': round(cost, 6) if cost is not None else None,
+                    'circuit_open': get_breaker(model).is_open(),
+                })
+            routes.append({
+                'operation': operation,
+                'tier': route.tier,
+                'user_override': route.user_override,
+                'latency_budget_seconds': route.latency_budget,
+                'cost_budget_usd': route.cost_budget,
+                'models': models,
+            })
+        return routes
+
+
+model_router = ModelRouter()
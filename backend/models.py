@@ -1,6 +1,7 @@
 from datetime import datetime
 from bson import ObjectId
 import bcrypt
+from text_utils import normalize_text
 
 
 class User:
@@ -101,6 +102,7 @@ class Category:
         return {
             'user_id': self.user_id,
             'name': self.name,
+            'name_key': normalize_text(self.name),  # unique per user
             'description': self.description,
             'color': self.color,
             'created_at': self.created_at,
@@ -125,6 +127,7 @@ class Flashcard:
         self.last_practiced = None
         self.created_at = datetime.utcnow()
         self.updated_at = datetime.utcnow()
+        self.due_at = self.created_at  # new cards are due right away (see srs.py)
 
     def to_dict(self):
         """Convert flashcard to dictionary"""
@@ -132,6 +135,7 @@ class Flashcard:
             'user_id': self.user_id,
             'category_id': self.category_id,
             'word': self.word,
+            'word_key': normalize_text(self.word),  # unique per category
             'translation': self.translation,
             'example': self.example,
             'explanation': self.explanation,
@@ -139,6 +143,7 @@ class Flashcard:
             'times_practiced': self.times_practiced,
             'times_correct': self.times_correct,
             'last_practiced': self.last_practiced,
+            'due_at': self.due_at,
             'created_at': self.created_at,
             'updated_at': self.updated_at
         }
@@ -148,13 +153,16 @@ class PracticeSession:
     """Practice session model for tracking user progress"""
 
     def __init__(self, user_id, category_id, total_cards,
-                 correct_answers, session_duration):
+                 correct_answers, session_duration, results=None, idempotency_key=None):
         self.user_id = user_id
         self.category_id = category_id
         self.total_cards = total_cards
         self.correct_answers = correct_answers
         self.session_duration = session_duration  # in seconds
         self.score_percentage = (correct_answers / total_cards * 100) if total_cards > 0 else 0
+        self.results = results or []  # [{'flashcard_id': str, 'correct': bool}]
+        self.idempotency_key = idempotency_key  # client-generated, dedupes retries
+        self.applied = False  # set once reviews and rollups are written
         self.created_at = datetime.utcnow()
 
     def to_dict(self):
@@ -166,5 +174,42 @@ class PracticeSession:
             'correct_answers': self.correct_answers,
             'session_duration': self.session_duration,
             'score_percentage': self.score_percentage,
+            'results': self.results,
+            'idempotency_key': self.idempotency_key,
+            'applied': self.applied,
             'created_at': self.created_at
+        }
+
+
+class PracticeEvent:
+    """Single answer synced from a client (offline practice)"""
+
+    def __init__(self, user_id, event_id, flashcard_id, correct, reviewed_at,
+                 quality=None, category_id=None, session_id=None):
+        self.user_id = user_id
+        self.event_id = event_id  # client-generated, unique per user
+        self.flashcard_id = flashcard_id
+        self.correct = correct
+        self.quality = quality
+        self.reviewed_at = reviewed_at  # client time, clamped to server time
+        self.category_id = category_id
+        self.session_id = session_id
+        self.applied = False  # set once card and rollup writes succeed
+        self.apply_id = None  # shared by the events first claimed together; guards their writes
+        self.received_at = datetime.utcnow()
+
+    def to_dict(self):
+        """Convert event to dictionary"""
+        return {
+            'user_id': self.user_id,
+            'event_id': self.event_id,
+            'flashcard_id': self.flashcard_id,
+            'correct': self.correct,
+            'quality': self.quality,
+            'reviewed_at': self.reviewed_at,
+            'category_id': self.category_id,
+            'session_id': self.session_id,
+            'applied': self.applied,
+            'apply_id': self.apply_id,
+            'received_at': self.received_at
         }
\ No newline at end of file
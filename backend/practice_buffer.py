@@ -0,0 +1,162 @@
+"""
+Write-behind buffer for per-card practice counters
+Answers are coalesced per card in memory and flushed as bulk_write $inc
+batches every few seconds or when enough cards are pending.
+"""
+import os
+import sys
+import threading
+import time
+import traceback
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+# Add backend directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import flashcards_collection
+from metrics import metrics
+
+FLUSH_INTERVAL_SECONDS = float(os.getenv('PRACTICE_FLUSH_INTERVAL', 2.0))
+MAX_PENDING_CARDS = int(os.getenv('PRACTICE_MAX_PENDING_CARDS', 1000))
+BULK_WRITE_CHUNK = 1000
+
+
+class PracticeCounterBuffer:
+    """Coalesces times_practiced / times_correct / last_practiced per card"""
+
+    def __init__(self, flush_interval=FLUSH_INTERVAL_SECONDS, max_pending=MAX_PENDING_CARDS):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending = {}  # (user_id, flashcard_id) -> counters
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake_event = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def add(self, user_id, flashcard_id, correct, practiced_at):
+        """Queue one answer; flushed later by the background thread"""
+        key = (user_id, flashcard_id)
+        with self._lock:
+            counters = self._pending.get(key)
+            if counters is None:
+                counters = self._pending[key] = {
+                    'times_practiced': 0,
+                    'times_correct': 0,
+                    'last_practiced': practiced_at
+                }
+            counters['times_practiced'] += 1
+            counters['times_correct'] += 1 if correct else 0
+            counters['last_practiced'] = max(counters['last_practiced'], practiced_at)
+            depth = len(self._pending)
+
+        metrics.set_gauge('practice_buffer_depth', depth)
+        metrics.inc('practice_buffer_answers')
+
+        if self._thread is None:
+            # No flusher running (scripts, one-off tools): write through
+            self.flush()
+        elif depth >= self.max_pending:
+            self._wake_event.set()
+
+    def add_results(self, user_id, results, practiced_at):
+        for result in results:
+            self.add(user_id, result['flashcard_id'], result['correct'], practiced_at)
+
+    def depth(self):
+        with self._lock:
+            return len(self._pending)
+
+    def _requeue(self, pending):
+        """Merge back counters of a failed flush so they are retried"""
+        with self._lock:
+            for key, counters in pending.items():
+                current = self._pending.get(key)
+                if current is None:
+                    self._pending[key] = counters
+                    continue
+                current['times_practiced'] += counters['times_practiced']
+                current['times_correct'] += counters['times_correct']
+                current['last_practiced'] = max(current['last_practiced'], counters['last_practiced'])
+
+    def flush(self):
+        """Write all pending counters; returns number of cards flushed"""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            metrics.set_gauge('practice_buffer_depth', 0)
+
+            if not pending:
+                return 0
+
+            # Only the user's own cards are counted (default-deck cards are shared)
+            keys = list(pending)
+            operations = []
+            for user_id, flashcard_id in keys:
+                counters = pending[(user_id, flashcard_id)]
+                operations.append(UpdateOne(
+                    {'_id': ObjectId(flashcard_id), 'user_id': user_id},
+                    {
+                        '$inc': {
+                            'times_practiced': counters['times_practiced'],
+                            'times_correct': counters['times_correct']
+                        },
+                        '$max': {'last_practiced': counters['last_practiced']}
+                    }
+                ))
+
+            started = time.perf_counter()
+            start = 0
+            try:
+                while start < len(operations):
+                    flashcards_collection.bulk_write(operations[start:start + BULK_WRITE_CHUNK], ordered=False)
+                    start += BULK_WRITE_CHUNK
+            except Exception:
+                metrics.inc('practice_buffer_flush_errors')
+                # Requeue the chunk that failed and everything after it. $inc is not
+                # idempotent, so a partially applied chunk may count twice; losing
+                # answers would be the worse outcome for learners.
+                self._requeue({key: pending[key] for key in keys[start:]})
+                metrics.set_gauge('practice_buffer_depth', self.depth())
+                raise
+            finally:
+                metrics.observe('practice_buffer_flush_seconds', time.perf_counter() - started)
+
+            metrics.inc('practice_buffer_flushed_cards', len(operations))
+            return len(operations)
+
+    def _run(self):
+        print("🧮 Practice counter buffer started")
+        while not self._stop_event.is_set():
+            self._wake_event.wait(self.flush_interval)
+            self._wake_event.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"❌ Practice buffer flush error: {e}")
+                print(traceback.format_exc())
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='practice-buffer', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=10):
+        """Stop the flusher and write whatever is still pending"""
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._wake_event.set()
+        self._thread.join(timeout)
+        self._thread = None
+        try:
+            flushed = self.flush()
+            print(f"🧮 Practice buffer flushed {flushed} cards on shutdown")
+        except Exception as e:
+            print(f"❌ Practice buffer final flush failed: {e}")
+
+
+practice_counter_buffer = PracticeCounterBuffer()
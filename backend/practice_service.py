@@ -0,0 +1,413 @@
+"""
+Practice session recording
+Stores finished exercise sessions, applies per-card progress counters and
+reschedules the reviewed cards. Offline clients sync batches of answer events.
+Sessions and events are stored first with applied=False and marked applied
+only after their writes succeed, so a retry finishes an apply that failed.
+Card and rollup writes carry a stable apply id (the session id, or the token
+the events were first claimed with) and skip documents that already carry it,
+so the retry never counts a write twice.
+"""
+import os
+import sys
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+# Add backend directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import flashcards_collection, practice_events_collection, practice_sessions_collection
+from models import PracticeEvent, PracticeSession
+from practice_buffer import practice_counter_buffer
+from practice_stats import (
+    check_backfill_gate, day_key, learned_rollup_rows, release_rollup_guards, rollup_rows, write_rollups
+)
+from srs import (
+    SRS_FIELDS, answer_quality, guarded_update, learned_by, load_card_states, newly_learned, release_card_guards,
+    replay_reviews, schedule_reviews
+)
+
+MAX_RESULTS_PER_SESSION = 500
+MAX_IDEMPOTENCY_KEY_LENGTH = 100
+MAX_EVENTS_PER_SYNC = 5000
+DUPLICATE_KEY_ERROR = 11000
+APPLY_LEASE_SECONDS = 60  # a crashed apply can be retried after this
+
+CARD_STATE_FIELDS = ('times_practiced', 'times_correct', 'last_practiced') + SRS_FIELDS
+
+
+class PracticeValidationError(ValueError):
+    """Raised when a submitted practice session is malformed"""
+
+
+def _parse_results(results):
+    """
+    Validate submitted answers
+    Returns: list of {'flashcard_id', 'correct'} (+ 'quality' 0..5 when graded)
+    """
+    if not isinstance(results, list) or not results:
+        raise PracticeValidationError('Results must be a non-empty list')
+    if len(results) > MAX_RESULTS_PER_SESSION:
+        raise PracticeValidationError(f'A session can contain at most {MAX_RESULTS_PER_SESSION} answers')
+
+    parsed = []
+    for item in results:
+        if not isinstance(item, dict):
+            raise PracticeValidationError('Each result must be an object')
+        flashcard_id = str(item.get('flashcard_id', ''))
+        if not ObjectId.is_valid(flashcard_id):
+            raise PracticeValidationError(f'Invalid flashcard id: {flashcard_id}')
+        result = {'flashcard_id': flashcard_id, 'correct': bool(item.get('correct'))}
+        if item.get('quality') is not None:
+            try:
+                result['quality'] = answer_quality(result['correct'], item['quality'])
+            except (TypeError, ValueError):
+                raise PracticeValidationError('Quality must be a number from 0 to 5')
+        parsed.append(result)
+    return parsed
+
+
+def _unclaimed(now):
+    """Filter for unapplied rows that no live request is applying"""
+    return {
+        'applied': False,
+        '$or': [{'apply_lease': {'$exists': False}}, {'apply_lease': {'$lt': now}}]
+    }
+
+
+def _claim_fields(token, now):
+    return {'apply_token': token, 'apply_lease': now + timedelta(seconds=APPLY_LEASE_SECONDS)}
+
+
+@contextmanager
+def _applying(collection, query, token):
+    """Mark the rows claimed with `token` applied on success, release them on failure"""
+    claimed = dict(query, apply_token=token)
+    release = {'$unset': {'apply_token': '', 'apply_lease': ''}}
+    try:
+        yield
+    except Exception:
+        collection.update_many(claimed, release)
+        raise
+    collection.update_many(claimed, dict(release, **{'$set': {'applied': True}}))
+
+
+def _release_guards(user_id, apply_ids, card_ids, days):
+    """Drop apply ids from cards and rollups once their rows are applied; leftovers are harmless"""
+    try:
+        release_card_guards(card_ids, apply_ids)
+        release_rollup_guards(user_id, days, apply_ids)
+    except Exception as e:
+        print(f"⚠️ Could not clear apply guards: {e}")
+
+
+def _session_response(session_doc):
+    return {
+        '_id': str(session_doc['_id']),
+        'category_id': session_doc.get('category_id'),
+        'total_cards': session_doc.get('total_cards', 0),
+        'correct_answers': session_doc.get('correct_answers', 0),
+        'session_duration': session_doc.get('session_duration', 0),
+        'score_percentage': session_doc.get('score_percentage', 0),
+        'created_at': session_doc['created_at'].isoformat()
+    }
+
+
+def record_session(user_id, category_id, results, duration=0, idempotency_key=None):
+    """
+    Record a finished practice session
+    A repeated idempotency_key returns the stored session without counting twice.
+    Returns: (session response dict, created flag)
+    """
+    if category_id is not None and not ObjectId.is_valid(str(category_id)):
+        raise PracticeValidationError('Invalid category id')
+    if idempotency_key is not None:
+        idempotency_key = str(idempotency_key).strip()
+        if not idempotency_key or len(idempotency_key) > MAX_IDEMPOTENCY_KEY_LENGTH:
+            raise PracticeValidationError('Invalid idempotency key')
+    try:
+        duration = max(0, int(duration or 0))
+    except (TypeError, ValueError):
+        raise PracticeValidationError('Duration must be a number of seconds')
+
+    parsed = _parse_results(results)
+    correct_answers = sum(1 for result in parsed if result['correct'])
+
+    session = PracticeSession(
+        user_id,
+        category_id,
+        len(parsed),
+        correct_answers,
+        duration,
+        results=parsed,
+        idempotency_key=idempotency_key
+    )
+    token = ObjectId()
+    session_doc = dict(session.to_dict(), **_claim_fields(token, session.created_at))
+
+    try:
+        # Unique (user_id, idempotency_key) index claims the session first
+        practice_sessions_collection.insert_one(session_doc)
+    except DuplicateKeyError:
+        existing = practice_sessions_collection.find_one({
+            'user_id': user_id,
+            'idempotency_key': idempotency_key
+        })
+        if existing.get('applied') is False:
+            _retry_session_apply(user_id, existing)
+        return _session_response(existing), False
+
+    _apply_session(user_id, session_doc, token)
+    return _session_response(session_doc), True
+
+
+def _retry_session_apply(user_id, session_doc):
+    """Finish a stored session whose first apply failed (unless it is still running)"""
+    check_backfill_gate(user_id, session_doc['created_at'])
+    token = ObjectId()
+    now = datetime.utcnow()
+    claimed = practice_sessions_collection.update_one(
+        dict(_unclaimed(now), _id=session_doc['_id']),
+        {'$set': _claim_fields(token, now)}
+    )
+    if claimed.modified_count:
+        print(f"🔁 Re-applying practice session {session_doc['_id']}")
+        _apply_session(user_id, session_doc, token)
+
+
+def _apply_session(user_id, session_doc, token):
+    apply_id = session_doc['_id']
+    results, practiced_at = session_doc['results'], session_doc['created_at']
+    with _applying(practice_sessions_collection, {'_id': apply_id}, token):
+        # Review state is read-modify-write, so it is applied synchronously
+        _, learned = schedule_reviews(user_id, [
+            (result['flashcard_id'], answer_quality(result['correct'], result.get('quality')), practiced_at)
+            for result in results
+        ], apply_id)
+        write_rollups(user_id, rollup_rows(
+            session_doc['category_id'], session_doc['total_cards'], session_doc['correct_answers'],
+            session_doc['session_duration'], practiced_at
+        ) + learned_rollup_rows(learned), apply_id)
+
+    card_ids = list({ObjectId(result['flashcard_id']) for result in results})
+    _release_guards(user_id, [apply_id], card_ids, {day_key(practiced_at)})
+    # Card counters are coalesced and written behind in bulk (at most once, like
+    # the rest of the buffer), so they are queued only after the session is applied
+    practice_counter_buffer.add_results(user_id, results, practiced_at)
+
+
+def _parse_timestamp(value, now):
+    """ISO 8601 client time as naive UTC, never later than server time"""
+    try:
+        moment = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        raise PracticeValidationError(f'Invalid timestamp: {value}')
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return min(moment, now)
+
+
+def _parse_events(user_id, events, now):
+    if not isinstance(events, list) or not events:
+        raise PracticeValidationError('Events must be a non-empty list')
+    if len(events) > MAX_EVENTS_PER_SYNC:
+        raise PracticeValidationError(f'A sync can contain at most {MAX_EVENTS_PER_SYNC} events')
+
+    parsed = {}
+    for item in events:
+        if not isinstance(item, dict):
+            raise PracticeValidationError('Each event must be an object')
+        event_id = str(item.get('event_id') or '').strip()
+        if not event_id or len(event_id) > MAX_IDEMPOTENCY_KEY_LENGTH:
+            raise PracticeValidationError('Each event needs an event_id')
+        flashcard_id = str(item.get('flashcard_id', ''))
+        if not ObjectId.is_valid(flashcard_id):
+            raise PracticeValidationError(f'Invalid flashcard id: {flashcard_id}')
+        category_id = item.get('category_id')
+        if category_id is not None and not ObjectId.is_valid(str(category_id)):
+            raise PracticeValidationError(f'Invalid category id: {category_id}')
+        session_id = item.get('session_id')
+        if session_id is not None and (not isinstance(session_id, str) or len(session_id) > MAX_IDEMPOTENCY_KEY_LENGTH):
+            raise PracticeValidationError('Session id must be a string')
+
+        correct = bool(item.get('correct'))
+        quality = None
+        if item.get('quality') is not None:
+            try:
+                quality = answer_quality(correct, item['quality'])
+            except (TypeError, ValueError):
+                raise PracticeValidationError('Quality must be a number from 0 to 5')
+
+        # Repeats inside one batch collapse like repeats across batches
+        parsed[event_id] = PracticeEvent(
+            user_id,
+            event_id,
+            flashcard_id,
+            correct,
+            _parse_timestamp(item.get('reviewed_at'), now),
+            quality=quality,
+            category_id=category_id,
+            session_id=session_id
+        ).to_dict()
+    return list(parsed.values())
+
+
+def _claim_events(user_id, event_docs, token, now):
+    """
+    Insert events claimed with `token`, and claim the groups of stored events a
+    failed sync left unapplied
+    A group (events sharing an apply_id) is always re-applied whole, since its
+    card and rollup writes were computed for all of its events.
+    Returns: the events to apply now
+    """
+    for doc in event_docs:
+        doc.update(_claim_fields(token, now), apply_id=token)
+    try:
+        practice_events_collection.insert_many(event_docs, ordered=False)
+        return event_docs
+    except BulkWriteError as e:
+        errors = e.details.get('writeErrors', [])
+        if any(error.get('code') != DUPLICATE_KEY_ERROR for error in errors):
+            raise
+        duplicates = {error['index'] for error in errors}
+
+    inserted = [doc for index, doc in enumerate(event_docs) if index not in duplicates]
+    retried_ids = [event_docs[index]['event_id'] for index in duplicates]
+    groups = practice_events_collection.distinct(
+        'apply_id', {'user_id': user_id, 'event_id': {'$in': retried_ids}, 'applied': False}
+    )
+    if not groups:
+        return inserted
+
+    practice_events_collection.update_many(
+        dict(_unclaimed(now), user_id=user_id, apply_id={'$in': groups}),
+        {'$set': _claim_fields(token, now)}
+    )
+    pending = list(practice_events_collection.find({'user_id': user_id, 'apply_id': {'$in': groups}, 'applied': False}))
+    # Groups partly held by a live request are left to it
+    busy = list({event['apply_id'] for event in pending if event.get('apply_token') != token})
+    if busy:
+        practice_events_collection.update_many(
+            {'user_id': user_id, 'apply_id': {'$in': busy}, 'applied': False, 'apply_token': token},
+            {'$unset': {'apply_token': '', 'apply_lease': ''}}
+        )
+    retried = [event for event in pending if event['apply_id'] not in busy]
+    if retried:
+        print(f"🔁 Re-applying {len(retried)} practice events")
+    return inserted + retried
+
+
+def _event_rollup_rows(events):
+    """Rollup increments per (day, category); each client session counts once"""
+    groups = {}
+    for event in events:
+        key = (day_key(event['reviewed_at']), event['category_id'])
+        group = groups.setdefault(key, {'total': 0, 'correct': 0, 'sessions': set(), 'at': event['reviewed_at']})
+        group['total'] += 1
+        group['correct'] += 1 if event['correct'] else 0
+        group['sessions'].add(event['session_id'])
+
+    rows = []
+    for (_, category_id), group in groups.items():
+        rows += rollup_rows(category_id, group['total'], group['correct'], 0, group['at'], sessions=len(group['sessions']))
+    return rows
+
+
+def _card_state(card):
+    state = {'_id': str(card['_id'])}
+    for field in CARD_STATE_FIELDS:
+        value = card.get(field)
+        state[field] = value.isoformat() if isinstance(value, datetime) else value
+    return state
+
+
+def _apply_event_group(user_id, apply_id, events):
+    """Counters and review state of the user's cards, then the rollups, once per apply_id"""
+    card_ids = list({ObjectId(event['flashcard_id']) for event in events})
+    cards, written = load_card_states(user_id, card_ids, apply_id, CARD_STATE_FIELDS)
+    reviews = [
+        (event['flashcard_id'], answer_quality(event['correct'], event['quality']), event['reviewed_at'])
+        for event in events
+    ]
+    schedules = replay_reviews(cards, reviews)
+
+    counters = {}
+    for event in events:
+        if event['flashcard_id'] not in cards:
+            continue  # already written, or a default-deck card (shared and not counted)
+        counter = counters.setdefault(event['flashcard_id'], {'practiced': 0, 'correct': 0, 'last': event['reviewed_at']})
+        counter['practiced'] += 1
+        counter['correct'] += 1 if event['correct'] else 0
+        counter['last'] = max(counter['last'], event['reviewed_at'])
+
+    operations = [
+        guarded_update(user_id, flashcard_id, {
+            '$inc': {'times_practiced': counter['practiced'], 'times_correct': counter['correct']},
+            '$max': {'last_practiced': counter['last']},
+            '$set': schedules[flashcard_id]
+        }, apply_id)
+        for flashcard_id, counter in counters.items()
+    ]
+    if operations:
+        flashcards_collection.bulk_write(operations, ordered=False)
+
+    learned = newly_learned(cards, schedules) + learned_by(written, reviews)
+    write_rollups(user_id, _event_rollup_rows(events) + learned_rollup_rows(learned), apply_id)
+
+
+def _apply_events(user_id, new_events):
+    """Apply claimed events group by group (a retry can bring several failed groups)"""
+    groups = {}
+    for event in new_events:
+        groups.setdefault(event['apply_id'], []).append(event)
+    for apply_id, events in groups.items():
+        _apply_event_group(user_id, apply_id, events)
+    return list(groups)
+
+
+def sync_events(user_id, events):
+    """
+    Apply a batch of offline answer events exactly once
+    Counters and review scheduling of all touched cards go out in one bulk write.
+    Events are marked applied after it and the rollup write; resending a batch
+    whose apply failed finishes it, skipping the writes that already succeeded.
+    Returns: dict with accepted/duplicate counts and the server state of the touched cards
+    """
+    now = datetime.utcnow()
+    event_docs = _parse_events(user_id, events, now)
+    # Backdated events would change days a running rollup rebuild owns
+    check_backfill_gate(user_id, min(event['reviewed_at'] for event in event_docs))
+    token = ObjectId()
+    new_events = _claim_events(user_id, event_docs, token, now)
+
+    if new_events:
+        claimed = {'user_id': user_id, 'event_id': {'$in': [event['event_id'] for event in new_events]}}
+        with _applying(practice_events_collection, claimed, token):
+            apply_ids = _apply_events(user_id, new_events)
+        _release_guards(
+            user_id, apply_ids,
+            list({ObjectId(event['flashcard_id']) for event in new_events}),
+            {day_key(event['reviewed_at']) for event in new_events}
+        )
+
+    requested = {event['event_id'] for event in event_docs}
+    accepted = sum(1 for event in new_events if event['event_id'] in requested)
+    card_ids = list({ObjectId(event['flashcard_id']) for event in event_docs})
+
+    states = [
+        _card_state(card)
+        for card in flashcards_collection.find(
+            {'_id': {'$in': card_ids}, 'user_id': user_id},
+            {field: 1 for field in CARD_STATE_FIELDS}
+        )
+    ]
+
+    return {
+        'accepted': accepted,
+        'duplicates': len(event_docs) - accepted,
+        'cards': states,
+        'server_time': now.isoformat()
+    }
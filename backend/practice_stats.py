@@ -0,0 +1,352 @@
+"""
+Practice statistics from daily rollups
+Each recorded session bumps one rollup document per user per day (overall)
+and one per user per day per category, so stats never scan raw sessions.
+
+Usage (rebuild rollups of past days from raw sessions, events and cards):
+    python practice_stats.py --backfill
+    python practice_stats.py --backfill --user <user_id>
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+# Add backend directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import (
+    flashcards_collection, practice_events_collection, practice_rollups_collection, practice_sessions_collection
+)
+
+PERIOD_DAYS = {'week': 7, 'month': 30}
+STREAK_LOOKBACK_DAYS = 366
+BACKFILL_BATCH_SIZE = 1000
+OVERALL = None  # category_id of the per-day total rollup
+
+# Backfill gate: one marker document in practice_rollups while a rebuild runs
+BACKFILL_MARKER_ID = 'backfill'
+BACKFILL_MARKER_TTL_SECONDS = 3600  # an older marker is from a crashed run
+BACKFILL_GRACE_SECONDS = float(os.getenv('ROLLUP_BACKFILL_GRACE_SECONDS', 10))
+BACKFILL_RETRY_AFTER_SECONDS = 30
+
+
+class RollupBackfillRunning(Exception):
+    """A rollup rebuild covers days this write would change; retry later"""
+
+
+def day_key(moment):
+    """UTC calendar day used as rollup key"""
+    return moment.strftime('%Y-%m-%d')
+
+
+def rollup_rows(category_id, total_cards, correct_answers, duration, practiced_at, sessions=1, cards_learned=0):
+    """Increments for the overall and per-category rollups of one session (or several)"""
+    increments = {
+        'sessions': sessions,
+        'cards_practiced': total_cards,
+        'correct_answers': correct_answers,
+        'duration_seconds': duration,
+        'cards_learned': cards_learned
+    }
+    day = day_key(practiced_at)
+    scopes = [OVERALL] + ([category_id] if category_id else [])
+    return [((scope, day), increments) for scope in scopes]
+
+
+def learned_rollup_rows(learned):
+    """Increments for cards that became learned; learned: [(category_id, learned_at)]"""
+    groups = {}
+    for category_id, learned_at in learned:
+        group = groups.setdefault((day_key(learned_at), category_id), [0, learned_at])
+        group[0] += 1
+
+    rows = []
+    for (_, category_id), (count, learned_at) in groups.items():
+        rows += rollup_rows(category_id, 0, 0, 0, learned_at, sessions=0, cards_learned=count)
+    return rows
+
+
+def write_rollups(user_id, rows, apply_id):
+    """
+    $inc rollup rows once per apply_id
+    Each rollup document records apply_id along with its increment, so re-running
+    a write that partly failed only adds the documents it missed.
+    """
+    merged = {}
+    for key, increments in rows:
+        total = merged.setdefault(key, {})
+        for field, value in increments.items():
+            total[field] = total.get(field, 0) + value
+    if not merged:
+        return
+
+    now = datetime.utcnow()
+    keys = [{'user_id': user_id, 'category_id': category_id, 'day': day} for category_id, day in merged]
+    # Create missing documents first: a guarded upsert would insert a duplicate
+    practice_rollups_collection.bulk_write(
+        [UpdateOne(key, {'$setOnInsert': {'updated_at': now}}, upsert=True) for key in keys],
+        ordered=False
+    )
+    practice_rollups_collection.bulk_write([
+        UpdateOne(
+            dict(key, apply_ids={'$ne': apply_id}),
+            {'$inc': increments, '$push': {'apply_ids': apply_id}, '$set': {'updated_at': now}}
+        )
+        for key, increments in zip(keys, merged.values())
+    ], ordered=False)
+
+
+def release_rollup_guards(user_id, days, apply_ids):
+    """Drop apply ids of finished applies from their rollup documents"""
+    practice_rollups_collection.update_many(
+        {'user_id': user_id, 'day': {'$in': list(days)}, 'apply_ids': {'$in': apply_ids}},
+        {'$pull': {'apply_ids': {'$in': apply_ids}}}
+    )
+
+
+def _active_backfill():
+    marker = practice_rollups_collection.find_one({'_id': BACKFILL_MARKER_ID})
+    if marker and datetime.utcnow() - marker['started_at'] < timedelta(seconds=BACKFILL_MARKER_TTL_SECONDS):
+        return marker
+    return None
+
+
+def check_backfill_gate(user_id, earliest):
+    """
+    Raise RollupBackfillRunning if a rebuild owns the rollup day of `earliest`
+    Live sessions are always written today, after any running rebuild's cutoff;
+    only backdated writes (offline event sync, a retry re-applying an old
+    session) need this check.
+    """
+    marker = _active_backfill()
+    if marker and marker.get('user_id') in (None, user_id) and day_key(earliest) < marker['cutoff_day']:
+        raise RollupBackfillRunning('Practice statistics are being rebuilt, please sync again shortly')
+
+
+def _accuracy(correct, total):
+    return round(correct / total * 100, 1) if total else 0.0
+
+
+def _streaks(active_days, today):
+    """Current streak (ending today or yesterday) and longest streak in the window"""
+    current = 0
+    cursor = today if day_key(today) in active_days else today - timedelta(days=1)
+    while day_key(cursor) in active_days:
+        current += 1
+        cursor -= timedelta(days=1)
+
+    longest = 0
+    run = 0
+    previous = None
+    for day in sorted(active_days):
+        date = datetime.strptime(day, '%Y-%m-%d')
+        run = run + 1 if previous and date - previous == timedelta(days=1) else 1
+        longest = max(longest, run)
+        previous = date
+
+    return current, longest
+
+
+def get_practice_stats(user_id, period='week', category_id=None, now=None):
+    """
+    Aggregate stats for the last week/month from rollups only
+    Returns: dict with totals, daily series, weekly sessions and streaks
+    """
+    now = now or datetime.utcnow()
+    today = datetime(now.year, now.month, now.day)
+    days = PERIOD_DAYS[period]
+    start = today - timedelta(days=days - 1)
+
+    rollups = practice_rollups_collection.find(
+        {'user_id': user_id, 'category_id': category_id, 'day': {'$gte': day_key(start)}},
+        {'_id': 0, 'day': 1, 'sessions': 1, 'cards_practiced': 1, 'correct_answers': 1, 'duration_seconds': 1,
+         'cards_learned': 1}
+    )
+    by_day = {doc['day']: doc for doc in rollups}
+
+    totals = {'sessions': 0, 'cards_practiced': 0, 'correct_answers': 0, 'duration_seconds': 0, 'cards_learned': 0}
+    daily = []
+    weekly = {}
+    for offset in range(days):
+        date = start + timedelta(days=offset)
+        doc = by_day.get(day_key(date), {})
+        for field in totals:
+            totals[field] += doc.get(field, 0)
+
+        daily.append({
+            'day': day_key(date),
+            'sessions': doc.get('sessions', 0),
+            'cards_practiced': doc.get('cards_practiced', 0),
+            'cards_learned': doc.get('cards_learned', 0),
+            'accuracy': _accuracy(doc.get('correct_answers', 0), doc.get('cards_practiced', 0))
+        })
+
+        iso_year, iso_week, _ = date.isocalendar()
+        week = f'{iso_year}-W{iso_week:02d}'
+        weekly[week] = weekly.get(week, 0) + doc.get('sessions', 0)
+
+    # Streaks always use overall activity, whatever category is selected
+    active_days = {
+        doc['day']
+        for doc in practice_rollups_collection.find(
+            {
+                'user_id': user_id,
+                'category_id': OVERALL,
+                'day': {'$gte': day_key(today - timedelta(days=STREAK_LOOKBACK_DAYS))}
+            },
+            {'_id': 0, 'day': 1}
+        )
+    }
+    current_streak, longest_streak = _streaks(active_days, today)
+
+    return {
+        'period': period,
+        'start': day_key(start),
+        'end': day_key(today),
+        'totals': dict(
+            totals,
+            accuracy=_accuracy(totals['correct_answers'], totals['cards_practiced']),
+            active_days=sum(1 for entry in daily if entry['sessions'])
+        ),
+        'daily': daily,
+        'weekly_sessions': [{'week': week, 'sessions': count} for week, count in weekly.items()],
+        'streak': {'current': current_streak, 'longest': longest_streak}
+    }
+
+
+def _acquire_backfill_marker(user_id, cutoff_day):
+    marker = {
+        '_id': BACKFILL_MARKER_ID,
+        'user_id': user_id,
+        'cutoff_day': cutoff_day,
+        'started_at': datetime.utcnow()
+    }
+    try:
+        practice_rollups_collection.insert_one(marker)
+    except DuplicateKeyError:
+        if _active_backfill():
+            raise RollupBackfillRunning('Another rollup backfill is running')
+        # Left behind by a crashed run
+        practice_rollups_collection.replace_one({'_id': BACKFILL_MARKER_ID}, marker)
+
+
+def _grouped_rows(collection, match, day_field, sums, with_category, finish=dict):
+    """One $group pass: rollup increments per user and day (and category)"""
+    group_key = {'user_id': '$user_id', 'day': {'$dateToString': {'format': '%Y-%m-%d', 'date': f'${day_field}'}}}
+    if with_category:
+        match = dict(match, category_id={'$ne': None})
+        group_key['category_id'] = '$category_id'
+    pipeline = [{'$match': match}, {'$group': dict({'_id': group_key}, **sums)}]
+    for group in collection.aggregate(pipeline, allowDiskUse=True):
+        key = group.pop('_id')
+        yield (key['user_id'], key.get('category_id', OVERALL), key['day']), finish(group)
+
+
+def _event_increments(group):
+    # Each client session counts once per day and category, as in live sync
+    return {
+        'sessions': len(group['session_ids']),
+        'cards_practiced': group['cards_practiced'],
+        'correct_answers': group['correct_answers']
+    }
+
+
+def _write_increments(rows):
+    """$inc-upsert rows in batches; returns number of rows"""
+    written = 0
+    batch = []
+    now = datetime.utcnow()
+    for (user_id, category_id, day), increments in rows:
+        batch.append(UpdateOne(
+            {'user_id': user_id, 'category_id': category_id, 'day': day},
+            {'$inc': increments, '$set': {'updated_at': now}},
+            upsert=True
+        ))
+        if len(batch) >= BACKFILL_BATCH_SIZE:
+            practice_rollups_collection.bulk_write(batch, ordered=False)
+            written += len(batch)
+            batch = []
+    if batch:
+        practice_rollups_collection.bulk_write(batch, ordered=False)
+        written += len(batch)
+    return written
+
+
+def backfill_rollups(user_id=None, now=None):
+    """
+    Rebuild rollups of past days (before today, UTC) from raw sessions, synced
+    events and cards' learned dates, for all users or one user
+    Today's rollups are left to live writes, and rows not yet applied are left
+    to the retry that applies them. A marker document gates the run:
+    it blocks concurrent backfills and backdated event syncs into the rebuilt days.
+    Returns: number of rollup rows written
+    """
+    now = now or datetime.utcnow()
+    cutoff = datetime(now.year, now.month, now.day)
+    _acquire_backfill_marker(user_id, day_key(cutoff))
+    try:
+        # Let syncs that passed the gate before the marker existed finish
+        time.sleep(BACKFILL_GRACE_SECONDS)
+
+        match = {'user_id': user_id} if user_id else {}
+        practice_rollups_collection.delete_many(dict(match, day={'$lt': day_key(cutoff)}))
+
+        session_sums = {
+            'sessions': {'$sum': 1},
+            'cards_practiced': {'$sum': '$total_cards'},
+            'correct_answers': {'$sum': '$correct_answers'},
+            'duration_seconds': {'$sum': '$session_duration'}
+        }
+        event_sums = {
+            'cards_practiced': {'$sum': 1},
+            'correct_answers': {'$sum': {'$cond': ['$correct', 1, 0]}},
+            'session_ids': {'$addToSet': '$session_id'}
+        }
+        learned_sums = {'cards_learned': {'$sum': 1}}
+
+        written = 0
+        for with_category in (False, True):
+            written += _write_increments(_grouped_rows(
+                practice_sessions_collection, dict(match, created_at={'$lt': cutoff}, applied={'$ne': False}),
+                'created_at', session_sums, with_category
+            ))
+            written += _write_increments(_grouped_rows(
+                practice_events_collection, dict(match, reviewed_at={'$lt': cutoff}, applied={'$ne': False}),
+                'reviewed_at', event_sums, with_category, _event_increments
+            ))
+            written += _write_increments(_grouped_rows(
+                flashcards_collection, dict(match, srs_learned_at={'$lt': cutoff}),
+                'srs_learned_at', learned_sums, with_category
+            ))
+        return written
+    finally:
+        practice_rollups_collection.delete_one({'_id': BACKFILL_MARKER_ID})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Practice rollup maintenance")
+    parser.add_argument("--backfill", action="store_true", help="rebuild past days' rollups from raw practice data")
+    parser.add_argument("--user", help="only rebuild rollups of this user id")
+    args = parser.parse_args(argv)
+
+    if not args.backfill:
+        parser.print_help()
+        return 1
+
+    try:
+        print(f"📊 Rebuilding practice rollups{' for user ' + args.user if args.user else ''}...")
+        written = backfill_rollups(args.user)
+        print(f"✅ Wrote {written} rollup documents")
+        return 0
+    except Exception as e:
+        print(f"❌ Backfill error: {e}")
+        return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,309 @@
+"""
+Prompt registry for AI generation
+Named, versioned templates. Every template puts its static text first (system
+prompt, then the fixed instructions) and the per-request values last, so
+repeated calls share a byte-identical prefix that the provider can cache.
+Run as a script to report each template's token footprint:
+    python prompt_registry.py [--model gpt-4o-mini]
+"""
+import argparse
+import os
+
+try:
+    import tiktoken
+except ImportError:  # optional: fall back to a characters-per-token estimate
+    tiktoken = None
+
+CHARS_PER_TOKEN = 4
+DEFAULT_TOKEN_MODEL = 'gpt-4o-mini'
+
+# Values used by the footprint report
+SAMPLE_VALUES = {
+    'text': 'opportunity',
+    'words': '- opportunity\n- to look forward to\n- reliable\n- landscape\n- to give up',
+    'english_level': 'intermediate',
+    'category_context': '',
+}
+
+
+def count_tokens(text, model=DEFAULT_TOKEN_MODEL):
+    """Exact count with tiktoken when installed, otherwise ~4 characters per token"""
+    if tiktoken is None:
+        return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+    try:
+        encoding = tiktoken.encoding_for_model(model)
+    except KeyError:
+        encoding = tiktoken.get_encoding('o200k_base')
+    return len(encoding.encode(text))
+
+
+class PromptTemplate:
+    """
+    One prompt: system message + static instructions + dynamic tail
+    Only `dynamic` is formatted (str.format with the call's values); the static
+    parts are sent verbatim, so they may contain JSON braces.
+    """
+
+    def __init__(self, name, variant, version, system, static, dynamic, temperature, json_mode=False):
+        self.name = name
+        self.variant = variant
+        self.version = version
+        self.system = system
+        self.static = static
+        self.dynamic = dynamic
+        self.temperature = temperature
+        self.json_mode = json_mode
+
+    @property
+    def cache_version(self):
+        """Part of the AI cache key: a changed template never serves old generations"""
+        return f'{self.variant}-v{self.version}'
+
+    def messages(self, **values):
+        return [
+            {"role": "system", "content": self.system},
+            {"role": "user", "content": self.static + self.dynamic.format(**values)}
+        ]
+
+    def token_footprint(self, model=DEFAULT_TOKEN_MODEL, **values):
+        """Tokens of the cacheable prefix and of a full rendered request"""
+        messages = self.messages(**dict(SAMPLE_VALUES, **values))
+        prefix = count_tokens(self.system, model) + count_tokens(self.static, model)
+        total = sum(count_tokens(message['content'], model) for message in messages)
+        return {'prefix_tokens': prefix, 'total_tokens': total}
+
+
+TEACHER_JSON_SYSTEM = "You are an expert English language teacher creating educational flashcards. Always respond with valid JSON only."
+
+FLASHCARD_FIELDS = """  "transcription": "Resources: Oxford Learner's Dictionaries. Must use \\n\\n between each variant. Format for output: UK: [ˌjuːnɪˈvɜːsəti]\\n\\nUS: [ˌjuːnɪˈvɜːrsəti]",
+  "translation": "Several possible Ukrainian translation variants (1-2 or more) for the word/phrase. Output only in the format like: "Виглядати; дивитися; вигляд; зовнішність". No extra text. Only the string.",
+  "short_description": "A very short description (1-2 sentences max, under 100 characters). The description should be concise and clear","""
+
+FLASHCARD_REQUIREMENTS = """Requirements:
+- Ensure all content is in the given English level
+- Don't use conclusion at the end of explanation like "In conclusion" or "Overall, ...", only the main information without unnecessary text
+- The "explanation" property text must be 3-4 paragraphs max
+- If the given English level is A1 - use very simple language for beginners
+"""
+
+COMPLETE_FLASHCARD_FULL = """Create a comprehensive flashcard for the English vocabulary word/phrase given at the end of this message.
+The output must be in the English level given at the end of this message.
+
+Return JSON format:
+{
+  "text": "the word/phrase exactly as given",
+""" + FLASHCARD_FIELDS + """
+  "explanation": "Write a comprehensive, detailed explanation of the word/phrase that includes ALL of the following elements:
+
+1. DETAILED MEANING: Start with a clear, complete definition of the word. Explain what it means in depth, including any nuances or variations
+2. USAGE CONTEXT: Describe when and how this word is typically used in simple words to understand
+3. REAL-WORLD APPLICATION: Describe practical situations where this word is used and explain the meaning (for example you can use synonyms)
+4. SOME INTERESTING FACTS: some facts from life or specific examples
+
+Your explanation must be written in an engaging, educational article style appropriate for learners of the given level (must use \\n\\n between paragraphs). Think of it as a mini-encyclopedia entry that thoroughly covers the topic. Use simple language but provide comprehensive information.
+
+Example structure for "opportunity":
+An opportunity is a chance to do something that can be good for you. It is like a special moment when you can try something new or improve your life. When you have an opportunity, it means the right time has come to do something important.
+
+Opportunities can happen in many parts of your life. At work, you might get an opportunity to get a better job or learn new skills. At school, you might have an opportunity to join a club or study in another country. In your personal life, you might get an opportunity to meet new friends or visit new places. Some opportunities come and go quickly, so you need to act fast. Other opportunities stay for a longer time. The important thing is to notice them and decide if you want to try.
+
+The word 'opportunity' is very common in English. People use it when they talk about jobs, education, and life in general. For example, your teacher might say 'This is a good opportunity to practice English.' Here, opportunity means a special chance or the right moment to improve your English skills by practicing. Your boss might say 'We have an opportunity to work with a new company.' It means we can start working together with another company. In real life, opportunities are everywhere. When you meet new people, that's an opportunity to make friends. When you see a job advertisement, that's an opportunity to get work. The word 'opportunity' is a noun. You can also use the word 'chance' which means almost the same thing.",
+  "examples": ["Example sentence 1 using the word", "Example sentence 2 showing different context", "Example sentence 3 with another usage"],
+  "notes": ""
+}
+
+""" + FLASHCARD_REQUIREMENTS
+
+# Same fields and rules without the worked "opportunity" article
+COMPLETE_FLASHCARD_SLIM = """Create a comprehensive flashcard for the English vocabulary word/phrase given at the end of this message.
+The output must be in the English level given at the end of this message.
+
+Return JSON format:
+{
+  "text": "the word/phrase exactly as given",
+""" + FLASHCARD_FIELDS + """
+  "explanation": "An engaging, educational mini-encyclopedia article covering: the detailed meaning with its nuances; when and how the word is used; real-world situations where it is used (synonyms welcome); some interesting facts. Simple language for the given level. Must use \\n\\n between paragraphs.",
+  "examples": ["Example sentence 1 using the word", "Example sentence 2 showing different context", "Example sentence 3 with another usage"],
+  "notes": ""
+}
+
+""" + FLASHCARD_REQUIREMENTS
+
+COMPLETE_FLASHCARD_BATCH = """Create a comprehensive flashcard for each of the English vocabulary words/phrases listed at the end of this message.
+The output must be in the English level given at the end of this message.
+
+Return JSON format:
+{
+  "flashcards": [
+    {
+      "text": "the word/phrase exactly as given",
+""" + "\n".join("    " + line for line in FLASHCARD_FIELDS.split("\n")) + """
+      "explanation": "A detailed explanation in an engaging, educational article style: the meaning with its nuances, when and how the word is used, real-world situations where it is used (synonyms welcome) and some interesting facts. Must use \\n\\n between paragraphs.",
+      "examples": ["Example sentence 1 using the word", "Example sentence 2 showing different context", "Example sentence 3 with another usage"],
+      "notes": ""
+    }
+  ]
+}
+
+""" + FLASHCARD_REQUIREMENTS + """- One flashcard per word/phrase, in the given order
+"""
+
+EXERCISE_EXPLANATION = """Task: Create an detailed explanation/description for the word/phrase given at the end of this message.
+
+Rules:
+- Write 1-2 sentences max.
+- Do NOT use the target word itself but you can use synonyms.
+- OPTIONALLY start with a categorization like "It's a thing that...", "It's a feeling when...", "It's a verb that means...", "It's a noun for..." etc.
+- Do NOT add extra phrases like "Here is an explanation" or "Certainly".
+- The explanation should be in the given English level.
+- If the given English level is A1 - use very simple language for beginners and explain in simple words
+- Output must be only the explanation sentence.
+
+✅ Correct example for word "happiness": "It's a feeling when you are very pleased and satisfied with something good that happens to you."
+✅ Correct example for word "bicycle": "A two-wheeled vehicle that you move forward by pedaling with your feet. It usually has handlebars to steer, a seat to sit on, and is powered only by the rider."
+❌ Incorrect example for word "bicycle": "A bicycle is a bike people ride." (uses the word and direct synonym)
+❌ Incorrect example for word "Indubitably": "Certainly! Here is a clear and concise explanation for the word 'Indubitably' at A1 level: 'Used to say something is true without any doubt.'" (extra phrases, not 1 sentence)
+"""
+
+TRANSLATE_SENTENCE = """Translate the English sentence given at the end of this message to Ukrainian. Make the translation natural, accurate and appropriate for language learning context.
+
+Requirements:
+- Provide a clear, natural Ukrainian translation
+- Use proper grammar and word order
+- Make it sound natural for native Ukrainian speakers
+- Keep the meaning accurate but not word-for-word literal
+- Consider the context of language learning exercises
+- Output ONLY the Ukrainian translation, no additional text
+
+Example:
+English: "I go to work every day."
+Ukrainian: "Я йду на роботу щодня."
+"""
+
+_TEMPLATES = [
+    PromptTemplate(
+        'complete_flashcard', 'full', 2, TEACHER_JSON_SYSTEM, COMPLETE_FLASHCARD_FULL,
+        '\nEnglish level: {english_level}\n{category_context}\nCreate complete flashcard for: "{text}"\n',
+        temperature=0.7, json_mode=True
+    ),
+    PromptTemplate(
+        'complete_flashcard', 'slim', 1, TEACHER_JSON_SYSTEM, COMPLETE_FLASHCARD_SLIM,
+        '\nEnglish level: {english_level}\n{category_context}\nCreate complete flashcard for: "{text}"\n',
+        temperature=0.7, json_mode=True
+    ),
+    PromptTemplate(
+        'complete_flashcard_batch', 'default', 2, TEACHER_JSON_SYSTEM, COMPLETE_FLASHCARD_BATCH,
+        '\nEnglish level: {english_level}\n{category_context}\nWords/phrases:\n{words}\n',
+        temperature=0.7, json_mode=True
+    ),
+    PromptTemplate(
+        'definition', 'default', 2,
+        "You are an expert English language teacher. Provide clear, educational explanations.",
+        "A detailed definition/explanation of meaning and usage (can be longer and more comprehensive) for the word/phrase "
+        "given at the end of this message, in the English level given there. Format example for output: A valley is a long, "
+        "low area of land between hills or mountains. It is often formed by rivers or glaciers and can be wide or narrow. "
+        "Valleys are places where people can live, grow crops, or travel through because they are lower and sometimes "
+        "flatter than the surrounding land.\n",
+        '\nEnglish level: {english_level}\n{category_context}\nWord/phrase: {text}',
+        temperature=0.7
+    ),
+    PromptTemplate(
+        'examples', 'default', 2,
+        "You are an expert English language teacher. Always respond with valid JSON array only.",
+        "Create 3 different example sentences using the word/phrase given at the end of this message, in the English level "
+        "given there. Each sentence should show different contexts or meanings. Return as a JSON array of strings.\n",
+        '\nEnglish level: {english_level}\n{category_context}\nWord/phrase: "{text}"',
+        temperature=0.8, json_mode=True
+    ),
+    PromptTemplate(
+        'regenerate_examples', 'default', 2,
+        "You are an expert English language teacher creating varied examples. Always respond with valid JSON array only.",
+        "Create 3 NEW and DIFFERENT example sentences using the word/phrase given at the end of this message, in the English "
+        "level given there.\nEach sentence should show different contexts or meanings than previous examples.\n"
+        "Make them creative and varied.\nReturn as a JSON array of strings.\n",
+        '\nEnglish level: {english_level}\n{category_context}\nWord/phrase: "{text}"',
+        temperature=0.9, json_mode=True
+    ),
+    PromptTemplate(
+        'exercise_explanation', 'default', 2,
+        "You are an expert English language teacher creating vocabulary exercises.",
+        EXERCISE_EXPLANATION,
+        '\nEnglish level: {english_level}\n{category_context}\nWord/phrase: "{text}"',
+        temperature=0.7
+    ),
+    PromptTemplate(
+        'translate', 'default', 2,
+        "You are a professional English-Ukrainian translator. Provide only the translation string, no extra text.",
+        'Translate to Ukrainian. Provide several translation variants for the word/phrase given at the end of this message. '
+        'Output only in this format: "Виглядати; дивитися; вигляд; зовнішність". No extra text. Only the string.\n',
+        '\nWord/phrase: "{text}"',
+        temperature=0.3
+    ),
+    PromptTemplate(
+        'translate_sentence', 'default', 2,
+        "You are a professional English-Ukrainian translator. Provide only the translation, no extra text.",
+        TRANSLATE_SENTENCE,
+        '\nTranslate: "{text}"',
+        temperature=0.3
+    ),
+]
+
+TEMPLATES = {(template.name, template.variant): template for template in _TEMPLATES}
+
+
+def _parse_variants(value):
+    """'complete_flashcard=slim' -> {'complete_flashcard': 'slim'}"""
+    variants = {}
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        name, _, variant = item.partition('=')
+        variants[name.strip()] = variant.strip()
+    return variants
+
+
+# Variant served per prompt (A/B and benchmarking); everything else uses its default
+DEFAULT_VARIANTS = {'complete_flashcard': 'full'}
+
+
+def _active_variants(value):
+    """Configured variants; unknown names fall back to the default with a warning"""
+    variants = dict(DEFAULT_VARIANTS)
+    for name, variant in _parse_variants(value).items():
+        if (name, variant) in TEMPLATES:
+            variants[name] = variant
+        else:
+            print(f"⚠️ Unknown prompt variant '{name}={variant}' in AI_PROMPT_VARIANTS, using the default")
+    return variants
+
+
+ACTIVE_VARIANTS = _active_variants(os.getenv('AI_PROMPT_VARIANTS', ''))
+
+
+def get_prompt(name, variant=None):
+    """Active (or explicitly chosen) template for an AI operation"""
+    return TEMPLATES[(name, variant or ACTIVE_VARIANTS.get(name, 'default'))]
+
+
+def footprint_report(model=DEFAULT_TOKEN_MODEL):
+    return [
+        dict(template.token_footprint(model), name=template.name, variant=template.variant, version=template.version)
+        for template in _TEMPLATES
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Token footprint of every registered prompt template')
+    parser.add_argument('--model', default=DEFAULT_TOKEN_MODEL, help='Tokenizer model (needs tiktoken)')
+    args = parser.parse_args()
+
+    method = 'tiktoken' if tiktoken is not None else f'estimate: {CHARS_PER_TOKEN} chars/token'
+    print(f"🧮 Prompt token footprint ({method}, sample word '{SAMPLE_VALUES['text']}')")
+    print(f"{'template':<34}{'version':>8}{'prefix':>10}{'total':>10}")
+    for row in footprint_report(args.model):
+        active = '*' if get_prompt(row['name']).variant == row['variant'] else ' '
+        label = f"{active}{row['name']}/{row['variant']}"
+        print(f"{label:<34}{row['version']:>8}{row['prefix_tokens']:>10}{row['total_tokens']:>10}")
+    print("* active variant; prefix = system + static instructions (identical across calls)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,226 @@
+"""
+Exercise question banks
+Precomputed questions per category and English level: one document per card,
+keyed by a hash of the card's content, holding distractor candidates and an AI
+hint. Editing a card only invalidates that card's document. Distractors depend
+on the rest of the deck, so they are stamped with the category's content_version
+and recomputed (without AI calls) after any card change; hints are kept.
+"""
+import hashlib
+import os
+import queue
+import sys
+import threading
+import traceback
+from datetime import datetime
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+# Add backend directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import database
+from database import categories_collection, flashcards_collection, question_banks_collection
+from ai_service import generate_exercise_explanation
+from ai_limiter import BACKGROUND, priority
+from ai_usage import ai_route, ai_user
+from deletion_worker import NOT_DELETED
+from metrics import metrics
+from similarity_index import similarity_indexes
+from text_utils import normalize_text
+
+DISTRACTOR_CANDIDATES = 6  # wrong answers are sampled from this many nearest cards
+# AI hints per build run; a deck with more missing hints is requeued and continues
+MAX_AI_HINTS_PER_BUILD = int(os.getenv('QUESTION_BANK_MAX_AI_HINTS', 200))
+WRITE_BATCH_SIZE = 100
+AI_HINTS_ENABLED = bool(os.getenv('OPENAI_API_KEY'))
+
+
+def content_version(category):
+    return category.get('content_version', 0)
+
+
+def bump_content_version(category_id):
+    """Mark the category's cards as changed; stored distractors get recomputed, hints are kept"""
+    categories_collection.update_one({'_id': ObjectId(category_id)}, {'$inc': {'content_version': 1}})
+
+
+def card_hash(card):
+    """Key of a card's question: changes when the card is edited, not when other cards are"""
+    word_key = card.get('word_key') or normalize_text(card['word'])
+    content = f"{word_key}\x1f{normalize_text(card.get('translation'))}"
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+
+def load_questions(category, english_level, cards):
+    """
+    Stored questions of the given cards
+    Returns: {card_id: {'hint', 'distractors'}}; distractors are None when they
+    predate the category's last change. Cards without a document are missing.
+    """
+    card_ids = {card_hash(card): str(card['_id']) for card in cards}
+    stored = question_banks_collection.find(
+        {
+            'category_id': str(category['_id']),
+            'english_level': english_level,
+            'content_hash': {'$in': list(card_ids)}
+        },
+        {'_id': 0, 'content_hash': 1, 'content_version': 1, 'hint': 1, 'distractors': 1}
+    )
+    version = content_version(category)
+    questions = {
+        card_ids[doc['content_hash']]: {
+            'hint': doc.get('hint'),
+            'distractors': doc.get('distractors') if doc.get('content_version') == version else None
+        }
+        for doc in stored
+    }
+    fresh = sum(1 for question in questions.values() if question['distractors'] is not None)
+    metrics.inc('question_bank_hits', fresh)
+    metrics.inc('question_bank_misses', len(card_ids) - fresh)
+    return questions
+
+
+def build_bank(category, english_level):
+    """
+    Bring the category's question documents up to date
+    Only new or edited cards get an AI hint (unchanged words keep theirs), and at
+    most MAX_AI_HINTS_PER_BUILD per run; documents of removed cards are deleted.
+    Returns: (documents written, cards still waiting for a hint attempt)
+    """
+    category_id = str(category['_id'])
+    version = content_version(category)
+    bank_filter = {'category_id': category_id, 'english_level': english_level}
+    stored = {
+        doc['content_hash']: doc
+        for doc in question_banks_collection.find(
+            bank_filter, {'content_hash': 1, 'content_version': 1, 'word_key': 1, 'hint': 1}
+        )
+    }
+    hints = {doc['word_key']: doc['hint'] for doc in stored.values() if doc.get('hint')}
+    ai_budget = MAX_AI_HINTS_PER_BUILD if AI_HINTS_ENABLED else 0
+
+    hashes = set()
+    operations = []
+    written = waiting = 0
+    cards = flashcards_collection.find(
+        {'category_id': category_id},
+        {'word': 1, 'word_key': 1, 'translation': 1, 'category_id': 1}
+    )
+    for card in cards:
+        content = card_hash(card)
+        hashes.add(content)
+        doc = stored.get(content)
+        if doc is not None and doc.get('content_version') == version:
+            continue  # up to date; a failed hint is retried after the next change
+
+        word_key = card.get('word_key') or normalize_text(card['word'])
+        hint = hints.get(word_key)
+        if hint is None and AI_HINTS_ENABLED:
+            if ai_budget <= 0:
+                waiting += 1
+                continue
+            ai_budget -= 1
+            result = generate_exercise_explanation(card['word'], english_level)
+            if result['success']:
+                hint = hints[word_key] = result['data']
+
+        operations.append(UpdateOne(
+            dict(bank_filter, content_hash=content),
+            {
+                '$set': {
+                    'user_id': category.get('user_id'),
+                    'word_key': word_key,
+                    'content_version': version,
+                    'distractors': similarity_indexes.distractors(category, card, DISTRACTOR_CANDIDATES),
+                    'hint': hint,
+                    'updated_at': datetime.utcnow()
+                }
+            },
+            upsert=True
+        ))
+        # Written as we go, so hints already paid for survive a failed run
+        if len(operations) >= WRITE_BATCH_SIZE:
+            question_banks_collection.bulk_write(operations, ordered=False)
+            written += len(operations)
+            operations = []
+
+    if operations:
+        question_banks_collection.bulk_write(operations, ordered=False)
+        written += len(operations)
+
+    removed = [content for content in stored if content not in hashes]
+    if removed:
+        question_banks_collection.delete_many(dict(bank_filter, content_hash={'$in': removed}))
+    metrics.inc('question_bank_cards_built', written)
+    return written, waiting
+
+
+class QuestionBankBuilder(threading.Thread):
+    """Background thread that builds requested banks one at a time"""
+
+    def __init__(self):
+        super().__init__(name='question-bank-builder', daemon=True)
+        self._queue = queue.Queue()
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+    def request(self, category_id, english_level):
+        """Queue a build unless one for the same bank is already waiting"""
+        key = (str(category_id), english_level)
+        with self._lock:
+            if key in self._pending:
+                return
+            self._pending.add(key)
+        self._queue.put(key)
+        metrics.set_gauge('question_bank_queue_depth', self._queue.qsize())
+
+    def stop(self):
+        self._stop_event.set()
+        self._queue.put(None)
+
+    def _build(self, category_id, english_level):
+        category = categories_collection.find_one({'_id': ObjectId(category_id), 'is_deleted': NOT_DELETED})
+        if not category:
+            return
+        # Hints are generated on behalf of the category owner
+        ai_user.set(category.get('user_id'))
+        ai_route.set('question_bank')
+        with metrics.timer('question_bank_build_seconds'):
+            written, waiting = build_bank(category, english_level)
+        print(f"✅ Question bank updated for category {category_id} ({english_level}, {written} cards)")
+        if waiting:
+            # Rest of a large deck, after the builds queued meanwhile
+            print(f"⏳ {waiting} cards of category {category_id} still need a hint, requeued")
+            self.request(category_id, english_level)
+
+    def run(self):
+        print("🎯 Question bank builder started")
+        while not self._stop_event.is_set():
+            key = self._queue.get()
+            if key is None:
+                continue
+            with self._lock:
+                self._pending.discard(key)
+            metrics.set_gauge('question_bank_queue_depth', self._queue.qsize())
+            try:
+                with priority(BACKGROUND):
+                    self._build(*key)
+            except Exception as e:
+                metrics.inc('question_bank_build_errors')
+                print(f"❌ Question bank build error: {e}")
+                print(traceback.format_exc())
+
+
+question_bank_builder = QuestionBankBuilder()
+
+
+def start_question_bank_builder():
+    """Start the background builder once (no-op without database)"""
+    if database.db is None:
+        print("✗ Question bank builder not started: no database connection")
+        return
+    if not question_bank_builder.is_alive():
+        question_bank_builder.start()
@@ -0,0 +1,197 @@
+"""
+Flashcard search
+Full-text queries go to the Mongo text index; typo-tolerant matches come from
+an in-process trigram index kept per user and updated as cards change.
+"""
+import heapq
+import os
+import sys
+import threading
+from collections import Counter
+
+# Add backend directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import flashcards_collection
+from index_registry import IndexRegistry
+from srs import active_cards_query
+from text_utils import normalize_text, tokenize, trigrams
+
+FIELD_WEIGHTS = {'word': 3.0, 'translation': 2.0, 'short_description': 1.0}
+MIN_SIMILARITY = 0.35
+PREFIX_SIMILARITY = 0.9
+EXACT_WORD_BONUS = 1.0
+MAX_CACHED_USERS = int(os.getenv('SEARCH_MAX_CACHED_USERS', 200))
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+SEARCH_MODES = ('auto', 'fuzzy', 'text')
+
+SUMMARY_PROJECTION = {'category_id': 1, 'word': 1, 'translation': 1, 'short_description': 1}
+
+
+def _summary(card):
+    return {
+        '_id': str(card['_id']),
+        'category_id': card['category_id'],
+        'word': card['word'],
+        'translation': card.get('translation', ''),
+        'short_description': card.get('short_description', '')
+    }
+
+
+class UserTrigramIndex:
+    """Token-level trigram index over one user's cards"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.cards = {}           # card_id -> summary
+        self._card_tokens = {}    # card_id -> set of tokens
+        self._token_cards = {}    # token -> {card_id: (weight, field)}
+        self._trigram_tokens = {} # trigram -> set of tokens
+        self._token_size = {}     # token -> number of trigrams
+
+    def __len__(self):
+        return len(self.cards)
+
+    def add(self, card):
+        summary = _summary(card)
+        card_id = summary['_id']
+
+        with self._lock:
+            self._remove_locked(card_id)
+            self.cards[card_id] = summary
+            tokens = set()
+
+            for field, weight in FIELD_WEIGHTS.items():
+                for token in tokenize(summary.get(field)):
+                    tokens.add(token)
+                    postings = self._token_cards.get(token)
+                    if postings is None:
+                        postings = self._token_cards[token] = {}
+                        token_trigrams = trigrams(token)
+                        self._token_size[token] = len(token_trigrams)
+                        for trigram in token_trigrams:
+                            self._trigram_tokens.setdefault(trigram, set()).add(token)
+                    if weight > postings.get(card_id, (0, None))[0]:
+                        postings[card_id] = (weight, field)
+
+            self._card_tokens[card_id] = tokens
+
+    def remove(self, card_id):
+        with self._lock:
+            self._remove_locked(card_id)
+
+    def _remove_locked(self, card_id):
+        self.cards.pop(card_id, None)
+        for token in self._card_tokens.pop(card_id, ()):
+            postings = self._token_cards.get(token)
+            if postings is None:
+                continue
+            postings.pop(card_id, None)
+            if not postings:
+                del self._token_cards[token]
+                del self._token_size[token]
+                for trigram in trigrams(token):
+                    bucket = self._trigram_tokens.get(trigram)
+                    if bucket is not None:
+                        bucket.discard(token)
+                        if not bucket:
+                            del self._trigram_tokens[trigram]
+
+    def search(self, query, limit=DEFAULT_LIMIT, category_id=None):
+        """
+        Rank cards by trigram similarity of their tokens to the query tokens
+        Returns: list of summaries with score and matched fields
+        """
+        query_tokens = tokenize(query)
+        if not query_tokens:
+            return []
+
+        scores = Counter()
+        matched = {}
+
+        with self._lock:
+            for query_token in query_tokens:
+                query_trigrams = trigrams(query_token)
+                overlap = Counter()
+                for trigram in query_trigrams:
+                    for token in self._trigram_tokens.get(trigram, ()):
+                        overlap[token] += 1
+
+                best = {}  # card_id -> (score, field)
+                for token, common in overlap.items():
+                    if token == query_token:
+                        similarity = 1.0
+                    else:
+                        similarity = 2.0 * common / (len(query_trigrams) + self._token_size[token])
+                        if token.startswith(query_token):
+                            similarity = max(similarity, PREFIX_SIMILARITY)
+                    if similarity < MIN_SIMILARITY:
+                        continue
+
+                    for card_id, (weight, field) in self._token_cards[token].items():
+                        score = similarity * weight
+                        if score > best.get(card_id, (0.0, None))[0]:
+                            best[card_id] = (score, field)
+
+                for card_id, (score, field) in best.items():
+                    scores[card_id] += score
+                    matched.setdefault(card_id, set()).add(field)
+
+            normalized_query = normalize_text(query)
+            ranked = []
+            for card_id, score in scores.items():
+                card = self.cards[card_id]
+                if category_id and card['category_id'] != category_id:
+                    continue
+                score = score / len(query_tokens)
+                if normalize_text(card['word']) == normalized_query:
+                    score += EXACT_WORD_BONUS
+                ranked.append((score, card_id))
+
+            top = heapq.nlargest(limit, ranked)
+            return [
+                dict(self.cards[card_id], score=round(score, 4), matched=sorted(matched[card_id]))
+                for score, card_id in top
+            ]
+
+
+# LRU of per-user trigram indexes, built lazily on first search
+search_indexes = IndexRegistry('search', SUMMARY_PROJECTION, lambda default: UserTrigramIndex(), MAX_CACHED_USERS)
+
+
+def text_search(user_id, query, limit=DEFAULT_LIMIT, category_id=None):
+    """Full-text search through the Mongo text index (covers explanations too)"""
+    mongo_query = dict(active_cards_query(user_id, category_id), **{'$text': {'$search': query}})
+
+    projection = dict(SUMMARY_PROJECTION, score={'$meta': 'textScore'})
+    cursor = flashcards_collection.find(mongo_query, projection) \
+        .sort([('score', {'$meta': 'textScore'})]) \
+        .limit(limit)
+
+    return [
+        dict(_summary(card), score=round(card.get('score', 0), 4), matched=['text'])
+        for card in cursor
+    ]
+
+
+def search_flashcards(user_id, query, limit=DEFAULT_LIMIT, mode='auto', category_id=None):
+    """
+    Search user's flashcards
+    mode: 'fuzzy' - trigram index only, 'text' - Mongo text index only,
+          'auto' - trigram index, topped up with full-text matches
+    """
+    limit = max(1, min(int(limit), MAX_LIMIT))
+
+    if mode == 'text':
+        return text_search(user_id, query, limit, category_id)
+
+    results = search_indexes.get(user_id).search(query, limit, category_id)
+
+    if mode == 'auto' and len(results) < limit:
+        seen = {card['_id'] for card in results}
+        for card in text_search(user_id, query, limit, category_id):
+            if card['_id'] not in seen and len(results) < limit:
+                results.append(card)
+
+    return results
@@ -1,23 +1,37 @@
 """
-Seed script for creating default categories and flashcards
-Run this script once to populate the database with default data
+Seed script for default categories and flashcards
+
+Idempotent and non-interactive: every default category and flashcard has a
+stable seed key, entries are upserted with bulk_write and only documents whose
+content changed are touched, so existing _ids (and user references) survive.
+Safe to run on every deploy.
 
 Usage:
-    python seed_default_data.py
+    python seed_default_data.py            # apply changes
+    python seed_default_data.py --check    # dry run, exit code 1 if changes are pending
+    python seed_default_data.py --prune    # also remove defaults no longer in the manifest
 """
+import argparse
+import hashlib
+import json
 import sys
 import os
 
 # Add backend directory to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from pymongo import UpdateOne
 from database import categories_collection, flashcards_collection
 from models import Category, Flashcard
-from datetime import datetime
+from text_utils import normalize_text
+
+# Bump when the manifest below changes in a way worth recording
+DECK_VERSION = 2
 
 # Default categories with flashcards
 DEFAULT_DATA = [
     {
+        "key": "basic-verbs",
         "name": "Basic Verbs",
         "description": "Essential English verbs for everyday communication",
         "color": "#3B82F6",
@@ -35,6 +49,7 @@ DEFAULT_DATA = [
         ]
     },
     {
+        "key": "common-adjectives",
         "name": "Common Adjectives",
         "description": "Most frequently used adjectives in English",
         "color": "#8B5CF6",
@@ -52,6 +67,7 @@ DEFAULT_DATA = [
         ]
     },
     {
+        "key": "daily-routines",
         "name": "Daily Routines",
         "description": "Words and phrases for describing your daily activities",
         "color": "#10B981",
@@ -69,6 +85,7 @@ DEFAULT_DATA = [
         ]
     },
     {
+        "key": "food-and-drinks",
         "name": "Food & Drinks",
         "description": "Essential vocabulary for food and beverages",
         "color": "#F59E0B",
@@ -86,6 +103,7 @@ DEFAULT_DATA = [
         ]
     },
     {
+        "key": "family-members",
         "name": "Family Members",
         "description": "Words for talking about your family",
         "color": "#EC4899",
@@ -103,6 +121,7 @@ DEFAULT_DATA = [
         ]
     },
     {
+        "key": "weather",
         "name": "Weather",
         "description": "Vocabulary for describing weather conditions",
         "color": "#06B6D4",
@@ -120,6 +139,7 @@ DEFAULT_DATA = [
         ]
     },
     {
+        "key": "colors",
         "name": "Colors",
         "description": "Basic colors in English",
         "color": "#EF4444",
@@ -137,6 +157,7 @@ DEFAULT_DATA = [
         ]
     },
     {
+        "key": "numbers",
         "name": "Numbers",
         "description": "Numbers from one to ten",
         "color": "#6366F1",
@@ -154,6 +175,7 @@ DEFAULT_DATA = [
         ]
     },
     {
+        "key": "time",
         "name": "Time",
         "description": "Words related to time and periods",
         "color": "#14B8A6",
@@ -171,6 +193,7 @@ DEFAULT_DATA = [
         ]
     },
     {
+        "key": "transport",
         "name": "Transport",
         "description": "Different types of transportation",
         "color": "#F97316",
@@ -189,75 +212,236 @@ DEFAULT_DATA = [
     },
 ]
 
+SEED_USER_ID = "system"  # System user for default categories
 
-def seed_default_data():
-    """Seed database with default categories and flashcards"""
-    try:
-        print("🌱 Starting to seed default data...")
-        
-        # Check if default data already exists
-        existing_count = categories_collection.count_documents({"is_default": True})
-        if existing_count > 0:
-            print(f"⚠️  Found {existing_count} existing default categories")
-            response = input("Do you want to delete them and recreate? (yes/no): ")
-            if response.lower() != 'yes':
-                print("❌ Seeding cancelled")
-                return
-            
-            # Delete existing default data
-            print("🗑️  Deleting existing default data...")
-            flashcards_collection.delete_many({"is_default": True})
-            categories_collection.delete_many({"is_default": True})
-            print("✓ Existing default data deleted")
-        
-        # Insert new default data
-        total_categories = 0
-        total_flashcards = 0
-        
-        for category_data in DEFAULT_DATA:
-            # Create category
-            category = Category(
-                user_id="system",  # System user for default categories
-                name=category_data["name"],
-                description=category_data["description"],
-                color=category_data["color"]
+
+def category_seed_key(category_data):
+    """Stable key of a default category (survives renames)"""
+    return f"category:{category_data['key']}"
+
+
+def flashcard_seed_key(category_data, word):
+    """Stable key of a default flashcard inside its category"""
+    return f"flashcard:{category_data['key']}:{word.strip().lower()}"
+
+
+def content_hash(fields):
+    """Hash of seeded fields, used to skip entries that did not change"""
+    payload = json.dumps(fields, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def _category_fields(category_data):
+    return {
+        "name": category_data["name"],
+        "description": category_data["description"],
+        "color": category_data["color"],
+    }
+
+
+def _flashcard_fields(flashcard_data):
+    return {
+        "word": flashcard_data["word"],
+        "translation": flashcard_data["translation"],
+        "example": flashcard_data.get("example", ""),
+        "explanation": flashcard_data.get("explanation", ""),
+        "difficulty": flashcard_data.get("difficulty", "medium"),
+    }
+
+
+def _upsert_operation(filter_doc, fields, seed_key, base_doc, extra_fields=None):
+    """Build UpdateOne that sets seeded fields and creates the rest only on insert"""
+    set_fields = dict(fields)
+    set_fields.update(extra_fields or {})
+    set_fields.update({
+        "seed_key": seed_key,
+        "seed_hash": content_hash(fields),
+        "seed_version": DECK_VERSION,
+        "is_default": True,
+    })
+    set_on_insert = {key: value for key, value in base_doc.items() if key not in set_fields}
+    set_on_insert.pop("updated_at", None)
+    set_fields["updated_at"] = base_doc["updated_at"]
+
+    return UpdateOne(filter_doc, {"$set": set_fields, "$setOnInsert": set_on_insert}, upsert=True)
+
+
+def plan_categories():
+    """
+    Compare manifest categories with the database
+    Returns: dict with operations, counters and stale ids
+    """
+    by_key = {}
+    legacy_by_name = {}
+    for doc in categories_collection.find({"is_default": True}, {"seed_key": 1, "seed_hash": 1, "name": 1}):
+        if doc.get("seed_key"):
+            by_key[doc["seed_key"]] = doc
+        else:
+            # Seeded by the old delete-and-recreate script: adopt by name to keep the _id
+            legacy_by_name[doc["name"]] = doc
+
+    plan = {"operations": [], "inserted": 0, "updated": 0, "adopted": 0, "unchanged": 0, "ids": {}}
+
+    for category_data in DEFAULT_DATA:
+        seed_key = category_seed_key(category_data)
+        fields = _category_fields(category_data)
+        base_doc = Category(SEED_USER_ID, **fields).to_dict()
+        keys = {"name_key": normalize_text(fields["name"])}
+        existing = by_key.pop(seed_key, None)
+
+        if existing:
+            plan["ids"][seed_key] = str(existing["_id"])
+            if existing.get("seed_hash") == content_hash(fields):
+                plan["unchanged"] += 1
+                continue
+            plan["updated"] += 1
+            plan["operations"].append(_upsert_operation({"_id": existing["_id"]}, fields, seed_key, base_doc, keys))
+        elif category_data["name"] in legacy_by_name:
+            legacy = legacy_by_name.pop(category_data["name"])
+            plan["ids"][seed_key] = str(legacy["_id"])
+            plan["adopted"] += 1
+            plan["operations"].append(_upsert_operation({"_id": legacy["_id"]}, fields, seed_key, base_doc, keys))
+        else:
+            plan["inserted"] += 1
+            plan["operations"].append(_upsert_operation({"seed_key": seed_key}, fields, seed_key, base_doc, keys))
+
+    plan["stale_ids"] = [doc["_id"] for doc in by_key.values()] + [doc["_id"] for doc in legacy_by_name.values()]
+    return plan
+
+
+def plan_flashcards(category_ids):
+    """
+    Compare manifest flashcards with the database
+    category_ids: {category seed_key: category _id as string} for existing categories
+    """
+    by_key = {}
+    legacy_by_word = {}
+    projection = {"seed_key": 1, "seed_hash": 1, "category_id": 1, "word": 1}
+    for doc in flashcards_collection.find({"is_default": True}, projection):
+        if doc.get("seed_key"):
+            by_key[doc["seed_key"]] = doc
+        else:
+            legacy_by_word[(doc.get("category_id"), doc.get("word"))] = doc
+
+    plan = {"operations": [], "inserted": 0, "updated": 0, "adopted": 0, "unchanged": 0}
+
+    for category_data in DEFAULT_DATA:
+        category_id = category_ids.get(category_seed_key(category_data))
+
+        for flashcard_data in category_data["flashcards"]:
+            seed_key = flashcard_seed_key(category_data, flashcard_data["word"])
+            fields = _flashcard_fields(flashcard_data)
+            existing = by_key.pop(seed_key, None)
+            legacy = legacy_by_word.pop((category_id, fields["word"]), None) if not existing else None
+
+            if existing and existing.get("seed_hash") == content_hash(fields):
+                plan["unchanged"] += 1
+                continue
+
+            if existing:
+                plan["updated"] += 1
+            elif legacy:
+                plan["adopted"] += 1
+            else:
+                plan["inserted"] += 1
+
+            # Category does not exist yet (dry run only): nothing to build against
+            if category_id is None:
+                continue
+
+            base_doc = Flashcard(SEED_USER_ID, category_id, **fields).to_dict()
+            target = existing or legacy
+            filter_doc = {"_id": target["_id"]} if target else {"seed_key": seed_key}
+            plan["operations"].append(
+                _upsert_operation(filter_doc, fields, seed_key, base_doc, {
+                    "category_id": category_id,
+                    "word_key": normalize_text(fields["word"]),
+                })
             )
-            
-            category_dict = category.to_dict()
-            category_dict["is_default"] = True  # Mark as default
-            
-            result = categories_collection.insert_one(category_dict)
-            category_id = str(result.inserted_id)
-            total_categories += 1
-            
-            print(f"✓ Created category: {category_data['name']}")
-            
-            # Create flashcards for this category
-            for flashcard_data in category_data["flashcards"]:
-                flashcard = Flashcard(
-                    user_id="system",
-                    category_id=category_id,
-                    word=flashcard_data["word"],
-                    translation=flashcard_data["translation"],
-                    example="",
-                    explanation="",
-                    difficulty="medium"
-                )
-                
-                flashcard_dict = flashcard.to_dict()
-                flashcard_dict["is_default"] = True  # Mark as default
-                
-                flashcards_collection.insert_one(flashcard_dict)
-                total_flashcards += 1
-            
-            print(f"  → Added {len(category_data['flashcards'])} flashcards")
-        
-        print(f"\n✅ Successfully seeded {total_categories} categories with {total_flashcards} flashcards!")
-        print("🎉 Default data is now available for all users!")
-        
+
+    plan["stale_ids"] = [doc["_id"] for doc in by_key.values()] + [doc["_id"] for doc in legacy_by_word.values()]
+    return plan
+
+
+def _print_plan(label, plan):
+    print(f"  {label}: +{plan['inserted']} new, ~{plan['updated']} changed, "
+          f"{plan['adopted']} adopted, {plan['unchanged']} unchanged, {len(plan['stale_ids'])} stale")
+
+
+def _has_changes(plan):
+    return bool(plan["inserted"] or plan["updated"] or plan["adopted"])
+
+
+def _load_category_ids():
+    return {
+        doc["seed_key"]: str(doc["_id"])
+        for doc in categories_collection.find({"is_default": True, "seed_key": {"$exists": True}}, {"seed_key": 1})
+    }
+
+
+def seed_default_data(check=False, prune=False):
+    """
+    Bring default categories and flashcards in line with the manifest
+    Returns: True if the database is (or in check mode, would be) up to date without changes
+    """
+    print(f"🌱 Seeding default data (deck version {DECK_VERSION}){' - dry run' if check else ''}...")
+
+    category_plan = plan_categories()
+    _print_plan("Categories", category_plan)
+
+    if not check and category_plan["operations"]:
+        result = categories_collection.bulk_write(category_plan["operations"], ordered=False)
+        print(f"✓ Categories written: {result.upserted_count} inserted, {result.modified_count} modified")
+
+    # In a dry run new categories have no _id yet, so reuse what the plan already knows
+    flashcard_plan = plan_flashcards(category_plan["ids"] if check else _load_category_ids())
+    _print_plan("Flashcards", flashcard_plan)
+
+    if not check and flashcard_plan["operations"]:
+        result = flashcards_collection.bulk_write(flashcard_plan["operations"], ordered=False)
+        print(f"✓ Flashcards written: {result.upserted_count} inserted, {result.modified_count} modified")
+
+    stale = len(category_plan["stale_ids"]) + len(flashcard_plan["stale_ids"])
+    if stale and prune and not check:
+        stale_category_ids = [str(_id) for _id in category_plan["stale_ids"]]
+        flashcards_collection.delete_many({
+            "is_default": True,
+            "$or": [
+                {"_id": {"$in": flashcard_plan["stale_ids"]}},
+                {"category_id": {"$in": stale_category_ids}},
+            ]
+        })
+        categories_collection.delete_many({"_id": {"$in": category_plan["stale_ids"]}})
+        print(f"🗑️  Pruned {stale} stale default entries")
+    elif stale:
+        print(f"⚠️  {stale} default entries are not in the manifest (use --prune to remove them)")
+
+    if not check and (flashcard_plan["operations"] or (stale and prune)):
+        # Exercise question banks of default decks are rebuilt for the new content
+        categories_collection.update_many({"is_default": True}, {"$inc": {"content_version": 1}})
+
+    up_to_date = not (_has_changes(category_plan) or _has_changes(flashcard_plan))
+    if check:
+        print("✅ Default data is up to date" if up_to_date else "⚠️  Default data has pending changes")
+    else:
+        print("✅ Default data is up to date" if up_to_date else "🎉 Default data seeded successfully!")
+    return up_to_date
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Seed default categories and flashcards")
+    parser.add_argument("--check", action="store_true", help="only report what would change")
+    parser.add_argument("--prune", action="store_true", help="remove default entries missing from the manifest")
+    args = parser.parse_args(argv)
+
+    try:
+        up_to_date = seed_default_data(check=args.check, prune=args.prune)
     except Exception as e:
         print(f"❌ Error seeding data: {e}")
+        return 2
+
+    return 1 if args.check and not up_to_date else 0
 
 
 if __name__ == "__main__":
-    seed_default_data()
+    sys.exit(main())
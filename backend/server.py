@@ -1,16 +1,38 @@
 from http.server import HTTPServer, BaseHTTPRequestHandler, ThreadingHTTPServer
 import json
 import os
-from urllib.parse import urlparse
-from database import users_collection, user_settings_collection, categories_collection, flashcards_collection
+from urllib.parse import urlparse, parse_qs
+from database import users_collection, user_settings_collection, categories_collection, flashcards_collection, ensure_indexes
 from models import User, UserSettings, Category, Flashcard
+from text_utils import normalize_text
 from auth_utils import create_access_token, get_user_from_token
 from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 import re
 from datetime import datetime
 import threading
 import traceback
-from ai_service import generate_complete_flashcard, generate_examples, regenerate_examples, translate_to_ukrainian, translate_sentence_to_ukrainian
+import signal
+import csv
+from ai_provider import ai_provider
+from ai_usage import ai_usage_tracker, ai_route, ai_user, usage_report, DEFAULT_REPORT_DAYS as AI_USAGE_DEFAULT_DAYS, MAX_REPORT_DAYS as AI_USAGE_MAX_DAYS
+from model_router import model_router, SETTING_TIERS as AI_MODEL_SETTINGS
+from ai_service import capacity_error, generate_complete_flashcard, stream_complete_flashcard, generate_examples, regenerate_examples, translate_to_ukrainian, translate_sentence_to_ukrainian
+from bulk_import import detect_format, open_text_stream, import_flashcards, MAX_IMPORT_BYTES
+from search_index import search_indexes, search_flashcards, SEARCH_MODES, DEFAULT_LIMIT as SEARCH_DEFAULT_LIMIT
+from autocomplete_index import autocomplete_indexes, DEFAULT_LIMIT as AUTOCOMPLETE_DEFAULT_LIMIT
+from similarity_index import similarity_indexes
+from batch_generation import MAX_BATCH_WORDS, build_generated_document, generate_flashcards
+from question_bank import bump_content_version, question_bank_builder, start_question_bank_builder
+from practice_service import record_session, sync_events, PracticeValidationError
+from practice_buffer import practice_counter_buffer
+from practice_stats import get_practice_stats, PERIOD_DAYS, RollupBackfillRunning, BACKFILL_RETRY_AFTER_SECONDS
+from srs import active_cards_query, get_due_cards, get_next_due_at, DEFAULT_DUE_LIMIT
+from srs_batch import recompute_user, get_review_forecast, FORECAST_DAYS
+from exercise_service import build_exercise_session, EXERCISE_TYPES, DEFAULT_SESSION_SIZE
+from metrics import metrics
+from deletion_worker import NOT_DELETED, schedule_category_deletion, schedule_user_deletion, get_recent_jobs, start_deletion_worker, deletion_worker
 
 
 class FlashEngHandler(BaseHTTPRequestHandler):
@@ -36,10 +58,11 @@ class FlashEngHandler(BaseHTTPRequestHandler):
             self.send_header('Access-Control-Allow-Origin', 'http://localhost:5173')
 
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, PUT, DELETE, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization, Idempotency-Key')
         self.send_header('Access-Control-Allow-Credentials', 'true')
+        self.send_header('Access-Control-Expose-Headers', 'Retry-After')
 
-    def _send_response(self, status_code, data):
+    def _send_response(self, status_code, data, headers=None):
         """Send JSON response with error handling"""
         try:
             json_data = json.dumps(data, ensure_ascii=False)
@@ -48,6 +71,8 @@ class FlashEngHandler(BaseHTTPRequestHandler):
             self.send_response(status_code)
             self.send_header('Content-type', 'application/json; charset=utf-8')
             self.send_header('Content-Length', len(json_data.encode('utf-8')))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
             self._set_cors_headers()
             self.end_headers()
             self.wfile.write(json_data.encode('utf-8'))
@@ -57,6 +82,29 @@ class FlashEngHandler(BaseHTTPRequestHandler):
             print(f"❌ Error sending response: {e}")
             print(traceback.format_exc())
 
+    def _start_event_stream(self):
+        """Send headers for a Server-Sent Events response (body ends when the connection closes)"""
+        self.send_response(200)
+        self.send_header('Content-type', 'text/event-stream; charset=utf-8')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('X-Accel-Buffering', 'no')  # disable proxy buffering
+        self._set_cors_headers()
+        self.end_headers()
+
+    def _send_event(self, event, data):
+        """Write one SSE event; raises on a closed connection"""
+        payload = json.dumps(data, ensure_ascii=False)
+        self.wfile.write(f"event: {event}\ndata: {payload}\n\n".encode('utf-8'))
+        self.wfile.flush()
+
+    def _send_ai_failure(self, result, message):
+        """Failed AI result: 429/503 with Retry-After when capacity ran out, else 500"""
+        error = {'error': f'{message}: {result.get("error", "Unknown error")}'}
+        if result.get('status'):
+            self._send_response(result['status'], error, {'Retry-After': str(result['retry_after'])})
+        else:
+            self._send_response(500, error)
+
     def _get_request_body(self):
         """Get and parse request body"""
         try:
@@ -106,10 +154,37 @@ class FlashEngHandler(BaseHTTPRequestHandler):
         user_data = get_user_from_token(token)
         if user_data:
             print(f"✅ User authenticated: {user_data['email']}")
+            ai_user.set(user_data['user_id'])  # AI usage accounting and budget
         else:
             print("❌ Token verification failed")
         return user_data
 
+    def _get_deleted_category_ids(self, user_id):
+        """Ids of user's categories that are soft-deleted but not purged yet"""
+        return [
+            str(cat['_id'])
+            for cat in categories_collection.find({'user_id': user_id, 'is_deleted': True}, {'_id': 1})
+        ]
+
+    def _on_card_saved(self, user_id, card):
+        """Keep in-process indexes in sync after a flashcard is created or edited"""
+        search_indexes.add_card(user_id, card)
+        autocomplete_indexes.add_card(user_id, card)
+        similarity_indexes.add_card(user_id, card)
+        bump_content_version(card['category_id'])
+
+    def _on_card_deleted(self, user_id, card_id, category_id):
+        search_indexes.remove_card(user_id, card_id)
+        autocomplete_indexes.remove_card(user_id, card_id)
+        similarity_indexes.remove_card(user_id, card_id)
+        bump_content_version(category_id)
+
+    def _on_cards_invalidated(self, user_id):
+        """Drop user's indexes after bulk changes; they are rebuilt lazily"""
+        search_indexes.invalidate(user_id)
+        autocomplete_indexes.invalidate(user_id)
+        similarity_indexes.invalidate(user_id)
+
     def do_OPTIONS(self):
         """Handle preflight requests"""
         try:
@@ -125,6 +200,7 @@ class FlashEngHandler(BaseHTTPRequestHandler):
         try:
             parsed_path = urlparse(self.path)
             path = parsed_path.path
+            ai_route.set(path)
             print(f"📨 GET request to: {path}")
 
             # Health check endpoint
@@ -144,6 +220,12 @@ class FlashEngHandler(BaseHTTPRequestHandler):
             # Admin endpoints
             elif path == '/api/admin/users':
                 self.handle_admin_get_users()
+            elif path == '/api/admin/deletion-jobs':
+                self.handle_admin_get_deletion_jobs()
+            elif path == '/api/admin/metrics':
+                self.handle_admin_get_metrics()
+            elif path == '/api/admin/ai-usage':
+                self.handle_admin_get_ai_usage(parse_qs(parsed_path.query))
 
             # Settings endpoints
             elif path == '/api/settings':
@@ -155,9 +237,25 @@ class FlashEngHandler(BaseHTTPRequestHandler):
             elif path.startswith('/api/categories/') and '/flashcards' in path:
                 self.handle_get_flashcards_by_category(path)
 
+            # Practice endpoints
+            elif path == '/api/practice/stats':
+                self.handle_get_practice_stats(parse_qs(parsed_path.query))
+            elif path == '/api/practice/due':
+                self.handle_get_due_cards(parse_qs(parsed_path.query))
+            elif path == '/api/practice/forecast':
+                self.handle_get_review_forecast(parse_qs(parsed_path.query))
+
+            # Exercise endpoints
+            elif path == '/api/exercises/session':
+                self.handle_get_exercise_session(parse_qs(parsed_path.query))
+
             # Flashcard endpoints
             elif path == '/api/flashcards':
                 self.handle_get_flashcards()
+            elif path == '/api/flashcards/search':
+                self.handle_search_flashcards(parse_qs(parsed_path.query))
+            elif path == '/api/flashcards/autocomplete':
+                self.handle_autocomplete_words(parse_qs(parsed_path.query))
             elif path.startswith('/api/flashcards/'):
                 self.handle_get_flashcard(path)
 
@@ -175,6 +273,7 @@ class FlashEngHandler(BaseHTTPRequestHandler):
         try:
             parsed_path = urlparse(self.path)
             path = parsed_path.path
+            ai_route.set(path)
             print(f"📨 POST request to: {path}")
 
             # Auth endpoints
@@ -196,6 +295,20 @@ class FlashEngHandler(BaseHTTPRequestHandler):
                 self.handle_create_flashcard()
             elif path == '/api/flashcards/generate':
                 self.handle_generate_flashcard()
+            elif path == '/api/flashcards/generate/stream':
+                self.handle_generate_flashcard_stream()
+            elif path == '/api/flashcards/generate/batch':
+                self.handle_generate_flashcards_batch()
+            elif path == '/api/flashcards/import':
+                self.handle_import_flashcards(parse_qs(parsed_path.query))
+
+            # Practice endpoints
+            elif path == '/api/practice/recompute':
+                self.handle_recompute_reviews()
+            elif path == '/api/practice/sync':
+                self.handle_sync_practice_events()
+            elif path == '/api/practice/sessions':
+                self.handle_record_practice_session()
 
             # AI endpoints
             elif path == '/api/ai/generate-examples':
@@ -221,6 +334,7 @@ class FlashEngHandler(BaseHTTPRequestHandler):
         try:
             parsed_path = urlparse(self.path)
             path = parsed_path.path
+            ai_route.set(path)
             print(f"📨 PUT request to: {path}")
 
             # Admin endpoints
@@ -253,6 +367,7 @@ class FlashEngHandler(BaseHTTPRequestHandler):
         try:
             parsed_path = urlparse(self.path)
             path = parsed_path.path
+            ai_route.set(path)
             print(f"📨 DELETE request to: {path}")
 
             # Admin endpoints
@@ -281,7 +396,7 @@ class FlashEngHandler(BaseHTTPRequestHandler):
         try:
             print("🩺 Health check requested")
             # Test database connection
-            from database import client
+            from database import client, index_issues
             client.admin.command('ping')
             print("✅ Database connection OK")
 
@@ -294,6 +409,10 @@ class FlashEngHandler(BaseHTTPRequestHandler):
                 'database': 'connected',
                 'version': '1.0.0'
             }
+            if index_issues:
+                # Missing unique indexes mean duplicate protection is off
+                health_data['status'] = 'degraded'
+                health_data['index_issues'] = index_issues
 
             self._send_response(200, health_data)
         except Exception as e:
@@ -360,15 +479,15 @@ class FlashEngHandler(BaseHTTPRequestHandler):
                 self._send_response(400, {'error': 'Password must be at least 6 characters'})
                 return
 
-            existing_user = users_collection.find_one({'email': email})
-            if existing_user:
+            print("✅ Creating new user")
+            user = User(full_name, email, password, role='user')
+            try:
+                # Unique index on email is the duplicate check
+                result = users_collection.insert_one(user.to_dict())
+            except DuplicateKeyError:
                 print("❌ User already exists")
                 self._send_response(400, {'error': 'User already exists'})
                 return
-
-            print("✅ Creating new user")
-            user = User(full_name, email, password, role='user')
-            result = users_collection.insert_one(user.to_dict())
             print(f"✅ User created with ID: {result.inserted_id}")
 
             # Create default settings
@@ -416,7 +535,7 @@ class FlashEngHandler(BaseHTTPRequestHandler):
                 return
 
             print("🔍 Looking for user in database")
-            user_doc = users_collection.find_one({'email': email})
+            user_doc = users_collection.find_one({'email': email, 'is_deleted': NOT_DELETED})
 
             if not user_doc:
                 print("❌ User not found")
@@ -484,7 +603,7 @@ class FlashEngHandler(BaseHTTPRequestHandler):
                 return
 
             print(f"🔍 Looking for user: {user_data['user_id']}")
-            user_doc = users_collection.find_one({'_id': ObjectId(user_data['user_id'])})
+            user_doc = users_collection.find_one({'_id': ObjectId(user_data['user_id']), 'is_deleted': NOT_DELETED})
 
             if not user_doc:
                 print("❌ User not found in database")
@@ -530,12 +649,18 @@ class FlashEngHandler(BaseHTTPRequestHandler):
                 self._send_response(401, {'error': 'Invalid token'})
                 return
 
-            settings_doc = user_settings_collection.find_one({'user_id': user_data['user_id']})
-
-            if not settings_doc:
-                print("⚙️ Creating default settings")
-                default_settings = UserSettings(user_data['user_id'])
-                user_settings_collection.insert_one(default_settings.to_dict())
+            # Read settings, creating defaults on first access, in one round trip
+            default_settings = UserSettings(user_data['user_id']).to_dict()
+            default_settings.pop('user_id')
+            try:
+                settings_doc = user_settings_collection.find_one_and_update(
+                    {'user_id': user_data['user_id']},
+                    {'$setOnInsert': default_settings},
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER
+                )
+            except DuplicateKeyError:
+                # Concurrent first access inserted it first
                 settings_doc = user_settings_collection.find_one({'user_id': user_data['user_id']})
 
             settings_response = {
@@ -580,7 +705,7 @@ class FlashEngHandler(BaseHTTPRequestHandler):
                 self._send_response(400, {'error': 'Invalid language level'})
                 return
 
-            if ai_model not in ['gpt-3.5', 'gpt-4']:
+            if ai_model not in AI_MODEL_SETTINGS:
                 self._send_response(400, {'error': 'Invalid AI model'})
                 return
 
@@ -597,6 +722,7 @@ class FlashEngHandler(BaseHTTPRequestHandler):
                 },
                 upsert=True
             )
+            model_router.forget_user(user_data['user_id'])
 
             print("✅ Settings updated")
             self._send_response(200, {
@@ -635,18 +761,14 @@ class FlashEngHandler(BaseHTTPRequestHandler):
                 self._send_response(400, {'error': 'Category name is required'})
                 return
 
-            existing = categories_collection.find_one({
-                'user_id': user_data['user_id'],
-                'name': name
-            })
-
-            if existing:
+            category = Category(user_data['user_id'], name, description, color)
+            try:
+                # Unique (user_id, name_key) index is the duplicate check
+                result = categories_collection.insert_one(category.to_dict())
+            except DuplicateKeyError:
                 self._send_response(400, {'error': 'Category with this name already exists'})
                 return
 
-            category = Category(user_data['user_id'], name, description, color)
-            result = categories_collection.insert_one(category.to_dict())
-
             category_response = {
                 '_id': str(result.inserted_id),
                 'name': name,
@@ -676,7 +798,7 @@ class FlashEngHandler(BaseHTTPRequestHandler):
                 self._send_response(401, {'error': 'Unauthorized'})
                 return
 
-            user_categories = list(categories_collection.find({'user_id': user_data['user_id']}))
+            user_categories = list(categories_collection.find({'user_id': user_data['user_id'], 'is_deleted': NOT_DELETED}))
             default_categories = list(categories_collection.find({'is_default': True}))
 
             all_categories = default_categories + user_categories
@@ -722,7 +844,8 @@ class FlashEngHandler(BaseHTTPRequestHandler):
 
             category = categories_collection.find_one({
                 '_id': ObjectId(category_id),
-                'user_id': user_data['user_id']
+                'user_id': user_data['user_id'],
+                'is_deleted': NOT_DELETED
             })
 
             if not category:
@@ -741,28 +864,23 @@ class FlashEngHandler(BaseHTTPRequestHandler):
                 self._send_response(400, {'error': 'Category name is required'})
                 return
 
-            existing = categories_collection.find_one({
-                'user_id': user_data['user_id'],
-                'name': name,
-                '_id': {'$ne': ObjectId(category_id)}
-            })
-
-            if existing:
+            try:
+                categories_collection.update_one(
+                    {'_id': ObjectId(category_id)},
+                    {
+                        '$set': {
+                            'name': name,
+                            'name_key': normalize_text(name),
+                            'description': description,
+                            'color': color,
+                            'updated_at': datetime.utcnow()
+                        }
+                    }
+                )
+            except DuplicateKeyError:
                 self._send_response(400, {'error': 'Category with this name already exists'})
                 return
 
-            categories_collection.update_one(
-                {'_id': ObjectId(category_id)},
-                {
-                    '$set': {
-                        'name': name,
-                        'description': description,
-                        'color': color,
-                        'updated_at': datetime.utcnow()
-                    }
-                }
-            )
-
             print("✅ Category updated")
             self._send_response(200, {
                 'message': 'Category updated successfully',
@@ -792,7 +910,8 @@ class FlashEngHandler(BaseHTTPRequestHandler):
 
             category = categories_collection.find_one({
                 '_id': ObjectId(category_id),
-                'user_id': user_data['user_id']
+                'user_id': user_data['user_id'],
+                'is_deleted': NOT_DELETED
             })
 
             if not category:
@@ -803,11 +922,12 @@ class FlashEngHandler(BaseHTTPRequestHandler):
                 self._send_response(403, {'error': 'Cannot delete default category'})
                 return
 
-            flashcards_collection.delete_many({'category_id': category_id})
-            categories_collection.delete_one({'_id': ObjectId(category_id)})
+            # Hide now, purge flashcards in the background
+            job_id = schedule_category_deletion(category_id, user_data['user_id'])
+            self._on_cards_invalidated(user_data['user_id'])
 
-            print("✅ Category deleted")
-            self._send_response(200, {'message': 'Category deleted successfully'})
+            print(f"✅ Category deleted (purge job {job_id})")
+            self._send_response(200, {'message': 'Category deleted successfully', 'job_id': job_id})
 
         except Exception as e:
             print(f"❌ Delete category error: {e}")
@@ -816,6 +936,25 @@ class FlashEngHandler(BaseHTTPRequestHandler):
 
     # ==================== FLASHCARD HANDLERS ====================
 
+    def _generated_flashcard_response(self, flashcard_dict):
+        """Client representation of a freshly inserted generated flashcard"""
+        return {
+            '_id': str(flashcard_dict['_id']),
+            'category_id': flashcard_dict['category_id'],
+            'word': flashcard_dict['word'],
+            'translation': flashcard_dict['translation'],
+            'transcription': flashcard_dict.get('transcription', ''),
+            'short_description': flashcard_dict.get('short_description', ''),
+            'example': flashcard_dict.get('example', ''),
+            'examples': flashcard_dict.get('examples', []),
+            'explanation': flashcard_dict.get('explanation', ''),
+            'notes': flashcard_dict.get('notes', ''),
+            'difficulty': flashcard_dict['difficulty'],
+            'times_practiced': 0,
+            'times_correct': 0,
+            'created_at': flashcard_dict['created_at'].isoformat()
+        }
+
     def handle_generate_flashcard(self):
         """Generate complete flashcard using AI"""
         try:
@@ -835,7 +974,8 @@ class FlashEngHandler(BaseHTTPRequestHandler):
 
             category = categories_collection.find_one({
                 '_id': ObjectId(category_id),
-                'user_id': user_data['user_id']
+                'user_id': user_data['user_id'],
+                'is_deleted': NOT_DELETED
             })
 
             if not category:
@@ -846,51 +986,27 @@ class FlashEngHandler(BaseHTTPRequestHandler):
             english_level = settings_doc.get('language_level', 'intermediate') if settings_doc else 'intermediate'
 
             print(f"🤖 Generating flashcard for: {word} (level: {english_level})")
-            result = generate_complete_flashcard(word, english_level)
+            result = generate_complete_flashcard(word, english_level, bypass_cache=bool(data.get('regenerate')))
 
             if not result["success"]:
                 print(f"❌ AI generation failed: {result.get('error')}")
-                self._send_response(500, {'error': f'AI generation failed: {result.get("error", "Unknown error")}'})
+                self._send_ai_failure(result, 'AI generation failed')
                 return
 
             ai_data = result["data"]
             print(f"✅ AI data received: {ai_data.get('text', word)}")
 
-            flashcard = Flashcard(
-                user_data['user_id'],
-                category_id,
-                ai_data.get('text', word),
-                ai_data.get('translation', ''),
-                ai_data.get('examples', [''])[0] if ai_data.get('examples') else '',
-                ai_data.get('explanation', ''),
-                'medium'
-            )
-
-            flashcard_dict = flashcard.to_dict()
-            flashcard_dict['transcription'] = ai_data.get('transcription', '')
-            flashcard_dict['short_description'] = ai_data.get('short_description', '')
-            flashcard_dict['examples'] = ai_data.get('examples', [])
-            flashcard_dict['notes'] = ai_data.get('notes', '')
+            flashcard_dict = build_generated_document(user_data['user_id'], category_id, word, ai_data)
 
-            db_result = flashcards_collection.insert_one(flashcard_dict)
+            try:
+                db_result = flashcards_collection.insert_one(flashcard_dict)
+            except DuplicateKeyError:
+                self._send_response(400, {'error': 'Flashcard with this word already exists in this category'})
+                return
             print(f"✅ Flashcard saved to database: {db_result.inserted_id}")
+            self._on_card_saved(user_data['user_id'], flashcard_dict)
 
-            flashcard_response = {
-                '_id': str(db_result.inserted_id),
-                'category_id': category_id,
-                'word': flashcard_dict['word'],
-                'translation': flashcard_dict['translation'],
-                'transcription': flashcard_dict.get('transcription', ''),
-                'short_description': flashcard_dict.get('short_description', ''),
-                'example': flashcard_dict.get('example', ''),
-                'examples': flashcard_dict.get('examples', []),
-                'explanation': flashcard_dict.get('explanation', ''),
-                'notes': flashcard_dict.get('notes', ''),
-                'difficulty': flashcard_dict['difficulty'],
-                'times_practiced': 0,
-                'times_correct': 0,
-                'created_at': flashcard.created_at.isoformat()
-            }
+            flashcard_response = self._generated_flashcard_response(flashcard_dict)
 
             print(f"✅ Flashcard generated successfully: {word}")
 
@@ -904,6 +1020,149 @@ class FlashEngHandler(BaseHTTPRequestHandler):
             print(traceback.format_exc())
             self._send_response(500, {'error': f'Server error: {str(e)}'})
 
+    def handle_generate_flashcard_stream(self):
+        """Generate flashcard using AI, streaming each field as a Server-Sent Event"""
+        try:
+            print("🃏 Generate flashcard stream requested")
+            user_data = self._get_user_from_request()
+            if not user_data:
+                self._send_response(401, {'error': 'Unauthorized'})
+                return
+
+            data = self._get_request_body()
+            word = data.get('word', '').strip()
+            category_id = data.get('category_id', '').strip()
+
+            if not word or not category_id:
+                self._send_response(400, {'error': 'Word and category are required'})
+                return
+
+            category = categories_collection.find_one({
+                '_id': ObjectId(category_id),
+                'user_id': user_data['user_id'],
+                'is_deleted': NOT_DELETED
+            })
+
+            if not category:
+                self._send_response(404, {'error': 'Category not found'})
+                return
+
+            # Reject before streaming; the unique index still guards the insert
+            if flashcards_collection.find_one({'category_id': category_id, 'word_key': normalize_text(word)}, {'_id': 1}):
+                self._send_response(400, {'error': 'Flashcard with this word already exists in this category'})
+                return
+
+            settings_doc = user_settings_collection.find_one({'user_id': user_data['user_id']})
+            english_level = settings_doc.get('language_level', 'intermediate') if settings_doc else 'intermediate'
+
+            print(f"🤖 Streaming flashcard for: {word} (level: {english_level})")
+            self._start_event_stream()
+        except Exception as e:
+            print(f"❌ Generate flashcard stream error: {e}")
+            print(traceback.format_exc())
+            self._send_response(500, {'error': f'Server error: {str(e)}'})
+            return
+
+        # Headers are sent: from here on errors are reported as `error` events
+        fields = stream_complete_flashcard(word, english_level, bypass_cache=bool(data.get('regenerate')))
+        try:
+            ai_data = {'text': word}
+            try:
+                for field, value in fields:
+                    ai_data[field] = value
+                    self._send_event('field', {'field': field, 'value': value})
+            except (ConnectionAbortedError, BrokenPipeError, ConnectionResetError):
+                raise
+            except Exception as e:
+                print(f"❌ AI generation failed: {e}")
+                event = {'error': f'AI generation failed: {str(e)}'}
+                capacity = capacity_error(e)
+                if capacity is not None:
+                    event['status'], event['retry_after'] = capacity
+                self._send_event('error', event)
+                return
+
+            flashcard_dict = build_generated_document(user_data['user_id'], category_id, word, ai_data)
+            try:
+                db_result = flashcards_collection.insert_one(flashcard_dict)
+            except DuplicateKeyError:
+                self._send_event('error', {'error': 'Flashcard with this word already exists in this category'})
+                return
+            print(f"✅ Flashcard saved to database: {db_result.inserted_id}")
+            self._on_card_saved(user_data['user_id'], flashcard_dict)
+
+            self._send_event('done', {
+                'message': 'Flashcard generated successfully',
+                'flashcard': self._generated_flashcard_response(flashcard_dict)
+            })
+            print(f"✅ Flashcard streamed successfully: {word}")
+
+        except (ConnectionAbortedError, BrokenPipeError, ConnectionResetError) as e:
+            # Client went away: closing the generator cancels the upstream request
+            print(f"⚠️ Stream client disconnected: {e}")
+        except Exception as e:
+            print(f"❌ Generate flashcard stream error: {e}")
+            print(traceback.format_exc())
+            try:
+                self._send_event('error', {'error': f'Server error: {str(e)}'})
+            except OSError:
+                pass
+        finally:
+            fields.close()
+
+    def handle_generate_flashcards_batch(self):
+        """Generate flashcards for a list of words in one request"""
+        try:
+            print("🃏 Batch generate flashcards requested")
+            user_data = self._get_user_from_request()
+            if not user_data:
+                self._send_response(401, {'error': 'Unauthorized'})
+                return
+
+            data = self._get_request_body()
+            words = data.get('words')
+            category_id = data.get('category_id', '').strip()
+
+            if not isinstance(words, list) or not words or not category_id:
+                self._send_response(400, {'error': 'Words list and category are required'})
+                return
+
+            if len(words) > MAX_BATCH_WORDS:
+                self._send_response(400, {'error': f'Batch generation is limited to {MAX_BATCH_WORDS} words'})
+                return
+
+            category = categories_collection.find_one({
+                '_id': ObjectId(category_id),
+                'user_id': user_data['user_id'],
+                'is_deleted': NOT_DELETED
+            })
+
+            if not category:
+                self._send_response(404, {'error': 'Category not found'})
+                return
+
+            settings_doc = user_settings_collection.find_one({'user_id': user_data['user_id']})
+            english_level = settings_doc.get('language_level', 'intermediate') if settings_doc else 'intermediate'
+
+            report = generate_flashcards(user_data['user_id'], category_id, words, english_level)
+            documents = report.pop('documents')
+
+            if documents:
+                self._on_cards_invalidated(user_data['user_id'])
+                bump_content_version(category_id)
+
+            print(f"✅ Batch generated {report['created']}/{report['total']} flashcards")
+            self._send_response(200, {
+                'message': 'Batch generation finished',
+                **report,
+                'flashcards': [self._generated_flashcard_response(document) for document in documents]
+            })
+
+        except Exception as e:
+            print(f"❌ Batch generate flashcards error: {e}")
+            print(traceback.format_exc())
+            self._send_response(500, {'error': f'Server error: {str(e)}'})
+
     def handle_create_flashcard(self):
         """Create new flashcard (manual creation)"""
         try:
@@ -928,22 +1187,14 @@ class FlashEngHandler(BaseHTTPRequestHandler):
 
             category = categories_collection.find_one({
                 '_id': ObjectId(category_id),
-                'user_id': user_data['user_id']
+                'user_id': user_data['user_id'],
+                'is_deleted': NOT_DELETED
             })
 
             if not category:
                 self._send_response(404, {'error': 'Category not found'})
                 return
 
-            existing = flashcards_collection.find_one({
-                'category_id': category_id,
-                'word': word
-            })
-
-            if existing:
-                self._send_response(400, {'error': 'Flashcard with this word already exists in this category'})
-                return
-
             flashcard = Flashcard(
                 user_data['user_id'],
                 category_id,
@@ -954,7 +1205,14 @@ class FlashEngHandler(BaseHTTPRequestHandler):
                 difficulty
             )
 
-            result = flashcards_collection.insert_one(flashcard.to_dict())
+            flashcard_dict = flashcard.to_dict()
+            try:
+                # Unique (category_id, word_key) index is the duplicate check
+                result = flashcards_collection.insert_one(flashcard_dict)
+            except DuplicateKeyError:
+                self._send_response(400, {'error': 'Flashcard with this word already exists in this category'})
+                return
+            self._on_card_saved(user_data['user_id'], flashcard_dict)
 
             flashcard_response = {
                 '_id': str(result.inserted_id),
@@ -980,6 +1238,71 @@ class FlashEngHandler(BaseHTTPRequestHandler):
             print(traceback.format_exc())
             self._send_response(500, {'error': f'Server error: {str(e)}'})
 
+    def handle_import_flashcards(self, query):
+        """Bulk import flashcards from CSV / JSON / NDJSON request body"""
+        try:
+            print("🃏 Import flashcards requested")
+            user_data = self._get_user_from_request()
+            if not user_data:
+                self._send_response(401, {'error': 'Unauthorized'})
+                return
+
+            category_id = query.get('category_id', [''])[0].strip()
+            if not category_id:
+                self._send_response(400, {'error': 'Category is required'})
+                return
+
+            fmt = detect_format(self.headers.get('Content-Type'), query.get('format', [None])[0])
+            if not fmt:
+                self._send_response(400, {'error': 'Unsupported format. Use csv, json or ndjson'})
+                return
+
+            content_length = int(self.headers.get('Content-Length', 0))
+            if content_length == 0:
+                self._send_response(400, {'error': 'Import file is empty'})
+                return
+
+            if content_length > MAX_IMPORT_BYTES:
+                self._send_response(413, {'error': f'Import file is larger than {MAX_IMPORT_BYTES // (1024 * 1024)} MB'})
+                return
+
+            category = categories_collection.find_one({
+                '_id': ObjectId(category_id),
+                'user_id': user_data['user_id'],
+                'is_deleted': NOT_DELETED
+            })
+
+            if not category:
+                self._send_response(404, {'error': 'Category not found'})
+                return
+
+            print(f"🃏 Importing {content_length} bytes of {fmt} into category {category_id}")
+            try:
+                report = import_flashcards(
+                    user_data['user_id'],
+                    category_id,
+                    open_text_stream(self.rfile, content_length),
+                    fmt
+                )
+            except (ValueError, UnicodeDecodeError, csv.Error) as e:
+                self._send_response(400, {'error': f'Invalid import file: {str(e)}'})
+                return
+
+            if report['imported']:
+                self._on_cards_invalidated(user_data['user_id'])
+                bump_content_version(category_id)
+
+            print(f"✅ Imported {report['imported']}/{report['total']} flashcards")
+            self._send_response(200, {
+                'message': 'Import finished',
+                **report
+            })
+
+        except Exception as e:
+            print(f"❌ Import flashcards error: {e}")
+            print(traceback.format_exc())
+            self._send_response(500, {'error': f'Server error: {str(e)}'})
+
     def handle_get_flashcards(self):
         """Get all flashcards for current user"""
         try:
@@ -989,7 +1312,7 @@ class FlashEngHandler(BaseHTTPRequestHandler):
                 self._send_response(401, {'error': 'Unauthorized'})
                 return
 
-            flashcards = list(flashcards_collection.find({'user_id': user_data['user_id']}))
+            flashcards = list(flashcards_collection.find(active_cards_query(user_data['user_id'])))
 
             flashcards_response = []
             for card in flashcards:
@@ -1021,6 +1344,70 @@ class FlashEngHandler(BaseHTTPRequestHandler):
             print(traceback.format_exc())
             self._send_response(500, {'error': f'Server error: {str(e)}'})
 
+    def handle_search_flashcards(self, query):
+        """Search user's flashcards by word, translation and descriptions"""
+        try:
+            print("🔎 Search flashcards requested")
+            user_data = self._get_user_from_request()
+            if not user_data:
+                self._send_response(401, {'error': 'Unauthorized'})
+                return
+
+            text = query.get('q', [''])[0].strip()
+            mode = query.get('mode', ['auto'])[0]
+            category_id = query.get('category_id', [None])[0]
+
+            if not text:
+                self._send_response(400, {'error': 'Search query is required'})
+                return
+
+            if mode not in SEARCH_MODES:
+                self._send_response(400, {'error': f'Invalid mode. Use one of: {", ".join(SEARCH_MODES)}'})
+                return
+
+            try:
+                limit = int(query.get('limit', [SEARCH_DEFAULT_LIMIT])[0])
+            except ValueError:
+                self._send_response(400, {'error': 'Limit must be a number'})
+                return
+
+            results = search_flashcards(user_data['user_id'], text, limit, mode, category_id)
+
+            print(f"✅ Search '{text}' returned {len(results)} flashcards")
+            self._send_response(200, {
+                'results': results,
+                'total': len(results)
+            })
+
+        except Exception as e:
+            print(f"❌ Search flashcards error: {e}")
+            print(traceback.format_exc())
+            self._send_response(500, {'error': f'Server error: {str(e)}'})
+
+    def handle_autocomplete_words(self, query):
+        """Suggest existing words (own cards and default decks) while typing"""
+        try:
+            user_data = self._get_user_from_request()
+            if not user_data:
+                self._send_response(401, {'error': 'Unauthorized'})
+                return
+
+            text = query.get('q', [''])[0]
+
+            try:
+                limit = int(query.get('limit', [AUTOCOMPLETE_DEFAULT_LIMIT])[0])
+            except ValueError:
+                self._send_response(400, {'error': 'Limit must be a number'})
+                return
+
+            result = autocomplete_indexes.suggest(user_data['user_id'], text, limit)
+            self._send_response(200, result)
+
+        except Exception as e:
+            print(f"❌ Autocomplete error: {e}")
+            print(traceback.format_exc())
+            self._send_response(500, {'error': f'Server error: {str(e)}'})
+
     def handle_get_flashcards_by_category(self, path):
         """Get all flashcards in specific category"""
         try:
@@ -1033,7 +1420,7 @@ class FlashEngHandler(BaseHTTPRequestHandler):
             category_id = path.split('/')[3]
             print(f"🃏 Category ID: {category_id}")
 
-            category = categories_collection.find_one({'_id': ObjectId(category_id)})
+            category = categories_collection.find_one({'_id': ObjectId(category_id), 'is_deleted': NOT_DELETED})
 
             if not category:
                 self._send_response(404, {'error': 'Category not found'})
@@ -1093,7 +1480,7 @@ class FlashEngHandler(BaseHTTPRequestHandler):
                 'user_id': user_data['user_id']
             })
 
-            if not flashcard:
+            if not flashcard or flashcard['category_id'] in self._get_deleted_category_ids(user_data['user_id']):
                 self._send_response(404, {'error': 'Flashcard not found'})
                 return
 
@@ -1157,18 +1544,27 @@ class FlashEngHandler(BaseHTTPRequestHandler):
                 self._send_response(400, {'error': 'Word and translation are required'})
                 return
 
-            flashcards_collection.update_one(
-                {'_id': ObjectId(flashcard_id)},
-                {
-                    '$set': {
-                        'word': word,
-                        'translation': translation,
-                        'example': example,
-                        'explanation': explanation,
-                        'difficulty': difficulty,
-                        'updated_at': datetime.utcnow()
+            try:
+                flashcards_collection.update_one(
+                    {'_id': ObjectId(flashcard_id)},
+                    {
+                        '$set': {
+                            'word': word,
+                            'word_key': normalize_text(word),
+                            'translation': translation,
+                            'example': example,
+                            'explanation': explanation,
+                            'difficulty': difficulty,
+                            'updated_at': datetime.utcnow()
+                        }
                     }
-                }
+                )
+            except DuplicateKeyError:
+                self._send_response(400, {'error': 'Flashcard with this word already exists in this category'})
+                return
+            self._on_card_saved(
+                user_data['user_id'],
+                dict(flashcard, word=word, word_key=normalize_text(word), translation=translation)
             )
 
             print("✅ Flashcard updated")
@@ -1214,6 +1610,7 @@ class FlashEngHandler(BaseHTTPRequestHandler):
                 return
 
             flashcards_collection.delete_one({'_id': ObjectId(flashcard_id)})
+            self._on_card_deleted(user_data['user_id'], flashcard_id, flashcard['category_id'])
 
             print("✅ Flashcard deleted")
             self._send_response(200, {'message': 'Flashcard deleted successfully'})
@@ -1223,6 +1620,233 @@ class FlashEngHandler(BaseHTTPRequestHandler):
             print(traceback.format_exc())
             self._send_response(500, {'error': f'Server error: {str(e)}'})
 
+    # ==================== PRACTICE HANDLERS ====================
+
+    def handle_record_practice_session(self):
+        """Record finished practice session and update card counters"""
+        try:
+            print("🎯 Record practice session requested")
+            user_data = self._get_user_from_request()
+            if not user_data:
+                self._send_response(401, {'error': 'Unauthorized'})
+                return
+
+            data = self._get_request_body()
+            idempotency_key = self.headers.get('Idempotency-Key') or data.get('idempotency_key')
+
+            try:
+                session, created = record_session(
+                    user_data['user_id'],
+                    data.get('category_id'),
+                    data.get('results'),
+                    data.get('duration', 0),
+                    idempotency_key
+                )
+            except PracticeValidationError as e:
+                self._send_response(400, {'error': str(e)})
+                return
+            except RollupBackfillRunning as e:
+                self._send_response(503, {'error': str(e)}, {'Retry-After': str(BACKFILL_RETRY_AFTER_SECONDS)})
+                return
+
+            print(f"✅ Practice session {'recorded' if created else 'already recorded'}: {session['_id']}")
+            self._send_response(201 if created else 200, {
+                'message': 'Practice session recorded' if created else 'Practice session already recorded',
+                'session': session
+            })
+
+        except Exception as e:
+            print(f"❌ Record practice session error: {e}")
+            print(traceback.format_exc())
+            self._send_response(500, {'error': f'Server error: {str(e)}'})
+
+    def handle_sync_practice_events(self):
+        """Apply a batch of offline practice events (deduplicated by event id)"""
+        try:
+            print("🎯 Practice sync requested")
+            user_data = self._get_user_from_request()
+            if not user_data:
+                self._send_response(401, {'error': 'Unauthorized'})
+                return
+
+            data = self._get_request_body()
+
+            try:
+                result = sync_events(user_data['user_id'], data.get('events'))
+            except PracticeValidationError as e:
+                self._send_response(400, {'error': str(e)})
+                return
+            except RollupBackfillRunning as e:
+                self._send_response(503, {'error': str(e)}, {'Retry-After': str(BACKFILL_RETRY_AFTER_SECONDS)})
+                return
+
+            print(f"✅ Synced {result['accepted']} practice events ({result['duplicates']} duplicates)")
+            self._send_response(200, result)
+
+        except Exception as e:
+            print(f"❌ Sync practice events error: {e}")
+            print(traceback.format_exc())
+            self._send_response(500, {'error': f'Server error: {str(e)}'})
+
+    def handle_get_practice_stats(self, query):
+        """Get weekly/monthly practice stats and streaks from daily rollups"""
+        try:
+            print("📊 Practice stats requested")
+            user_data = self._get_user_from_request()
+            if not user_data:
+                self._send_response(401, {'error': 'Unauthorized'})
+                return
+
+            period = query.get('period', ['week'])[0]
+            category_id = query.get('category_id', [None])[0]
+
+            if period not in PERIOD_DAYS:
+                self._send_response(400, {'error': f'Invalid period. Use one of: {", ".join(PERIOD_DAYS)}'})
+                return
+
+            stats = get_practice_stats(user_data['user_id'], period, category_id)
+
+            print("✅ Practice stats retrieved")
+            self._send_response(200, stats)
+
+        except Exception as e:
+            print(f"❌ Get practice stats error: {e}")
+            print(traceback.format_exc())
+            self._send_response(500, {'error': f'Server error: {str(e)}'})
+
+    def handle_get_due_cards(self, query):
+        """Get the next cards due for review (spaced repetition)"""
+        try:
+            print("🎯 Due cards requested")
+            user_data = self._get_user_from_request()
+            if not user_data:
+                self._send_response(401, {'error': 'Unauthorized'})
+                return
+
+            category_id = query.get('category_id', [None])[0]
+            if category_id and not ObjectId.is_valid(category_id):
+                self._send_response(400, {'error': 'Invalid category id'})
+                return
+
+            try:
+                limit = int(query.get('limit', [DEFAULT_DUE_LIMIT])[0])
+            except ValueError:
+                self._send_response(400, {'error': 'Limit must be a number'})
+                return
+
+            cards = get_due_cards(user_data['user_id'], limit, category_id)
+            response = {'cards': cards}
+            if not cards:
+                response['next_due_at'] = get_next_due_at(user_data['user_id'], category_id)
+
+            print(f"✅ Found {len(cards)} due cards")
+            self._send_response(200, response)
+
+        except Exception as e:
+            print(f"❌ Get due cards error: {e}")
+            print(traceback.format_exc())
+            self._send_response(500, {'error': f'Server error: {str(e)}'})
+
+    def handle_get_review_forecast(self, query):
+        """Get how many cards fall due on each of the coming days"""
+        try:
+            print("📊 Review forecast requested")
+            user_data = self._get_user_from_request()
+            if not user_data:
+                self._send_response(401, {'error': 'Unauthorized'})
+                return
+
+            category_id = query.get('category_id', [None])[0]
+            if category_id and not ObjectId.is_valid(category_id):
+                self._send_response(400, {'error': 'Invalid category id'})
+                return
+
+            try:
+                days = int(query.get('days', [FORECAST_DAYS])[0])
+            except ValueError:
+                self._send_response(400, {'error': 'Days must be a number'})
+                return
+
+            forecast = get_review_forecast(user_data['user_id'], days, category_id)
+
+            print(f"✅ Forecast: {forecast['overdue']} cards due now")
+            self._send_response(200, forecast)
+
+        except Exception as e:
+            print(f"❌ Get review forecast error: {e}")
+            print(traceback.format_exc())
+            self._send_response(500, {'error': f'Server error: {str(e)}'})
+
+    def handle_recompute_reviews(self):
+        """Rebuild review state of all user's cards from practice history"""
+        try:
+            print("🧮 Review recompute requested")
+            user_data = self._get_user_from_request()
+            if not user_data:
+                self._send_response(401, {'error': 'Unauthorized'})
+                return
+
+            summary = recompute_user(user_data['user_id'])
+
+            print(f"✅ Recomputed {summary['cards']} cards from {summary['reviews']} reviews")
+            self._send_response(200, summary)
+
+        except Exception as e:
+            print(f"❌ Recompute reviews error: {e}")
+            print(traceback.format_exc())
+            self._send_response(500, {'error': f'Server error: {str(e)}'})
+
+    # ==================== EXERCISE HANDLERS ====================
+
+    def handle_get_exercise_session(self, query):
+        """Get a ready-to-render exercise session for a category"""
+        try:
+            print("🎯 Exercise session requested")
+            user_data = self._get_user_from_request()
+            if not user_data:
+                self._send_response(401, {'error': 'Unauthorized'})
+                return
+
+            category_id = query.get('category_id', [''])[0]
+            exercise_type = query.get('type', ['translation'])[0]
+
+            if not ObjectId.is_valid(category_id):
+                self._send_response(400, {'error': 'Invalid category id'})
+                return
+
+            if exercise_type not in EXERCISE_TYPES:
+                self._send_response(400, {'error': f'Invalid exercise type. Use one of: {", ".join(EXERCISE_TYPES)}'})
+                return
+
+            try:
+                size = int(query.get('size', [DEFAULT_SESSION_SIZE])[0])
+            except ValueError:
+                self._send_response(400, {'error': 'Size must be a number'})
+                return
+
+            category = categories_collection.find_one({'_id': ObjectId(category_id), 'is_deleted': NOT_DELETED})
+
+            if not category:
+                self._send_response(404, {'error': 'Category not found'})
+                return
+
+            if not category.get('is_default', False) and category.get('user_id') != user_data['user_id']:
+                self._send_response(403, {'error': 'Access denied'})
+                return
+
+            settings_doc = user_settings_collection.find_one({'user_id': user_data['user_id']})
+            english_level = settings_doc.get('language_level', 'intermediate') if settings_doc else 'intermediate'
+
+            session = build_exercise_session(category, size, exercise_type, english_level)
+
+            print(f"✅ Exercise session with {session['total']} cards")
+            self._send_response(200, session)
+
+        except Exception as e:
+            print(f"❌ Get exercise session error: {e}")
+            print(traceback.format_exc())
+            self._send_response(500, {'error': f'Server error: {str(e)}'})
+
     # ==================== ADMIN HANDLERS ====================
 
     def handle_admin_create_user(self):
@@ -1256,13 +1880,13 @@ class FlashEngHandler(BaseHTTPRequestHandler):
                 self._send_response(400, {'error': 'Invalid role'})
                 return
 
-            if users_collection.find_one({'email': email}):
+            user = User(full_name, email, password, role=role)
+            try:
+                result = users_collection.insert_one(user.to_dict())
+            except DuplicateKeyError:
                 self._send_response(400, {'error': 'User already exists'})
                 return
 
-            user = User(full_name, email, password, role=role)
-            result = users_collection.insert_one(user.to_dict())
-
             user_response = {
                 '_id': str(result.inserted_id),
                 'full_name': full_name,
@@ -1298,7 +1922,7 @@ class FlashEngHandler(BaseHTTPRequestHandler):
                 self._send_response(403, {'error': 'Admin access required'})
                 return
 
-            users = list(users_collection.find({}, {'password': 0}))
+            users = list(users_collection.find({'is_deleted': NOT_DELETED}, {'password': 0}))
 
             users_response = []
             for user in users:
@@ -1322,6 +1946,94 @@ class FlashEngHandler(BaseHTTPRequestHandler):
             print(traceback.format_exc())
             self._send_response(500, {'error': f'Server error: {str(e)}'})
 
+    def handle_admin_get_deletion_jobs(self):
+        """Admin: Get progress of background deletion jobs"""
+        try:
+            print("👑 Admin get deletion jobs requested")
+            token = self._get_token_from_header()
+
+            if not token:
+                self._send_response(401, {'error': 'No token provided'})
+                return
+
+            admin_data = self._verify_admin(token)
+
+            if not admin_data:
+                self._send_response(403, {'error': 'Admin access required'})
+                return
+
+            jobs = get_recent_jobs()
+
+            print(f"✅ Retrieved {len(jobs)} deletion jobs")
+            self._send_response(200, {
+                'jobs': jobs,
+                'total': len(jobs)
+            })
+
+        except Exception as e:
+            print(f"❌ Admin get deletion jobs error: {e}")
+            print(traceback.format_exc())
+            self._send_response(500, {'error': f'Server error: {str(e)}'})
+
+    def handle_admin_get_metrics(self):
+        """Admin: Get in-process metrics snapshot"""
+        try:
+            token = self._get_token_from_header()
+
+            if not token:
+                self._send_response(401, {'error': 'No token provided'})
+                return
+
+            admin_data = self._verify_admin(token)
+
+            if not admin_data:
+                self._send_response(403, {'error': 'Admin access required'})
+                return
+
+            self._send_response(200, metrics.snapshot())
+
+        except Exception as e:
+            print(f"❌ Admin get metrics error: {e}")
+            print(traceback.format_exc())
+            self._send_response(500, {'error': f'Server error: {str(e)}'})
+
+    def handle_admin_get_ai_usage(self, query):
+        """Admin: AI token usage per day, model, route and user, plus the model routing table"""
+        try:
+            print("👑 Admin get AI usage requested")
+            token = self._get_token_from_header()
+
+            if not token:
+                self._send_response(401, {'error': 'No token provided'})
+                return
+
+            admin_data = self._verify_admin(token)
+
+            if not admin_data:
+                self._send_response(403, {'error': 'Admin access required'})
+                return
+
+            try:
+                days = int(query.get('days', [AI_USAGE_DEFAULT_DAYS])[0])
+                limit = int(query.get('limit', [20])[0])
+            except ValueError:
+                self._send_response(400, {'error': 'days and limit must be integers'})
+                return
+
+            if not 1 <= days <= AI_USAGE_MAX_DAYS or limit < 1:
+                self._send_response(400, {'error': f'days must be between 1 and {AI_USAGE_MAX_DAYS}'})
+                return
+
+            user_id = query.get('user_id', [''])[0].strip() or None
+            report = usage_report(days, user_id, limit)
+            report['model_routes'] = model_router.status()
+            self._send_response(200, report)
+
+        except Exception as e:
+            print(f"❌ Admin get AI usage error: {e}")
+            print(traceback.format_exc())
+            self._send_response(500, {'error': f'Server error: {str(e)}'})
+
     def handle_admin_toggle_user_status(self, path):
         """Admin: Toggle user status"""
         try:
@@ -1339,7 +2051,7 @@ class FlashEngHandler(BaseHTTPRequestHandler):
                 return
 
             user_id = path.split('/')[4]
-            user_doc = users_collection.find_one({'_id': ObjectId(user_id)})
+            user_doc = users_collection.find_one({'_id': ObjectId(user_id), 'is_deleted': NOT_DELETED})
 
             if not user_doc:
                 self._send_response(404, {'error': 'User not found'})
@@ -1384,7 +2096,7 @@ class FlashEngHandler(BaseHTTPRequestHandler):
                 return
 
             user_id = path.split('/')[4]
-            user_doc = users_collection.find_one({'_id': ObjectId(user_id)})
+            user_doc = users_collection.find_one({'_id': ObjectId(user_id), 'is_deleted': NOT_DELETED})
 
             if not user_doc:
                 self._send_response(404, {'error': 'User not found'})
@@ -1394,11 +2106,14 @@ class FlashEngHandler(BaseHTTPRequestHandler):
                 self._send_response(400, {'error': 'Cannot delete your own account'})
                 return
 
-            users_collection.delete_one({'_id': ObjectId(user_id)})
+            # Hide now, purge categories, flashcards and settings in the background
+            job_id = schedule_user_deletion(user_id, admin_data['user_id'])
+            self._on_cards_invalidated(user_id)
 
-            print("✅ User deleted")
+            print(f"✅ User deleted (purge job {job_id})")
             self._send_response(200, {
-                'message': 'User deleted successfully'
+                'message': 'User deleted successfully',
+                'job_id': job_id
             })
 
         except Exception as e:
@@ -1432,7 +2147,7 @@ class FlashEngHandler(BaseHTTPRequestHandler):
 
             if not result["success"]:
                 print(f"❌ AI generation failed: {result.get('error')}")
-                self._send_response(500, {'error': f'AI generation failed: {result.get("error", "Unknown error")}'})
+                self._send_ai_failure(result, 'AI generation failed')
                 return
 
             print(f"✅ Examples generated: {result['data']}")
@@ -1470,7 +2185,7 @@ class FlashEngHandler(BaseHTTPRequestHandler):
 
             if not result["success"]:
                 print(f"❌ AI generation failed: {result.get('error')}")
-                self._send_response(500, {'error': f'AI generation failed: {result.get("error", "Unknown error")}'})
+                self._send_ai_failure(result, 'AI generation failed')
                 return
 
             print(f"✅ Examples regenerated: {result['data']}")
@@ -1505,7 +2220,7 @@ class FlashEngHandler(BaseHTTPRequestHandler):
 
             if not result["success"]:
                 print(f"❌ Translation failed: {result.get('error')}")
-                self._send_response(500, {'error': f'Translation failed: {result.get("error", "Unknown error")}'})
+                self._send_ai_failure(result, 'Translation failed')
                 return
 
             print(f"✅ Translation: {result['data']}")
@@ -1540,7 +2255,7 @@ class FlashEngHandler(BaseHTTPRequestHandler):
 
             if not result["success"]:
                 print(f"❌ Translation failed: {result.get('error')}")
-                self._send_response(500, {'error': f'Translation failed: {result.get("error", "Unknown error")}'})
+                self._send_ai_failure(result, 'Translation failed')
                 return
 
             print(f"✅ Translation: {result['data']}")
@@ -1561,6 +2276,12 @@ def run_server():
     environment = os.getenv('ENVIRONMENT', 'development')
     frontend_url = os.getenv('FRONTEND_URL', 'not set')
 
+    ensure_indexes()
+    start_deletion_worker()
+    start_question_bank_builder()
+    practice_counter_buffer.start()
+    ai_usage_tracker.start()
+
     server_address = ('0.0.0.0', port)
     httpd = ThreadingHTTPServer(server_address, FlashEngHandler)
 
@@ -1570,10 +2291,21 @@ def run_server():
     print(f'🚀 Server running on http://0.0.0.0:{port}')
     print(f'📊 Active threads: {threading.active_count()}')
 
+    def handle_sigterm(signum, frame):
+        # Hosting platforms stop the service with SIGTERM; shut down like Ctrl+C
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, handle_sigterm)
+
     try:
         httpd.serve_forever()
     except KeyboardInterrupt:
         print('\n🛑 Server stopped')
+        deletion_worker.stop()
+        question_bank_builder.stop()
+        practice_counter_buffer.stop()
+        ai_provider.close()
+        ai_usage_tracker.stop()
         httpd.server_close()
 
 
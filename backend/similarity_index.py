@@ -0,0 +1,183 @@
+"""
+Similarity index for multiple-choice distractors
+Each card is a hashed character n-gram vector (word + translation) stored as
+an L2-normalized row of a float32 NumPy matrix per category, so "most
+confusable cards" is one matrix-vector product plus argpartition. Per-user
+indexes are updated incrementally; default decks share one index.
+"""
+import os
+import sys
+import threading
+import zlib
+
+import numpy as np
+
+# Add backend directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from index_registry import IndexRegistry
+from text_utils import normalize_text
+
+VECTOR_DIM = 256
+NGRAM_SIZES = (2, 3)
+FIELD_WEIGHTS = {'word': 1.0, 'translation': 0.5}
+INITIAL_CAPACITY = 64
+MAX_CACHED_USERS = int(os.getenv('SIMILARITY_MAX_CACHED_USERS', 200))
+
+ENTRY_PROJECTION = {'category_id': 1, 'word': 1, 'word_key': 1, 'translation': 1}
+
+
+def _ngrams(text):
+    padded = f' {text} '
+    for size in NGRAM_SIZES:
+        for start in range(len(padded) - size + 1):
+            yield padded[start:start + size]
+
+
+def card_vector(card, dim=VECTOR_DIM):
+    """L2-normalized hashed n-gram vector of a card's word and translation"""
+    vector = np.zeros(dim, dtype=np.float32)
+    for field, weight in FIELD_WEIGHTS.items():
+        text = normalize_text(card.get(field))
+        for gram in _ngrams(text):
+            vector[zlib.crc32(gram.encode('utf-8')) % dim] += weight
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class VectorBlock:
+    """Dense row-per-card matrix of one category; removal swaps the last row into the hole"""
+
+    def __init__(self, dim=VECTOR_DIM):
+        self.dim = dim
+        self._vectors = np.zeros((INITIAL_CAPACITY, dim), dtype=np.float32)
+        self._ids = []      # row -> card id
+        self._rows = {}     # card id -> row
+        self._entries = []  # row -> (word_key, word)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, card_id):
+        return card_id in self._rows
+
+    def _grow(self):
+        vectors = np.zeros((self._vectors.shape[0] * 2, self.dim), dtype=np.float32)
+        vectors[:len(self._ids)] = self._vectors[:len(self._ids)]
+        self._vectors = vectors
+
+    def add(self, card_id, vector, entry):
+        row = self._rows.get(card_id)
+        if row is None:
+            if len(self._ids) == self._vectors.shape[0]:
+                self._grow()
+            row = len(self._ids)
+            self._ids.append(card_id)
+            self._entries.append(entry)
+            self._rows[card_id] = row
+        else:
+            self._entries[row] = entry
+        self._vectors[row] = vector
+
+    def remove(self, card_id):
+        row = self._rows.pop(card_id, None)
+        if row is None:
+            return
+        last = len(self._ids) - 1
+        if row != last:
+            self._vectors[row] = self._vectors[last]
+            self._ids[row] = self._ids[last]
+            self._entries[row] = self._entries[last]
+            self._rows[self._ids[row]] = row
+        self._ids.pop()
+        self._entries.pop()
+
+    def nearest(self, card_id, vector, word_key, k):
+        count = len(self._ids)
+        if not count or k <= 0:
+            return []
+
+        row = self._rows.get(card_id)
+        scores = self._vectors[:count] @ (self._vectors[row] if row is not None else vector)
+        if row is not None:
+            scores[row] = -np.inf
+
+        # A few extra candidates cover same-word duplicates filtered below
+        take = min(count, k + 2)
+        top = np.argpartition(-scores, take - 1)[:take]
+        top = top[np.argsort(-scores[top])]
+
+        results = []
+        for position in top:
+            if scores[position] == -np.inf:
+                break
+            entry_key, word = self._entries[position]
+            if entry_key == word_key:
+                continue
+            results.append((self._ids[position], word, float(scores[position])))
+            if len(results) == k:
+                break
+        return results
+
+
+class SimilarityIndex:
+    """One vector block per category; distractors always come from the target's category"""
+
+    def __init__(self, dim=VECTOR_DIM):
+        self.dim = dim
+        self._lock = threading.RLock()
+        self._blocks = {}          # category id -> VectorBlock
+        self._card_categories = {}  # card id -> category id
+
+    def __len__(self):
+        return len(self._card_categories)
+
+    def add(self, card):
+        """Insert or update a card (moving it if its category changed)"""
+        card_id = str(card['_id'])
+        vector = card_vector(card, self.dim)
+        entry = (card.get('word_key') or normalize_text(card['word']), card['word'])
+        with self._lock:
+            previous = self._card_categories.get(card_id)
+            if previous is not None and previous != card['category_id']:
+                self._blocks[previous].remove(card_id)
+            block = self._blocks.get(card['category_id'])
+            if block is None:
+                block = self._blocks[card['category_id']] = VectorBlock(self.dim)
+            block.add(card_id, vector, entry)
+            self._card_categories[card_id] = card['category_id']
+
+    def remove(self, card_id):
+        with self._lock:
+            category_id = self._card_categories.pop(str(card_id), None)
+            if category_id is not None:
+                self._blocks[category_id].remove(str(card_id))
+
+    def nearest(self, card, k, category_id):
+        """
+        Top-k most similar cards of a category, excluding the card itself and same-word cards
+        Returns: list of (card_id, word, score), best first
+        """
+        card_id = str(card.get('_id', ''))
+        word_key = card.get('word_key') or normalize_text(card['word'])
+        with self._lock:
+            block = self._blocks.get(category_id)
+            if block is None:
+                return []
+            vector = None if card_id in block else card_vector(card, self.dim)
+            return block.nearest(card_id, vector, word_key, k)
+
+
+class SimilarityRegistry(IndexRegistry):
+    """Per-user similarity indexes (LRU) and the shared default-deck index"""
+
+    def __init__(self, max_users=MAX_CACHED_USERS):
+        super().__init__('similarity', ENTRY_PROJECTION, lambda default: SimilarityIndex(), max_users)
+
+    def distractors(self, category, card, k):
+        """Top-k confusable words from the same category as card"""
+        index = self.default_deck_index() if category.get('is_default', False) else self.get(category['user_id'])
+        return [word for _, word, _ in index.nearest(card, k, str(category['_id']))]
+
+
+similarity_indexes = SimilarityRegistry()
@@ -0,0 +1,73 @@
+"""
+Single-flight call coalescing
+Concurrent calls with the same key share one execution: the first caller runs
+the function, the others wait for its result (or its exception).
+"""
+import os
+import sys
+import threading
+
+# Add backend directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from metrics import metrics
+
+DEFAULT_WAIT_TIMEOUT_SECONDS = float(os.getenv('SINGLE_FLIGHT_TIMEOUT', 60))
+
+
+class SingleFlightTimeout(TimeoutError):
+    """Raised to a waiting caller when the shared call takes too long"""
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Per-key in-flight registry; `name` labels the metrics"""
+
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn, timeout=DEFAULT_WAIT_TIMEOUT_SECONDS):
+        """
+        Run fn once for all concurrent callers of key
+        timeout: how long a waiting caller blocks before SingleFlightTimeout
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+
+        if leader:
+            try:
+                call.result = fn()
+            except Exception as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+            if call.waiters:
+                metrics.inc('single_flight_coalesced', call.waiters, flight=self.name)
+            metrics.inc('single_flight_calls', flight=self.name)
+        elif not call.done.wait(timeout):
+            metrics.inc('single_flight_timeouts', flight=self.name)
+            raise SingleFlightTimeout(f'Timed out after {timeout}s waiting for shared {self.name} call')
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
@@ -0,0 +1,241 @@
+"""
+Spaced repetition (SM-2)
+Per-card review state lives on the flashcard document (new cards only carry
+`due_at`); with the (user_id, due_at) index "next N due cards" is O(log n + N).
+Review writes carry an apply id, kept in the card's `apply_ids` until the apply
+finishes, so re-running a failed apply never reviews a card twice.
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+# Add backend directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import flashcards_collection, categories_collection
+
+# Scheduling parameters (shared with the batch engine in srs_batch.py)
+SRS_PARAMS = {
+    'initial_ease': 2.5,
+    'min_ease': 1.3,
+    'first_interval_days': 1.0,
+    'second_interval_days': 6.0,
+    'lapse_interval_days': 10 / (24 * 60),  # relearn in 10 minutes
+    'max_interval_days': 365.0,
+    'pass_quality': 3,
+}
+
+CORRECT_QUALITY = 4
+INCORRECT_QUALITY = 1
+
+DEFAULT_DUE_LIMIT = 20
+MAX_DUE_LIMIT = 200
+
+# A card counts as learned (once, for stats) when it first passes this many reviews in a row
+LEARNED_REPS = 2
+
+SRS_FIELDS = ('srs_ease', 'srs_interval', 'srs_reps', 'srs_lapses', 'srs_last_review', 'due_at', 'srs_learned_at')
+
+
+def answer_quality(correct, quality=None):
+    """SM-2 grade 0..5; explicit grade wins over the correct/incorrect flag"""
+    if quality is not None:
+        return max(0, min(5, int(quality)))
+    return CORRECT_QUALITY if correct else INCORRECT_QUALITY
+
+
+def next_state(state, quality, reviewed_at, params=SRS_PARAMS):
+    """Apply one graded review to a card's state (SM-2)"""
+    ease = state.get('srs_ease') or params['initial_ease']
+    interval = state.get('srs_interval') or 0.0
+    reps = state.get('srs_reps') or 0
+    lapses = state.get('srs_lapses') or 0
+
+    ease = max(params['min_ease'], ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+
+    if quality < params['pass_quality']:
+        reps = 0
+        lapses += 1
+        interval = params['lapse_interval_days']
+    else:
+        if reps == 0:
+            interval = params['first_interval_days']
+        elif reps == 1:
+            interval = params['second_interval_days']
+        else:
+            interval = interval * ease
+        interval = min(interval, params['max_interval_days'])
+        reps += 1
+
+    return {
+        'srs_ease': round(ease, 4),
+        'srs_interval': round(interval, 4),
+        'srs_reps': reps,
+        'srs_lapses': lapses,
+        'srs_last_review': reviewed_at,
+        'due_at': reviewed_at + timedelta(days=interval)
+    }
+
+
+def replay_reviews(states, reviews):
+    """
+    Apply reviews in time order to known card states
+    states: {flashcard_id: current state}; reviews for other cards are ignored
+    Returns: {flashcard_id: new state} for reviewed cards
+    """
+    updated = {}
+    for flashcard_id, quality, reviewed_at in sorted(reviews, key=lambda review: review[2]):
+        if flashcard_id not in states:
+            continue  # not the user's card (e.g. default deck)
+        previous = updated.get(flashcard_id) or states[flashcard_id]
+        state = next_state(previous, quality, reviewed_at)
+        learned_at = previous.get('srs_learned_at') or (reviewed_at if state['srs_reps'] >= LEARNED_REPS else None)
+        if learned_at:
+            state['srs_learned_at'] = learned_at
+        updated[flashcard_id] = state
+    return updated
+
+
+def newly_learned(states, updated):
+    """(category_id, learned_at) of cards that became learned in this replay"""
+    return [
+        (states[flashcard_id].get('category_id'), state['srs_learned_at'])
+        for flashcard_id, state in updated.items()
+        if state.get('srs_learned_at') and not states[flashcard_id].get('srs_learned_at')
+    ]
+
+
+def _to_millis(moment):
+    # Mongo keeps datetimes to the millisecond
+    return moment.replace(microsecond=moment.microsecond // 1000 * 1000)
+
+
+def learned_by(written, reviews):
+    """
+    (category_id, learned_at) of already written cards that these reviews made learned
+    written: {flashcard_id: state} of cards the reviews were already applied to
+    The learned date is set once, to the review that earned it, so it tells
+    whether one of these reviews did.
+    """
+    review_times = {}
+    for flashcard_id, _, reviewed_at in reviews:
+        if flashcard_id in written:
+            review_times.setdefault(flashcard_id, set()).add(_to_millis(reviewed_at))
+    return [
+        (written[flashcard_id].get('category_id'), written[flashcard_id]['srs_learned_at'])
+        for flashcard_id, times in review_times.items()
+        if written[flashcard_id].get('srs_learned_at') and _to_millis(written[flashcard_id]['srs_learned_at']) in times
+    ]
+
+
+def load_card_states(user_id, card_ids, apply_id, fields=SRS_FIELDS):
+    """
+    The user's cards (state fields and category), split by whether apply_id was written to them
+    Returns: ({flashcard_id: state} still to write, {flashcard_id: state} already written)
+    """
+    projection = dict({field: 1 for field in fields}, category_id=1, apply_ids=1)
+    pending, written = {}, {}
+    for card in flashcards_collection.find({'_id': {'$in': card_ids}, 'user_id': user_id}, projection):
+        target = written if apply_id in card.pop('apply_ids', ()) else pending
+        target[str(card['_id'])] = card
+    return pending, written
+
+
+def guarded_update(user_id, flashcard_id, update, apply_id):
+    """UpdateOne that writes a card once per apply_id (re-running a failed apply skips it)"""
+    return UpdateOne(
+        {'_id': ObjectId(flashcard_id), 'user_id': user_id, 'apply_ids': {'$ne': apply_id}},
+        dict(update, **{'$push': {'apply_ids': apply_id}})
+    )
+
+
+def schedule_reviews(user_id, reviews, apply_id):
+    """
+    Apply graded reviews to the user's own cards, once per apply_id
+    reviews: list of (flashcard_id, quality, reviewed_at) in answer order
+    Returns: ({flashcard_id: new state} for cards that were updated,
+              [(category_id, learned_at)] for cards these reviews made learned)
+    """
+    if not reviews:
+        return {}, []
+
+    card_ids = list({ObjectId(flashcard_id) for flashcard_id, _, _ in reviews})
+    states, written = load_card_states(user_id, card_ids, apply_id)
+
+    updated = replay_reviews(states, reviews)
+
+    if updated:
+        flashcards_collection.bulk_write([
+            guarded_update(user_id, flashcard_id, {'$set': state}, apply_id)
+            for flashcard_id, state in updated.items()
+        ], ordered=False)
+
+    return updated, newly_learned(states, updated) + learned_by(written, reviews)
+
+
+def release_card_guards(card_ids, apply_ids):
+    """Drop apply ids of finished applies from their cards"""
+    flashcards_collection.update_many(
+        {'_id': {'$in': card_ids}, 'apply_ids': {'$in': apply_ids}},
+        {'$pull': {'apply_ids': {'$in': apply_ids}}}
+    )
+
+
+def active_cards_query(user_id, category_id=None):
+    """User's cards in one category, or in all categories not pending deletion"""
+    query = {'user_id': user_id}
+    if category_id:
+        query['category_id'] = category_id
+    else:
+        deleted = [
+            str(cat['_id'])
+            for cat in categories_collection.find({'user_id': user_id, 'is_deleted': True}, {'_id': 1})
+        ]
+        if deleted:
+            query['category_id'] = {'$nin': deleted}
+    return query
+
+
+def get_due_cards(user_id, limit=DEFAULT_DUE_LIMIT, category_id=None, now=None):
+    """
+    Next due cards, most overdue first
+    Served from the (user_id, due_at) / (user_id, category_id, due_at) indexes
+    """
+    now = now or datetime.utcnow()
+    limit = max(1, min(int(limit), MAX_DUE_LIMIT))
+
+    query = active_cards_query(user_id, category_id)
+    query['due_at'] = {'$lte': now}
+
+    projection = {
+        'category_id': 1, 'word': 1, 'translation': 1, 'short_description': 1,
+        'srs_interval': 1, 'srs_reps': 1, 'due_at': 1
+    }
+    cards = flashcards_collection.find(query, projection).sort('due_at', 1).limit(limit)
+
+    return [{
+        '_id': str(card['_id']),
+        'category_id': card['category_id'],
+        'word': card['word'],
+        'translation': card.get('translation', ''),
+        'short_description': card.get('short_description', ''),
+        'srs_reps': card.get('srs_reps', 0),
+        'srs_interval': card.get('srs_interval', 0.0),
+        'due_at': card['due_at'].isoformat()
+    } for card in cards]
+
+
+def get_next_due_at(user_id, category_id=None, now=None):
+    """When the next card becomes due (None if there are no cards)"""
+    now = now or datetime.utcnow()
+    query = active_cards_query(user_id, category_id)
+    query['due_at'] = {'$gt': now}
+    card = flashcards_collection.find_one(
+        query,
+        {'due_at': 1},
+        sort=[('due_at', 1)]
+    )
+    return card['due_at'].isoformat() if card else None
@@ -0,0 +1,259 @@
+"""
+Batch spaced-repetition engine (NumPy)
+Replays a user's whole review history with the SM-2 rules from srs.py in
+vectorized form: every card's n-th review is applied in one array step, so
+the Python loop runs max-reviews-per-card times instead of once per review.
+
+Usage (after changing SRS_PARAMS):
+    python srs_batch.py --user <user_id>
+    python srs_batch.py --all
+Learned dates are recomputed too; rebuild past days' cards_learned rollups
+afterwards with `python practice_stats.py --backfill`.
+"""
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta
+
+import numpy as np
+from pymongo import UpdateOne
+
+# Add backend directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import flashcards_collection, practice_events_collection, practice_sessions_collection
+from metrics import metrics
+from srs import LEARNED_REPS, SRS_PARAMS, answer_quality, active_cards_query
+
+FORECAST_DAYS = 30
+MAX_FORECAST_DAYS = 365
+DAY_MS = 24 * 60 * 60 * 1000
+
+
+def load_review_history(user_id):
+    """
+    All graded answers of a user (sessions and synced events), as parallel arrays
+    Returns: (flashcard ids, quality int8, reviewed_at datetime64[ms])
+    """
+    pipeline = [
+        {'$match': {'user_id': user_id, 'results': {'$exists': True}, 'applied': {'$ne': False}}},
+        {'$unwind': '$results'},
+        {'$project': {
+            '_id': 0,
+            'flashcard_id': '$results.flashcard_id',
+            'correct': '$results.correct',
+            'quality': '$results.quality',
+            'created_at': 1
+        }}
+    ]
+    flashcard_ids, qualities, reviewed_at = [], [], []
+    for review in practice_sessions_collection.aggregate(pipeline, allowDiskUse=True):
+        flashcard_ids.append(review['flashcard_id'])
+        qualities.append(answer_quality(review.get('correct'), review.get('quality')))
+        reviewed_at.append(review['created_at'])
+
+    # Answers synced from offline clients (unapplied ones are left to their retry)
+    events = practice_events_collection.find(
+        {'user_id': user_id, 'applied': {'$ne': False}},
+        {'_id': 0, 'flashcard_id': 1, 'correct': 1, 'quality': 1, 'reviewed_at': 1}
+    )
+    for event in events:
+        flashcard_ids.append(event['flashcard_id'])
+        qualities.append(answer_quality(event.get('correct'), event.get('quality')))
+        reviewed_at.append(event['reviewed_at'])
+
+    return (
+        flashcard_ids,
+        np.array(qualities, dtype=np.int8),
+        np.array(reviewed_at, dtype='datetime64[ms]')
+    )
+
+
+def replay_reviews(card_count, card_index, quality, reviewed_at, params=SRS_PARAMS):
+    """
+    Vectorized SM-2 over all cards
+    card_index/quality/reviewed_at: one entry per review (any order)
+    Returns: dict of per-card arrays (ease, interval, reps, lapses, last_review, reviewed, learned_at)
+    """
+    ease = np.full(card_count, params['initial_ease'], dtype=np.float64)
+    interval = np.zeros(card_count, dtype=np.float64)
+    reps = np.zeros(card_count, dtype=np.int32)
+    lapses = np.zeros(card_count, dtype=np.int32)
+    last_review = np.zeros(card_count, dtype='datetime64[ms]')
+    reviewed = np.zeros(card_count, dtype=bool)
+    learned_at = np.full(card_count, np.datetime64('NaT'), dtype='datetime64[ms]')
+
+    if len(card_index):
+        # Order reviews by card, then time; rank = position within the card's history
+        order = np.lexsort((reviewed_at, card_index))
+        card_index, quality, reviewed_at = card_index[order], quality[order], reviewed_at[order]
+        first = np.searchsorted(card_index, card_index, side='left')
+        rank = np.arange(len(card_index)) - first
+
+        for step in range(rank.max() + 1):
+            mask = rank == step
+            cards = card_index[mask]
+            grade = quality[mask].astype(np.float64)
+
+            new_ease = np.maximum(
+                params['min_ease'],
+                ease[cards] + 0.1 - (5 - grade) * (0.08 + (5 - grade) * 0.02)
+            )
+            passed = grade >= params['pass_quality']
+            grown = np.where(
+                reps[cards] == 0, params['first_interval_days'],
+                np.where(reps[cards] == 1, params['second_interval_days'], interval[cards] * new_ease)
+            )
+
+            ease[cards] = np.round(new_ease, 4)
+            interval[cards] = np.round(
+                np.where(passed, np.minimum(grown, params['max_interval_days']), params['lapse_interval_days']),
+                4
+            )
+            lapses[cards] += ~passed
+            reps[cards] = np.where(passed, reps[cards] + 1, 0)
+            last_review[cards] = reviewed_at[mask]
+            reviewed[cards] = True
+            # Learned once, at the first review that completes LEARNED_REPS passes in a row
+            learned = np.isnat(learned_at[cards]) & (reps[cards] >= LEARNED_REPS)
+            learned_at[cards[learned]] = reviewed_at[mask][learned]
+
+    return {
+        'ease': ease,
+        'interval': interval,
+        'reps': reps,
+        'lapses': lapses,
+        'last_review': last_review,
+        'reviewed': reviewed,
+        'learned_at': learned_at
+    }
+
+
+def due_dates(state, created_at):
+    """due_at per card: last review + interval, or creation time when never reviewed"""
+    delay = np.round(state['interval'] * DAY_MS).astype('timedelta64[ms]')
+    return np.where(state['reviewed'], state['last_review'] + delay, created_at)
+
+
+def review_forecast(due_at, now=None, days=FORECAST_DAYS):
+    """
+    Daily review load histogram for the next `days` days
+    Overdue cards count towards today.
+    """
+    now = now or datetime.utcnow()
+    today = np.datetime64(datetime(now.year, now.month, now.day), 'ms')
+    offsets = (due_at - today).astype(np.int64) // DAY_MS
+    overdue = int(np.count_nonzero(due_at <= np.datetime64(now, 'ms')))
+    counts = np.bincount(np.clip(offsets[offsets < days], 0, None), minlength=days)
+
+    start = datetime(now.year, now.month, now.day)
+    return {
+        'days': days,
+        'overdue': overdue,
+        'total': int(counts.sum()),
+        'daily': [
+            {'day': (start + timedelta(days=offset)).strftime('%Y-%m-%d'), 'due': int(count)}
+            for offset, count in enumerate(counts)
+        ]
+    }
+
+
+def recompute_user(user_id, params=SRS_PARAMS, now=None):
+    """
+    Rebuild every card's review state from history and write it back in one bulk write
+    Returns: summary with card/review counts and the new forecast
+    """
+    with metrics.timer('srs_recompute_seconds'):
+        cards = list(flashcards_collection.find(active_cards_query(user_id), {'_id': 1, 'created_at': 1}))
+        if not cards:
+            return {'cards': 0, 'reviews': 0, 'forecast': review_forecast(np.array([], dtype='datetime64[ms]'), now)}
+
+        positions = {str(card['_id']): index for index, card in enumerate(cards)}
+        created_at = np.array([card.get('created_at') or datetime.utcnow() for card in cards], dtype='datetime64[ms]')
+
+        flashcard_ids, quality, reviewed_at = load_review_history(user_id)
+        # Answers for deleted or default-deck cards have nothing to reschedule
+        index = np.fromiter((positions.get(card_id, -1) for card_id in flashcard_ids), dtype=np.int64,
+                            count=len(flashcard_ids))
+        known = index >= 0
+
+        state = replay_reviews(len(cards), index[known], quality[known], reviewed_at[known], params)
+        due_at = due_dates(state, created_at)
+
+        due_list = due_at.tolist()
+        last_list = state['last_review'].tolist()
+        learned_list = state['learned_at'].tolist()
+        operations = []
+        for position, card in enumerate(cards):
+            if state['reviewed'][position]:
+                update = {'$set': {
+                    'srs_ease': float(state['ease'][position]),
+                    'srs_interval': float(state['interval'][position]),
+                    'srs_reps': int(state['reps'][position]),
+                    'srs_lapses': int(state['lapses'][position]),
+                    'srs_last_review': last_list[position],
+                    'due_at': due_list[position]
+                }}
+                if learned_list[position] is not None:
+                    update['$set']['srs_learned_at'] = learned_list[position]
+                else:
+                    update['$unset'] = {'srs_learned_at': ''}
+            else:
+                update = {
+                    '$set': {'due_at': due_list[position]},
+                    '$unset': {'srs_ease': '', 'srs_interval': '', 'srs_reps': '', 'srs_lapses': '', 'srs_last_review': '',
+                               'srs_learned_at': ''}
+                }
+            operations.append(UpdateOne({'_id': card['_id'], 'user_id': user_id}, update))
+
+        flashcards_collection.bulk_write(operations, ordered=False)
+
+    metrics.inc('srs_recomputed_cards', len(cards))
+    return {
+        'cards': len(cards),
+        'reviews': int(known.sum()),
+        'forecast': review_forecast(due_at, now)
+    }
+
+
+def get_review_forecast(user_id, days=FORECAST_DAYS, category_id=None, now=None):
+    """Forecast from stored due dates (no history replay)"""
+    days = max(1, min(int(days), MAX_FORECAST_DAYS))
+    query = active_cards_query(user_id, category_id)
+    query['due_at'] = {'$exists': True}
+    due_at = np.array(
+        [card['due_at'] for card in flashcards_collection.find(query, {'_id': 0, 'due_at': 1})],
+        dtype='datetime64[ms]'
+    )
+    return review_forecast(due_at, now, days)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recompute spaced-repetition state from review history")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--user", help="recompute cards of this user id")
+    group.add_argument("--all", action="store_true", help="recompute cards of every user with practice history")
+    args = parser.parse_args(argv)
+
+    if args.user:
+        user_ids = [args.user]
+    else:
+        # Offline-synced history lives only in practice_events
+        user_ids = sorted(
+            set(practice_sessions_collection.distinct('user_id')) | set(practice_events_collection.distinct('user_id')),
+            key=str
+        )
+
+    try:
+        for user_id in user_ids:
+            summary = recompute_user(user_id)
+            print(f"✅ {user_id}: {summary['cards']} cards from {summary['reviews']} reviews, "
+                  f"{summary['forecast']['overdue']} due now")
+        return 0
+    except Exception as e:
+        print(f"❌ Recompute error: {e}")
+        return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
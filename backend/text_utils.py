@@ -0,0 +1,31 @@
+"""
+Text normalization helpers shared by search, autocomplete and unique keys
+Works the same way for English and Ukrainian text
+"""
+import re
+import unicodedata
+
+_APOSTROPHES = str.maketrans({'’': "'", 'ʼ': "'", '`': "'", '‘': "'"})
+_WHITESPACE = re.compile(r'\s+')
+_TOKEN = re.compile(r"[^\W_]+(?:'[^\W_]+)*")
+
+
+def normalize_text(text, casefold=True):
+    """Unicode-normalize, case-fold (unless casefold=False), unify apostrophes and collapse whitespace"""
+    if not text:
+        return ''
+    text = unicodedata.normalize('NFKC', str(text)).translate(_APOSTROPHES)
+    if casefold:
+        text = text.casefold()
+    return _WHITESPACE.sub(' ', text).strip()
+
+
+def tokenize(text):
+    """Split normalized text into word tokens (letters, digits and inner apostrophes)"""
+    return _TOKEN.findall(normalize_text(text))
+
+
+def trigrams(token):
+    """Character trigrams of a token, padded so short words still get some"""
+    padded = f'  {token} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
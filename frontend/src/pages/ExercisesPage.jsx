@@ -65,7 +65,7 @@ const EXERCISE_TYPES = [
 const ExercisesPage = () => {
     const { authUser } = useAuthStore();
     const { categories, fetchCategories } = useCategoryStore();
-    const { fetchFlashcardsByCategory } = useFlashcardStore();
+    const { fetchExerciseSession, recordPracticeSession } = useFlashcardStore();
 
     const [selectedExercise, setSelectedExercise] = useState(null);
     const [selectedCategory, setSelectedCategory] = useState(null);
@@ -81,24 +81,17 @@ const ExercisesPage = () => {
     const [score, setScore] = useState({ correct: 0, total: 0 });
     const [startTime, setStartTime] = useState(null);
     const [options, setOptions] = useState([]);
+    const [sessionResults, setSessionResults] = useState([]);
+    const [sessionKey, setSessionKey] = useState(null);
 
     useEffect(() => {
         fetchCategories();
     }, [fetchCategories]);
 
-    // Generate options when flashcard changes
+    // Options are precomputed by the server for each card
     useEffect(() => {
         if (inSession && sessionFlashcards.length > 0 && selectedExercise?.id === "translation") {
-            const currentFlashcard = sessionFlashcards[currentIndex];
-            const correctAnswer = currentFlashcard.word;
-            const wrongAnswers = sessionFlashcards
-                .filter(card => card._id !== currentFlashcard._id)
-                .map(card => card.word)
-                .sort(() => Math.random() - 0.5)
-                .slice(0, 3);
-
-            const allOptions = [correctAnswer, ...wrongAnswers];
-            setOptions(allOptions.sort(() => Math.random() - 0.5));
+            setOptions(sessionFlashcards[currentIndex].options || []);
         }
     }, [currentIndex, inSession, sessionFlashcards, selectedExercise]);
 
@@ -111,24 +104,23 @@ const ExercisesPage = () => {
         setIsStarting(true);
 
         try {
-            // Fetch flashcards from selected category
-            const response = await fetchFlashcardsByCategory(selectedCategory._id);
+            // Server picks due cards and builds answer options
+            const flashcards = await fetchExerciseSession(selectedCategory._id);
 
-            // Get flashcards from store
-            const flashcards = response || [];
+            if (!flashcards) {
+                return;
+            }
 
             if (flashcards.length === 0) {
                 toast.error("This category has no flashcards yet!");
-                setIsStarting(false);
                 return;
             }
 
-            // Shuffle flashcards
-            const shuffled = [...flashcards].sort(() => Math.random() - 0.5);
-
-            setSessionFlashcards(shuffled);
+            setSessionFlashcards(flashcards);
             setCurrentIndex(0);
             setScore({ correct: 0, total: 0 });
+            setSessionResults([]);
+            setSessionKey(crypto.randomUUID());
             setStartTime(Date.now());
             setInSession(true);
 
@@ -153,6 +145,7 @@ const ExercisesPage = () => {
         setUserAnswer(selectedAnswer);
         setIsCorrect(correct);
         setShowResult(true);
+        setSessionResults(prev => [...prev, { flashcard_id: currentFlashcard._id, correct }]);
 
         if (correct) {
             setScore(prev => ({ ...prev, correct: prev.correct + 1, total: prev.total + 1 }));
@@ -181,6 +174,13 @@ const ExercisesPage = () => {
             { duration: 5000 }
         );
 
+        // Idempotency key lets the request be retried without double counting
+        recordPracticeSession({
+            category_id: selectedCategory?._id,
+            duration,
+            results: sessionResults
+        }, sessionKey);
+
         setInSession(false);
         setSelectedExercise(null);
         setSelectedCategory(null);
@@ -326,10 +326,10 @@ const ExercisesPage = () => {
                     </div>
 
                     {/* Hint Card */}
-                    {!showResult && currentFlashcard.short_description && (
+                    {!showResult && (currentFlashcard.hint || currentFlashcard.short_description) && (
                         <div className="bg-blue-50 rounded-xl border border-blue-200 p-6">
                             <p className="text-sm text-blue-600 font-semibold mb-2">💡 Hint:</p>
-                            <p className="text-gray-700">{currentFlashcard.short_description}</p>
+                            <p className="text-gray-700">{currentFlashcard.hint || currentFlashcard.short_description}</p>
                         </div>
                     )}
                 </div>
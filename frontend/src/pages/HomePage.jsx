@@ -35,6 +35,8 @@ const HomePage = () => {
         fetchFlashcardsByCategory,
         createFlashcard,
         generateFlashcard,
+        generateFlashcardStream,
+        generateFlashcardsBatch,
         updateFlashcard,
         deleteFlashcard
     } = useFlashcardStore();
@@ -56,6 +58,14 @@ const HomePage = () => {
         useAI: true  // Default to AI generation
     });
 
+    // Fields of the card being generated, shown as the AI writes them
+    const [streamFields, setStreamFields] = useState({});
+
+    // Word list generation: one word or phrase per line
+    const [batchMode, setBatchMode] = useState(false);
+    const [batchWords, setBatchWords] = useState("");
+    const [batchIssues, setBatchIssues] = useState([]);
+
     useEffect(() => {
         fetchCategories();
     }, [fetchCategories]);
@@ -126,11 +136,16 @@ const HomePage = () => {
         e.preventDefault();
         try {
             if (flashcardForm.useAI) {
-                // AI Generation
-                await generateFlashcard({
-                    word: flashcardForm.word,
-                    category_id: selectedCategory._id
-                });
+                // AI Generation, streamed field by field where the browser supports it
+                const data = { word: flashcardForm.word, category_id: selectedCategory._id };
+                if (typeof TextDecoderStream !== "undefined") {
+                    setStreamFields({});
+                    await generateFlashcardStream(data, (field, value) => {
+                        setStreamFields((fields) => ({ ...fields, [field]: value }));
+                    });
+                } else {
+                    await generateFlashcard(data);
+                }
             } else {
                 // Manual creation (not used for now)
                 await createFlashcard({
@@ -144,6 +159,26 @@ const HomePage = () => {
             setFlashcardForm({ word: "", useAI: true });
         } catch (error) {
             // Error handled in store
+        } finally {
+            setStreamFields({});
+        }
+    };
+
+    const handleGenerateBatch = async (e) => {
+        e.preventDefault();
+        const words = batchWords.split("\n").map((word) => word.trim()).filter(Boolean);
+        try {
+            const report = await generateFlashcardsBatch(selectedCategory._id, words);
+            const issues = report.rows.filter((row) => row.status !== "created");
+            setBatchIssues(issues);
+            // Keep the words that were not created in the box, so they can be fixed and retried
+            setBatchWords(issues.map((row) => row.word).join("\n"));
+            if (issues.length === 0) {
+                setShowFlashcardModal(false);
+                setBatchMode(false);
+            }
+        } catch (error) {
+            // Error handled in store
         }
     };
 
@@ -175,12 +210,16 @@ const HomePage = () => {
             word: flashcard.word,
             useAI: false
         });
+        setBatchMode(false);
         setShowFlashcardModal(true);
     };
 
     const openCreateFlashcardModal = () => {
         setEditingFlashcard(null);
         setFlashcardForm({ word: "", useAI: true });
+        setBatchMode(false);
+        setBatchWords("");
+        setBatchIssues([]);
         setShowFlashcardModal(true);
     };
 
@@ -557,25 +596,96 @@ const HomePage = () => {
                             </button>
                         </div>
 
-                        <form onSubmit={handleCreateFlashcard} className="space-y-6">
-                            <div>
-                                <label className="block text-sm font-medium text-gray-700 mb-2">
-                                    Enter word or phrase *
-                                </label>
-                                <input
-                                    type="text"
-                                    value={flashcardForm.word}
-                                    onChange={(e) => setFlashcardForm({ ...flashcardForm, word: e.target.value })}
-                                    className="w-full px-4 py-3 border border-gray-300 rounded-lg focus:ring-2 focus:ring-blue-500 focus:border-blue-500 text-lg"
-                                    placeholder="e.g., opportunity, to be, happy"
-                                    required
-                                    disabled={flashcardCreating}
-                                    autoFocus
-                                />
-                                <p className="text-xs text-gray-500 mt-2">
-                                    💡 AI will generate translation, transcription, explanation, and examples
-                                </p>
+                        {!editingFlashcard && (
+                            <div className="flex mb-6 bg-gray-100 rounded-lg p-1">
+                                {[["One word", false], ["Word list", true]].map(([label, mode]) => (
+                                    <button
+                                        key={label}
+                                        type="button"
+                                        onClick={() => setBatchMode(mode)}
+                                        disabled={flashcardCreating}
+                                        className={`flex-1 px-4 py-2 rounded-md text-sm font-medium transition-colors ${
+                                            batchMode === mode ? 'bg-white shadow-sm text-gray-900' : 'text-gray-600 hover:text-gray-900'
+                                        }`}
+                                    >
+                                        {label}
+                                    </button>
+                                ))}
                             </div>
+                        )}
+
+                        <form onSubmit={batchMode ? handleGenerateBatch : handleCreateFlashcard} className="space-y-6">
+                            {batchMode ? (
+                                <div>
+                                    <label className="block text-sm font-medium text-gray-700 mb-2">
+                                        Enter words or phrases, one per line *
+                                    </label>
+                                    <textarea
+                                        value={batchWords}
+                                        onChange={(e) => setBatchWords(e.target.value)}
+                                        className="w-full px-4 py-3 border border-gray-300 rounded-lg focus:ring-2 focus:ring-blue-500 focus:border-blue-500"
+                                        rows="8"
+                                        placeholder={"opportunity\nto be\nhappy"}
+                                        required
+                                        disabled={flashcardCreating}
+                                        autoFocus
+                                    />
+                                    {batchIssues.length > 0 && (
+                                        <ul className="mt-3 max-h-32 overflow-y-auto text-sm text-red-600 space-y-1">
+                                            {batchIssues.map((row, index) => (
+                                                <li key={index}>
+                                                    <span className="font-medium">{row.word || "(empty)"}</span>: {row.error}
+                                                </li>
+                                            ))}
+                                        </ul>
+                                    )}
+                                    <p className="text-xs text-gray-500 mt-2">
+                                        💡 Long lists are generated in parts; words that fail stay here for a retry
+                                    </p>
+                                </div>
+                            ) : (
+                                <div>
+                                    <label className="block text-sm font-medium text-gray-700 mb-2">
+                                        Enter word or phrase *
+                                    </label>
+                                    <input
+                                        type="text"
+                                        value={flashcardForm.word}
+                                        onChange={(e) => setFlashcardForm({ ...flashcardForm, word: e.target.value })}
+                                        className="w-full px-4 py-3 border border-gray-300 rounded-lg focus:ring-2 focus:ring-blue-500 focus:border-blue-500 text-lg"
+                                        placeholder="e.g., opportunity, to be, happy"
+                                        required
+                                        disabled={flashcardCreating}
+                                        autoFocus
+                                    />
+                                    <p className="text-xs text-gray-500 mt-2">
+                                        💡 AI will generate translation, transcription, explanation, and examples
+                                    </p>
+                                    {Object.keys(streamFields).length > 0 && (
+                                        <div className="mt-4 p-4 bg-gray-50 border border-gray-200 rounded-lg space-y-2 text-sm max-h-64 overflow-y-auto">
+                                            {streamFields.translation && (
+                                                <p className="text-lg font-semibold text-gray-900">{streamFields.translation}</p>
+                                            )}
+                                            {streamFields.transcription && (
+                                                <p className="text-gray-500 whitespace-pre-line">{streamFields.transcription}</p>
+                                            )}
+                                            {streamFields.short_description && (
+                                                <p className="text-gray-600 italic">{streamFields.short_description}</p>
+                                            )}
+                                            {streamFields.explanation && (
+                                                <p className="text-gray-700 whitespace-pre-line">{streamFields.explanation}</p>
+                                            )}
+                                            {Array.isArray(streamFields.examples) && (
+                                                <ul className="list-disc list-inside text-gray-600">
+                                                    {streamFields.examples.map((example, index) => (
+                                                        <li key={index}>{example}</li>
+                                                    ))}
+                                                </ul>
+                                            )}
+                                        </div>
+                                    )}
+                                </div>
+                            )}
 
                             <div className="flex space-x-4 pt-4">
                                 <button
@@ -593,7 +703,7 @@ const HomePage = () => {
                                 </button>
                                 <button
                                     type="submit"
-                                    disabled={flashcardCreating || !flashcardForm.word.trim()}
+                                    disabled={flashcardCreating || !(batchMode ? batchWords : flashcardForm.word).trim()}
                                     className="flex-1 px-4 py-3 bg-gradient-to-r from-blue-600 to-purple-600 hover:from-blue-700 hover:to-purple-700 disabled:from-gray-400 disabled:to-gray-400 text-white rounded-lg transition-colors flex items-center justify-center disabled:cursor-not-allowed font-semibold"
                                 >
                                     {flashcardCreating ? (
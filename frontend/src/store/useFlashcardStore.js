@@ -2,6 +2,8 @@ import { create } from "zustand";
 import { axiosInstance } from "../lib/axios.js";
 import toast from "react-hot-toast";
 
+const BATCH_WORDS_PER_REQUEST = 20;
+
 export const useFlashcardStore = create((set, get) => ({
     flashcards: [],
     currentFlashcard: null,
@@ -103,6 +105,104 @@ export const useFlashcardStore = create((set, get) => ({
         }
     },
 
+    // Sent in requests of BATCH_WORDS_PER_REQUEST words (the server's limit), so each one finishes well within its timeout
+    generateFlashcardsBatch: async (categoryId, words) => {
+        set({ isCreating: true });
+        const loadingToast = toast.loading(`🤖 AI is generating ${words.length} flashcards...`);
+        const report = { total: 0, created: 0, duplicates: 0, invalid: 0, failed: 0, rows: [] };
+        try {
+            const token = localStorage.getItem('token');
+
+            for (let start = 0; start < words.length; start += BATCH_WORDS_PER_REQUEST) {
+                const res = await axiosInstance.post("/flashcards/generate/batch", {
+                    category_id: categoryId,
+                    words: words.slice(start, start + BATCH_WORDS_PER_REQUEST)
+                }, {
+                    headers: {
+                        Authorization: `Bearer ${token}`
+                    },
+                    timeout: 180000
+                });
+
+                set((state) => ({
+                    flashcards: [...state.flashcards, ...res.data.flashcards]
+                }));
+                for (const key of ["total", "created", "duplicates", "invalid", "failed"]) {
+                    report[key] += res.data[key];
+                }
+                report.rows.push(...res.data.rows);
+                toast.loading(`🤖 Generated ${report.created} of ${words.length} flashcards...`, { id: loadingToast });
+            }
+
+            toast.success(`✨ ${report.created} of ${report.total} flashcards generated`, { id: loadingToast });
+            return report;
+        } catch (error) {
+            toast.dismiss(loadingToast);
+            console.error("Error generating flashcards:", error);
+            const errorMessage = error.response?.data?.error || "Failed to generate flashcards";
+            toast.error(report.created ? `${errorMessage} (${report.created} flashcards were generated)` : errorMessage);
+            throw error;
+        } finally {
+            set({ isCreating: false });
+        }
+    },
+
+    // Server-Sent Events over POST: onField(field, value) fires as each field is generated
+    generateFlashcardStream: async (data, onField) => {
+        set({ isCreating: true });
+        try {
+            const token = localStorage.getItem('token');
+            const res = await fetch(`${axiosInstance.defaults.baseURL}/flashcards/generate/stream`, {
+                method: "POST",
+                credentials: "include",
+                headers: {
+                    "Content-Type": "application/json",
+                    Authorization: `Bearer ${token}`
+                },
+                body: JSON.stringify(data)
+            });
+
+            if (!res.ok) {
+                const body = await res.json().catch(() => ({}));
+                throw new Error(body.error || "Failed to generate flashcard");
+            }
+
+            const reader = res.body.pipeThrough(new TextDecoderStream()).getReader();
+            let buffer = "";
+            while (true) {
+                const { value, done } = await reader.read();
+                if (done) break;
+                buffer += value;
+
+                const events = buffer.split("\n\n");
+                buffer = events.pop();
+                for (const raw of events) {
+                    const event = raw.match(/^event: (.*)$/m)?.[1];
+                    const payload = JSON.parse(raw.match(/^data: (.*)$/m)?.[1] || "{}");
+
+                    if (event === "field") {
+                        onField?.(payload.field, payload.value);
+                    } else if (event === "error") {
+                        throw new Error(payload.error);
+                    } else if (event === "done") {
+                        set((state) => ({
+                            flashcards: [...state.flashcards, payload.flashcard]
+                        }));
+                        toast.success("✨ Flashcard generated successfully!");
+                        return payload.flashcard;
+                    }
+                }
+            }
+            throw new Error("Generation stream ended unexpectedly");
+        } catch (error) {
+            console.error("Error generating flashcard:", error);
+            toast.error(error.message || "Failed to generate flashcard");
+            throw error;
+        } finally {
+            set({ isCreating: false });
+        }
+    },
+
     createFlashcard: async (data) => {
         set({ isCreating: true });
         try {
@@ -185,6 +285,44 @@ export const useFlashcardStore = create((set, get) => ({
         }
     },
 
+    fetchExerciseSession: async (categoryId, size = 20) => {
+        try {
+            const token = localStorage.getItem('token');
+            const res = await axiosInstance.get("/exercises/session", {
+                params: { category_id: categoryId, size },
+                headers: {
+                    Authorization: `Bearer ${token}`
+                }
+            });
+
+            return res.data.cards;
+        } catch (error) {
+            console.error("Error fetching exercise session:", error);
+            const errorMessage = error.response?.data?.error || "Failed to start exercise";
+            toast.error(errorMessage);
+            return null;
+        }
+    },
+
+    recordPracticeSession: async (data, idempotencyKey) => {
+        try {
+            const token = localStorage.getItem('token');
+            const res = await axiosInstance.post("/practice/sessions", data, {
+                headers: {
+                    Authorization: `Bearer ${token}`,
+                    "Idempotency-Key": idempotencyKey
+                }
+            });
+
+            return res.data.session;
+        } catch (error) {
+            console.error("Error recording practice session:", error);
+            const errorMessage = error.response?.data?.error || "Failed to save practice results";
+            toast.error(errorMessage);
+            return null;
+        }
+    },
+
     clearCurrentFlashcard: () => {
         set({ currentFlashcard: null });
     }